@@ -0,0 +1,47 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from repositories import CLIENT_CONFIG
+
+# botocore calls block, so coroutines hand them to a thread pool sized to the
+# client's connection pool; gather() then overlaps independent round trips
+executor = ThreadPoolExecutor(max_workers=CLIENT_CONFIG.max_pool_connections)
+
+# One event loop per thread (a Lambda container has one; threaded servers
+# run several requests at once), reused across warm invocations
+_local = threading.local()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the I/O pool without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+class AsyncRepository:
+    """
+    Awaitable view of a repository: every public method returns a coroutine.
+    AsyncRepository(GardenRepository()).get(user_id, garden_id)
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def __getattr__(self, name):
+        method = getattr(self.repository, name)
+        if not callable(method) or name.startswith('_'):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await run_blocking(method, *args, **kwargs)
+        return call
+
+
+def run(coroutine):
+    """Drive a coroutine to completion from a synchronous Lambda entry point"""
+    loop = getattr(_local, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = _local.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coroutine)
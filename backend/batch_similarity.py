@@ -0,0 +1,144 @@
+"""
+Top-k corpus matches for many queries at once (offline jobs, e.g. suggestions
+for every garden with an empty plot).
+
+Queries are scored against the float corpus matrix with blocked matrix
+multiplies (embedding_index.top_k_batch), so memory stays bounded by the
+block sizes. Large batches are split into shards and run in a process pool;
+every worker memory-maps the same embeddings.npy, so the corpus is paged in
+once and shared through the OS page cache.
+
+    python batch_similarity.py --embeddings queries.npy --k 10 --out matches.jsonl
+    python batch_similarity.py --blueprints keys.jsonl --k 5 --out matches.jsonl
+"""
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from embedding_index import CORPUS_DIR, EMBEDDINGS_FILE, normalize, top_k_batch
+from embedding_model import _available_cpus, get_model
+
+# Below this many queries a single process is faster than starting a pool
+PARALLEL_MIN_QUERIES = 2048
+SHARD_SIZE = 1024
+# Blueprints are fetched and embedded this many at a time, so only one
+# chunk of (multi-MB) PNGs is in memory; embeddings are scored in batches
+# of PARALLEL_MIN_QUERIES to keep the process pool worthwhile
+FETCH_CHUNK = 64
+# BLAS would otherwise start one thread per core in every worker. They are
+# read when NumPy loads, so workers are spawned (fresh interpreters, not forks
+# of this already-initialised process) with the variables set to 1.
+BLAS_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+_worker_vectors = None
+
+
+def _load_vectors(corpus_dir):
+    path = os.path.join(corpus_dir, EMBEDDINGS_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; build the corpus embeddings first")
+    return np.load(path, mmap_mode='r')
+
+
+def _init_worker(corpus_dir):
+    global _worker_vectors
+    _worker_vectors = _load_vectors(corpus_dir)
+
+
+def _search_shard(queries, k):
+    return top_k_batch(_worker_vectors, queries, k)
+
+
+def search_embeddings(queries, k=5, workers=None, corpus_dir=CORPUS_DIR):
+    """
+    (rows, similarities), each (N, k), best first, for N query embeddings.
+    workers=None uses one process per available CPU once N reaches
+    PARALLEL_MIN_QUERIES; with a single CPU everything runs in-process.
+    """
+    queries = normalize(queries)
+    workers = workers or _available_cpus()
+    if workers == 1 or len(queries) < PARALLEL_MIN_QUERIES:
+        return top_k_batch(_load_vectors(corpus_dir), queries, k)
+
+    shards = [queries[start:start + SHARD_SIZE] for start in range(0, len(queries), SHARD_SIZE)]
+    saved = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+    os.environ.update({name: '1' for name in BLAS_THREAD_VARIABLES})
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(corpus_dir,)) as pool:
+            results = list(pool.map(_search_shard, shards, [k] * len(shards)))
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return np.concatenate([rows for rows, _ in results]), np.concatenate([sims for _, sims in results])
+
+
+def _score(found_keys, embeddings, k, workers):
+    rows, similarities = search_embeddings(np.concatenate(embeddings), k, workers)
+    for key, found, scores in zip(found_keys, rows, similarities):
+        yield key, [{"row": int(row), "similarity": float(similarity)} for row, similarity in zip(found, scores)]
+
+
+def search_blueprints(keys, k=5, workers=None):
+    """
+    Yields ((userId, blueprintId), [{row, similarity}]) for stored blueprints,
+    embedding their PNG renders with the ONNX model. Blueprints without a PNG
+    are left out. PNGs are fetched FETCH_CHUNK at a time and dropped once
+    embedded, so memory does not grow with the number of keys.
+    """
+    from repositories import BlueprintRepository
+
+    repository = BlueprintRepository()
+    model = get_model()
+    pending_keys, pending_embeddings = [], []
+    embedded = 0
+    for start in range(0, len(keys), FETCH_CHUNK):
+        items = repository.get_many(keys[start:start + FETCH_CHUNK], fields=['userId', 'blueprintId', 'pngImage'])
+        items = [item for item in items if item.get('pngImage')]
+        if not items:
+            continue
+        pending_embeddings.append(model.embed([item['pngImage'] for item in items]))
+        pending_keys += [(item['userId'], item['blueprintId']) for item in items]
+        embedded += len(items)
+        if len(pending_keys) >= PARALLEL_MIN_QUERIES:
+            print(f"Embedded {embedded} of {len(keys)} blueprints")
+            yield from _score(pending_keys, pending_embeddings, k, workers)
+            pending_keys, pending_embeddings = [], []
+    if pending_keys:
+        yield from _score(pending_keys, pending_embeddings, k, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top-k corpus matches for a batch of queries")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--embeddings', help="(N, embedding_dim) .npy of query embeddings")
+    source.add_argument('--blueprints', help="JSON lines of {\"userId\", \"blueprintId\"}")
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--workers', type=int, help="Processes (default: available CPUs)")
+    parser.add_argument('--out', required=True, help="JSON lines output, one line per query")
+    args = parser.parse_args()
+
+    with open(args.out, 'w') as out:
+        if args.embeddings:
+            rows, similarities = search_embeddings(np.load(args.embeddings), args.k, args.workers)
+            for query, (found, scores) in enumerate(zip(rows, similarities)):
+                out.write(json.dumps({"query": query, "rows": found.tolist(), "similarities": scores.tolist()}) + '\n')
+            print(f"Matched {len(rows)} queries into {args.out}")
+        else:
+            with open(args.blueprints) as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            keys = [(record['userId'], record['blueprintId']) for record in records]
+            matched = 0
+            for (user_id, blueprint_id), matches in search_blueprints(keys, args.k, args.workers):
+                out.write(json.dumps({"userId": user_id, "blueprintId": blueprint_id, "matches": matches}) + '\n')
+                matched += 1
+            print(f"Matched {matched} of {len(keys)} blueprints into {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Compare the sync and async execution paths for multi-call flows against a
+local DynamoDB stand-in that answers from memory after a fixed latency.
+
+    python benchmark_async.py --latency-ms 15 --iterations 50 --blueprints 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault('GARDENS_TABLE', 'florify-gardens-bench')
+os.environ.setdefault('BLUEPRINTS_TABLE', 'florify-blueprints-bench')
+os.environ.setdefault('BLUEPRINT_VERSIONS_TABLE', 'florify-blueprint-versions-bench')
+
+import repositories
+from repositories import BlueprintRepository, GardenRepository, to_item
+from async_support import AsyncRepository, run
+from blueprint_versions import history_key
+from garden_cache import TTLCache
+
+USER_ID = 'bench-user'
+GARDEN_ID = 'bench-garden'
+
+
+class StandInClient:
+    """
+    Minimal in-memory DynamoDB client: canned responses per operation, each
+    delayed by a fixed round trip. Only the calls these flows make are supported.
+    """
+
+    def __init__(self, latency, blueprint_count, versions_per_blueprint=12):
+        self.latency = latency
+        self.blueprint_ids = [f'bench-blueprint-{i}' for i in range(blueprint_count)]
+        self.versions_per_blueprint = versions_per_blueprint
+        self.calls = 0
+
+    def _round_trip(self):
+        self.calls += 1
+        time.sleep(self.latency)
+
+    def get_item(self, TableName, Key, **kwargs):
+        self._round_trip()
+        if TableName == os.environ['GARDENS_TABLE']:
+            item = {'userId': USER_ID, 'gardenId': GARDEN_ID, 'name': 'Bench garden', 'plantCount': 12}
+        else:
+            item = {'userId': USER_ID, 'blueprintId': Key['blueprintId']['S'], 'gardenId': GARDEN_ID, 'version': 3}
+        return {'Item': to_item(item)}
+
+    def query(self, TableName, **kwargs):
+        self._round_trip()
+        index = kwargs.get('IndexName')
+        if index == 'GardenUserUpdatedIndex':
+            items = [{'userId': USER_ID, 'blueprintId': self.blueprint_ids[0]}] if self.blueprint_ids else []
+        elif index == 'GardenIdIndex':
+            items = [{'blueprintId': blueprint_id} for blueprint_id in self.blueprint_ids]
+        else:
+            key = kwargs['ExpressionAttributeValues'][':key']['S']
+            items = [{'blueprintKey': key, 'version': v} for v in range(1, self.versions_per_blueprint + 1)]
+        return {'Items': [to_item(item) for item in items]}
+
+    def delete_item(self, TableName, Key, **kwargs):
+        self._round_trip()
+        return {'Attributes': Key}
+
+    def batch_write_item(self, RequestItems):
+        self._round_trip()
+        return {'UnprocessedItems': {}}
+
+
+# Garden reads bypass the container cache so every run pays the round trip
+gardens = GardenRepository(cache=TTLCache(ttl=0))
+blueprints = BlueprintRepository()
+async_gardens = AsyncRepository(gardens)
+async_blueprints = AsyncRepository(blueprints)
+
+
+def overview_sync():
+    garden = gardens.get(USER_ID, GARDEN_ID)
+    blueprint = blueprints.latest_for_garden(USER_ID, GARDEN_ID)
+    return garden, blueprint
+
+
+async def overview_async():
+    async def blueprint():
+        key = await async_blueprints.latest_key_for_garden(USER_ID, GARDEN_ID)
+        return await async_blueprints.get(*key) if key else None
+    return await asyncio.gather(async_gardens.get(USER_ID, GARDEN_ID), blueprint())
+
+
+def cascade_delete_sync():
+    gardens.delete(USER_ID, GARDEN_ID)
+    for blueprint_id in blueprints.keys_for_garden(USER_ID, GARDEN_ID):
+        blueprints.delete(USER_ID, blueprint_id)
+        blueprints.delete_versions(history_key(USER_ID, blueprint_id))
+
+
+async def cascade_delete_async():
+    _, blueprint_ids = await asyncio.gather(
+        async_gardens.delete(USER_ID, GARDEN_ID),
+        async_blueprints.keys_for_garden(USER_ID, GARDEN_ID)
+    )
+    await asyncio.gather(*(
+        call
+        for blueprint_id in blueprint_ids
+        for call in (
+            async_blueprints.delete(USER_ID, blueprint_id),
+            async_blueprints.delete_versions(history_key(USER_ID, blueprint_id))
+        )
+    ))
+
+
+def measure(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async multi-call flows")
+    parser.add_argument('--latency-ms', type=float, default=15.0, help="Simulated DynamoDB round trip")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--blueprints', type=int, default=8, help="Blueprints removed by the cascading delete")
+    args = parser.parse_args()
+
+    repositories.set_client(StandInClient(args.latency_ms / 1000, args.blueprints))
+
+    flows = [
+        ('overview', overview_sync, lambda: run(overview_async())),
+        (f'cascade delete ({args.blueprints} blueprints)', cascade_delete_sync, lambda: run(cascade_delete_async())),
+    ]
+    print(f"Round trip {args.latency_ms} ms, {args.iterations} iterations")
+    for name, sync_flow, async_flow in flows:
+        sync_p50, sync_p95 = measure(sync_flow, args.iterations)
+        async_p50, async_p95 = measure(async_flow, args.iterations)
+        print(f"{name:32} sync p50 {sync_p50:7.1f} ms  p95 {sync_p95:7.1f} ms | "
+              f"async p50 {async_p50:7.1f} ms  p95 {async_p95:7.1f} ms | {sync_p50 / async_p50:4.1f}x")
+
+
+if __name__ == '__main__':
+    main()
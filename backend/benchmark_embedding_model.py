@@ -0,0 +1,101 @@
+"""
+Cold-load time and per-image latency of the embedding model: the original
+PyTorch module (if torch is installed) against the float32 and int8 ONNX
+exports under onnxruntime, with each intra-op thread count requested.
+Embeddings are also compared with the float32 ONNX output (mean cosine).
+
+    python benchmark_embedding_model.py --images 32 --threads 1 2
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+import numpy as np
+from embedding_index import CORPUS_DIR, load_metadata, normalize
+from embedding_model import EmbeddingModel, preprocess
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+
+def time_per_image(embed, inputs):
+    timings = []
+    outputs = []
+    for item in inputs:
+        start = time.perf_counter()
+        outputs.append(embed(item))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, normalize(np.stack(outputs))
+
+
+def report(name, load_ms, timings, agreement):
+    print(f"{name:28} load {load_ms:8.0f} ms | p50 {statistics.median(timings):7.1f} ms "
+          f"p95 {percentile(timings, 0.95):7.1f} ms | cosine vs onnx fp32 {agreement}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding model inference paths")
+    parser.add_argument('--images', type=int, default=32, help="Corpus images to embed")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--weights', help="Fine-tuned weights for the PyTorch baseline")
+    args = parser.parse_args()
+
+    size = load_metadata()['img_size']
+    paths = sorted(glob.glob(os.path.join(CORPUS_DIR, 'png_cache', 'empty', '*.png')))[:args.images]
+
+    start = time.perf_counter()
+    batches = [preprocess(path, size)[None] for path in paths]
+    print(f"Preprocessing (Pillow/NumPy): {(time.perf_counter() - start) * 1000 / len(paths):.1f} ms per image, {len(paths)} images")
+
+    reference = None
+    for label, filename in (('onnx fp32', 'embedding_model.onnx'), ('onnx int8', 'embedding_model.int8.onnx')):
+        path = os.path.join(CORPUS_DIR, filename)
+        if not os.path.exists(path):
+            print(f"{label}: {path} missing, run export_embedding_model.py first")
+            continue
+        for threads in args.threads:
+            # Cold load: session creation plus the first inference (graph optimization, allocations)
+            start = time.perf_counter()
+            model = EmbeddingModel(path, threads=threads, size=size)
+            model.session.run(None, {model.input_name: batches[0]})
+            load_ms = (time.perf_counter() - start) * 1000
+
+            timings, embeddings = time_per_image(
+                lambda batch: model.session.run(None, {model.input_name: batch})[0][0], batches)
+            if reference is None:
+                reference = embeddings
+            agreement = f"{np.mean(np.sum(embeddings * reference, axis=1)):.4f}"
+            report(f"{label} ({threads} threads)", load_ms, timings, agreement)
+
+    # The framework import is part of a cold start (onnxruntime's is inside the first load above)
+    start = time.perf_counter()
+    try:
+        import torch
+    except ImportError:
+        print("torch not installed, skipping the PyTorch baseline")
+        return
+    import_ms = (time.perf_counter() - start) * 1000
+    print(f"import torch: {import_ms:.0f} ms")
+
+    from export_embedding_model import build_model
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        start = time.perf_counter()
+        model = build_model(args.weights)
+        with torch.inference_mode():
+            model(torch.from_numpy(batches[0]))
+        load_ms = (time.perf_counter() - start) * 1000
+
+        def embed(batch):
+            with torch.inference_mode():
+                return model(torch.from_numpy(batch)).numpy()[0]
+        timings, embeddings = time_per_image(embed, batches)
+        agreement = f"{np.mean(np.sum(embeddings * reference, axis=1)):.4f}" if reference is not None else "n/a"
+        report(f"pytorch ({threads} threads)", load_ms, timings, agreement)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare the float, int8 and product-quantized embedding indexes: resident
+memory, per-query latency and recall@k against exact float search.
+
+Uses blueprint_embeddings_db/embeddings.npy when present; otherwise a
+synthetic corpus of the same shape (clustered, non-negative like pooled CNN
+features). Queries are corpus rows with noise added, i.e. "a plot like one
+we have seen".
+
+    python benchmark_embeddings.py --k 5 --queries 200
+    python benchmark_embeddings.py --embeddings path/to/embeddings.npy --pairs 20000
+"""
+import argparse
+import os
+import statistics
+import time
+import numpy as np
+from embedding_index import CORPUS_DIR, EMBEDDINGS_FILE, EmbeddingIndex, load_metadata, normalize, top_k
+
+
+def synthetic_corpus(pairs, dim, rng, clusters=40):
+    centers = rng.gamma(0.6, 1.0, size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=pairs)
+    vectors = np.maximum(centers[labels] + rng.normal(0, 0.35, size=(pairs, dim)), 0)
+    return vectors.astype(np.float32)
+
+
+def recall_at_k(found, expected):
+    return len(set(found) & set(expected)) / len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding search")
+    parser.add_argument('--embeddings', help="float32 .npy corpus (default: the corpus directory's embeddings.npy)")
+    parser.add_argument('--pairs', type=int, help="Synthetic corpus size (default: num_pairs from metadata.json)")
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--candidates', type=int, default=50, help="Rerank candidates")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    metadata = load_metadata()
+    path = args.embeddings or os.path.join(CORPUS_DIR, EMBEDDINGS_FILE)
+    if os.path.exists(path) and not args.pairs:
+        vectors = np.load(path).astype(np.float32)
+        print(f"Corpus {path}: {vectors.shape}")
+    else:
+        vectors = synthetic_corpus(args.pairs or metadata['num_pairs'], metadata['embedding_dim'], rng)
+        print(f"Synthetic corpus {vectors.shape} (no embeddings.npy found)")
+
+    vectors = normalize(vectors)
+    picks = rng.integers(0, len(vectors), size=args.queries)
+    queries = normalize(vectors[picks] + rng.normal(0, 0.02, size=(args.queries, vectors.shape[1])).astype(np.float32))
+    exact = [top_k(vectors @ query, args.k).tolist() for query in queries]
+
+    print(f"{'index':14} {'memory':>10} {'build':>8} {'p50':>9} {'p95':>9} {'recall@' + str(args.k):>10}")
+    for mode, rerank in (('float', False), ('int8', False), ('int8', True), ('pq', False), ('pq', True)):
+        start = time.perf_counter()
+        index = EmbeddingIndex.from_vectors(vectors, mode)
+        build = time.perf_counter() - start
+
+        timings, recalls = [], []
+        for query, expected in zip(queries, exact):
+            start = time.perf_counter()
+            results = index.search(query, args.k, candidates=args.candidates, rerank=rerank)
+            timings.append((time.perf_counter() - start) * 1000)
+            recalls.append(recall_at_k([row for row, _ in results], expected))
+        timings.sort()
+
+        name = f"{mode}{' + rerank' if rerank else ''}"
+        print(f"{name:14} {index.nbytes() / 1e6:8.3f}MB {build:7.2f}s {statistics.median(timings):7.3f}ms "
+              f"{timings[int(len(timings) * 0.95) - 1]:7.3f}ms {statistics.mean(recalls):10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import json
+import numpy as np
+
+# Tolerance for point-on-edge tests, in feet
+EPSILON = 1e-9
+
+# Paved collections in blueprintData and the element kind reported for each
+PAVED_COLLECTIONS = (('driveways', 'driveway'), ('pathways', 'pathway'), ('patios', 'patio'))
+
+
+def _load(blueprint_data):
+    if isinstance(blueprint_data, str):
+        return json.loads(blueprint_data) if blueprint_data else {}
+    return blueprint_data or {}
+
+
+def _vertex_array(vertices):
+    return np.array([(v['x'], v['y']) for v in vertices], dtype=np.float64).reshape(-1, 2)
+
+
+def _next_indices(poly_ids):
+    """Index of the following vertex within the same polygon (wrapping at the end)"""
+    count = len(poly_ids)
+    if count == 0:
+        return np.zeros(0, dtype=np.intp)
+    positions = np.arange(count)
+    is_start = np.r_[True, poly_ids[1:] != poly_ids[:-1]]
+    is_end = np.r_[poly_ids[1:] != poly_ids[:-1], True]
+    group_start = np.maximum.accumulate(np.where(is_start, positions, 0))
+    following = positions + 1
+    following[is_end] = group_start[is_end]
+    return following
+
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+def shoelace_areas(coords, poly_ids, count):
+    """Absolute area of every polygon in a packed vertex array"""
+    if len(coords) == 0:
+        return np.zeros(count)
+    following = _next_indices(poly_ids)
+    x, y = coords[:, 0], coords[:, 1]
+    terms = x * y[following] - x[following] * y
+    return np.abs(np.bincount(poly_ids, weights=terms, minlength=count)) / 2.0
+
+
+def signed_area(polygon):
+    x, y = polygon[:, 0], polygon[:, 1]
+    return float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y) / 2.0)
+
+
+def clip_to_convex(coords, poly_ids, clips):
+    """
+    Sutherland-Hodgman clipping of many packed polygons at once.
+    clips is a (P, K, 2) array holding a counter-clockwise convex clip polygon
+    for every subject polygon (pad shorter clip polygons by repeating their
+    last vertex). Each clip edge is applied to all subject vertices in one
+    vectorized pass; returns the clipped (coords, poly_ids).
+    """
+    edge_count = clips.shape[1]
+    for k in range(edge_count):
+        if len(coords) == 0:
+            break
+        a = clips[poly_ids, k]
+        edge = clips[poly_ids, (k + 1) % edge_count] - a
+        following = _next_indices(poly_ids)
+        nxt = coords[following]
+
+        cur_side = _cross(edge[:, 0], edge[:, 1], coords[:, 0] - a[:, 0], coords[:, 1] - a[:, 1])
+        nxt_side = _cross(edge[:, 0], edge[:, 1], nxt[:, 0] - a[:, 0], nxt[:, 1] - a[:, 1])
+        cur_in = cur_side >= -EPSILON
+        nxt_in = nxt_side >= -EPSILON
+        crossing = cur_in != nxt_in
+
+        denominator = np.where(crossing, cur_side - nxt_side, 1.0)
+        t = np.where(crossing, cur_side / denominator, 0.0)
+        intersection = coords + t[:, None] * (nxt - coords)
+
+        # Every subject edge emits up to two points: the crossing, then its end vertex
+        emitted = np.stack([intersection, nxt], axis=1).reshape(-1, 2)
+        keep = np.stack([crossing, nxt_in], axis=1).reshape(-1)
+        coords = emitted[keep]
+        poly_ids = np.repeat(poly_ids, 2)[keep]
+    return coords, poly_ids
+
+
+def pathway_quads(vertices, width):
+    """Split a pathway centre line into one rectangle per segment, shape (S, 4, 2)"""
+    points = _vertex_array(vertices)
+    if len(points) < 2 or width <= 0:
+        return np.zeros((0, 4, 2))
+    start, end = points[:-1], points[1:]
+    direction = end - start
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    valid = length > EPSILON
+    start, end, direction, length = start[valid], end[valid], direction[valid], length[valid]
+    normal = np.stack([-direction[:, 1], direction[:, 0]], axis=1) / length[:, None] * (width / 2.0)
+    return np.stack([start + normal, end + normal, end - normal, start - normal], axis=1)
+
+
+def _plot_polygon(data):
+    for shape in data.get('shapes', []):
+        if shape.get('layer') == 'plot' and len(shape.get('vertices') or []) >= 3:
+            return _vertex_array(shape['vertices'])
+    return None
+
+
+def _collect_polygons(data):
+    """Return [(category, surfaceType, (n, 2) array)] for house and paved polygons"""
+    polygons = []
+    for shape in data.get('shapes', []):
+        if shape.get('layer') == 'house' and len(shape.get('vertices') or []) >= 3:
+            polygons.append(('house', None, _vertex_array(shape['vertices'])))
+
+    for collection, kind in PAVED_COLLECTIONS:
+        for item in data.get(collection, []):
+            vertices = item.get('vertices') or []
+            surface = item.get('surfaceType') or 'unknown'
+            if kind == 'pathway':
+                for quad in pathway_quads(vertices, float(item.get('width', 0))):
+                    polygons.append((kind, surface, quad))
+            elif len(vertices) >= 3:
+                polygons.append((kind, surface, _vertex_array(vertices)))
+    return polygons
+
+
+def compute_stats_batch(blueprints):
+    """
+    Compute plot area, house footprint, paved area by surface type and free
+    planting area for many blueprints in one vectorized pass. Every house and
+    paved polygon of every blueprint is packed into a single vertex array and
+    clipped against its own plot boundary. Plots are assumed convex, which
+    holds for the rectangles the plot-size step creates.
+    """
+    stats = []
+    clip_polygons = []
+    packed = []      # (blueprint index, category, surface, polygon)
+
+    for index, blueprint_data in enumerate(blueprints):
+        data = _load(blueprint_data)
+        plot = _plot_polygon(data)
+        stats.append({
+            'plotArea': abs(signed_area(plot)) if plot is not None else 0.0,
+            'houseFootprint': 0.0,
+            'pavedArea': {},
+            'totalPavedArea': 0.0,
+            'freePlantingArea': 0.0,
+        })
+        if plot is None:
+            clip_polygons.append(None)
+            continue
+        if signed_area(plot) < 0:
+            plot = plot[::-1]
+        clip_polygons.append(plot)
+        for category, surface, polygon in _collect_polygons(data):
+            packed.append((index, category, surface, polygon))
+
+    if packed:
+        max_clip = max(len(clip_polygons[entry[0]]) for entry in packed)
+        clips = np.empty((len(packed), max_clip, 2))
+        for i, (index, _, _, _) in enumerate(packed):
+            plot = clip_polygons[index]
+            clips[i, :len(plot)] = plot
+            clips[i, len(plot):] = plot[-1]
+
+        lengths = np.array([len(entry[3]) for entry in packed])
+        coords = np.concatenate([entry[3] for entry in packed])
+        poly_ids = np.repeat(np.arange(len(packed)), lengths)
+
+        coords, poly_ids = clip_to_convex(coords, poly_ids, clips)
+        areas = shoelace_areas(coords, poly_ids, len(packed))
+
+        for (index, category, surface, _), area in zip(packed, areas):
+            if category == 'house':
+                stats[index]['houseFootprint'] += float(area)
+            else:
+                by_surface = stats[index]['pavedArea'].setdefault(category, {})
+                by_surface[surface] = by_surface.get(surface, 0.0) + float(area)
+                stats[index]['totalPavedArea'] += float(area)
+
+    for item in stats:
+        free = item['plotArea'] - item['houseFootprint'] - item['totalPavedArea']
+        item['freePlantingArea'] = max(free, 0.0)
+
+    return [_rounded(item) for item in stats]
+
+
+def compute_stats(blueprint_data):
+    """Geometry stats for a single blueprint"""
+    return compute_stats_batch([blueprint_data])[0]
+
+
+def _rounded(value):
+    if isinstance(value, dict):
+        return {key: _rounded(inner) for key, inner in value.items()}
+    return round(value, 3)
@@ -0,0 +1,61 @@
+"""
+Nearest corpus pairs for a blueprint render.
+
+Two stages:
+1. pHash Hamming distance against png_hashes.npy (microseconds for the whole
+   corpus). Near-identical renders are answered from the hash alone, without
+   running the embedding model.
+2. Embedding similarity, restricted to the rows within PREFILTER_DISTANCE bits
+   when enough of them survive, otherwise over the full index.
+"""
+import os
+from embedding_index import get_index, load_metadata
+from embedding_model import get_model
+from image_hash import get_corpus_hashes, phash
+
+# Measured on the corpus: distinct drawings are <= 2 bits apart in ~0.06% of
+# pairs, and 20 bits keeps about a fifth of the corpus.
+DUPLICATE_DISTANCE = int(os.environ.get('PHASH_DUPLICATE_DISTANCE', '2'))
+PREFILTER_DISTANCE = int(os.environ.get('PHASH_PREFILTER_DISTANCE', '20'))
+# Below this many survivors the prefilter is too tight to trust
+MIN_CANDIDATES = 50
+
+
+def pair_paths(row):
+    name = f"{row:04d}.png"
+    return {"empty": f"png_cache/empty/{name}", "filled": f"png_cache/filled/{name}"}
+
+
+def _result(row, similarity, distance):
+    return {"row": row, **pair_paths(row), "similarity": similarity, "hashDistance": distance}
+
+
+def similar_to_image(source, k=5, min_similarity=None):
+    """
+    Up to k corpus pairs most similar to a render (path, bytes or base64 PNG),
+    best first: [{row, empty, filled, similarity, hashDistance}].
+    similarity is None for hash-only matches.
+    """
+    if min_similarity is None:
+        min_similarity = load_metadata().get('min_similarity_threshold', 0.0)
+
+    rows, distances = get_corpus_hashes().candidates(phash(source), PREFILTER_DISTANCE)
+    distance_by_row = dict(zip(rows.tolist(), distances.tolist()))
+
+    duplicates = int((distances <= DUPLICATE_DISTANCE).sum())
+    if duplicates >= k:
+        print(f"pHash: {duplicates} near-duplicates, skipping the embedding model")
+        return [_result(row, None, distance) for row, distance in zip(rows[:k].tolist(), distances[:k].tolist())]
+
+    embedding = get_model().embed_one(source)
+    if len(rows) >= max(k, MIN_CANDIDATES):
+        print(f"pHash prefilter: {len(rows)} of {len(get_corpus_hashes().hashes)} rows")
+        found = get_index().search(embedding, k, rows=rows)
+    else:
+        found = get_index().search(embedding, k)
+
+    return [
+        _result(row, similarity, distance_by_row.get(row))
+        for row, similarity in found
+        if similarity >= min_similarity
+    ]
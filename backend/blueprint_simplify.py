@@ -0,0 +1,127 @@
+import json
+import math
+import os
+import numpy as np
+
+# Mirrors SNAP_THRESHOLD_FT in replit_floorplan/shared/schema.ts
+SNAP_THRESHOLD_FT = 0.5
+
+# Default tolerance as a fraction of the snap threshold; deviations below
+# this are invisible at editing zoom and would be snapped away anyway
+SIMPLIFY_TOLERANCE_RATIO = float(os.environ.get('SIMPLIFY_TOLERANCE_RATIO', '0.25'))
+DEFAULT_TOLERANCE_FT = SNAP_THRESHOLD_FT * SIMPLIFY_TOLERANCE_RATIO
+
+
+def rdp_mask(points, tolerance):
+    """
+    Ramer-Douglas-Peucker on an (n, 2) array. Returns a boolean mask of the
+    vertices to keep. Iterative, so long freehand paths cannot hit the
+    recursion limit.
+    """
+    count = len(points)
+    keep = np.zeros(count, dtype=bool)
+    if count <= 2:
+        keep[:] = True
+        return keep
+
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        relative = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(relative[:, 0], relative[:, 1])
+        else:
+            distances = np.abs(segment[0] * relative[:, 1] - segment[1] * relative[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def simplify_vertices(vertices, tolerance=DEFAULT_TOLERANCE_FT):
+    """Simplify a list of {x, y} vertices, preserving any extra keys on kept points"""
+    if len(vertices) <= 2:
+        return list(vertices)
+    points = np.array([(v['x'], v['y']) for v in vertices], dtype=np.float64)
+    keep = rdp_mask(points, tolerance)
+    return [vertex for vertex, kept in zip(vertices, keep) if kept]
+
+
+def simplify_pathways(blueprint_data, tolerance=DEFAULT_TOLERANCE_FT):
+    """
+    Simplify every pathway centre line in blueprintData.
+    Returns (simplified_data, originals, report) where originals maps
+    pathway id -> original vertex list for pathways that actually changed.
+    """
+    bytes_before = len(json.dumps(blueprint_data))
+    originals = {}
+    vertices_before = 0
+    vertices_after = 0
+
+    pathways = []
+    for pathway in blueprint_data.get('pathways', []):
+        vertices = pathway.get('vertices') or []
+        simplified = simplify_vertices(vertices, tolerance)
+        vertices_before += len(vertices)
+        vertices_after += len(simplified)
+        if len(simplified) < len(vertices):
+            originals[pathway.get('id')] = vertices
+            pathway = {**pathway, 'vertices': simplified}
+        pathways.append(pathway)
+
+    simplified_data = {**blueprint_data, 'pathways': pathways} if 'pathways' in blueprint_data else blueprint_data
+    bytes_after = len(json.dumps(simplified_data))
+
+    report = {
+        "toleranceFt": tolerance,
+        "pathwaysSimplified": len(originals),
+        "verticesBefore": vertices_before,
+        "verticesAfter": vertices_after,
+        "bytesBefore": bytes_before,
+        "bytesAfter": bytes_after,
+        "reductionPercent": round(100.0 * (bytes_before - bytes_after) / bytes_before, 1) if bytes_before else 0.0
+    }
+    return simplified_data, originals, report
+
+
+def parse_simplify_option(body):
+    """
+    Read the optional "simplify" request field: either a boolean, or an object
+    {"toleranceFt": float, "keepOriginal": bool}. Returns (enabled, tolerance, keep_original).
+    """
+    option = body.get('simplify', os.environ.get('SIMPLIFY_PATHWAYS', '').lower() == 'true')
+    if isinstance(option, dict):
+        tolerance = option.get('toleranceFt', DEFAULT_TOLERANCE_FT)
+        if isinstance(tolerance, bool):
+            raise ValueError("toleranceFt must be a number")
+        tolerance = float(tolerance)
+        # nan and inf pass a < 0 check but would reduce every pathway to its endpoints
+        if not math.isfinite(tolerance) or tolerance < 0:
+            raise ValueError("toleranceFt must be a finite, non-negative number")
+        keep_original = option.get('keepOriginal', False)
+        if not isinstance(keep_original, bool):
+            raise ValueError("keepOriginal must be true or false")
+        return True, tolerance, keep_original
+    # Only real booleans: bool("false") would switch simplification on
+    if not isinstance(option, bool):
+        raise ValueError("simplify must be true, false or an options object")
+    return option, DEFAULT_TOLERANCE_FT, False
+
+
+def restore_originals(blueprint_data, original_pathways):
+    """Put the stored original vertices back onto simplified pathways"""
+    if isinstance(original_pathways, str):
+        original_pathways = json.loads(original_pathways)
+    pathways = []
+    for pathway in blueprint_data.get('pathways', []):
+        original = original_pathways.get(pathway.get('id'))
+        pathways.append({**pathway, 'vertices': original} if original is not None else pathway)
+    return {**blueprint_data, 'pathways': pathways}
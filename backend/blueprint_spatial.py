@@ -0,0 +1,251 @@
+import heapq
+import json
+import math
+
+# Maximum number of entries per R-tree node
+NODE_CAPACITY = 16
+
+# Element kinds that count as paved surfaces
+PAVED_KINDS = ('driveway', 'pathway', 'patio')
+
+
+def polygon_area(vertices):
+    """Area of a simple polygon using the shoelace formula"""
+    if len(vertices) < 3:
+        return 0.0
+    total = 0.0
+    for i in range(len(vertices)):
+        x1, y1 = vertices[i]['x'], vertices[i]['y']
+        x2, y2 = vertices[(i + 1) % len(vertices)]['x'], vertices[(i + 1) % len(vertices)]['y']
+        total += x1 * y2 - x2 * y1
+    return abs(total) / 2.0
+
+
+def polyline_length(vertices):
+    """Total length of an open polyline"""
+    length = 0.0
+    for i in range(1, len(vertices)):
+        length += math.hypot(vertices[i]['x'] - vertices[i - 1]['x'],
+                             vertices[i]['y'] - vertices[i - 1]['y'])
+    return length
+
+
+def vertices_bbox(vertices, pad=0.0):
+    """Bounding box (minX, minY, maxX, maxY) of a vertex list, optionally padded"""
+    xs = [v['x'] for v in vertices]
+    ys = [v['y'] for v in vertices]
+    return (min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad)
+
+
+def bbox_intersects(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def bbox_union(boxes):
+    return (
+        min(b[0] for b in boxes),
+        min(b[1] for b in boxes),
+        max(b[2] for b in boxes),
+        max(b[3] for b in boxes),
+    )
+
+
+def bbox_distance(bbox, x, y):
+    """Minimum distance from a point to a bounding box (0 if inside)"""
+    dx = max(bbox[0] - x, 0.0, x - bbox[2])
+    dy = max(bbox[1] - y, 0.0, y - bbox[3])
+    return math.hypot(dx, dy)
+
+
+def parse_elements(blueprint_data):
+    """
+    Flatten blueprintData (shapes, doors, driveways, pathways, patios) into
+    a list of elements with a kind, bounding box, surface type and area.
+    Accepts either the stored JSON string or the parsed object.
+    """
+    if isinstance(blueprint_data, str):
+        blueprint_data = json.loads(blueprint_data) if blueprint_data else {}
+    blueprint_data = blueprint_data or {}
+
+    elements = []
+
+    for shape in blueprint_data.get('shapes', []):
+        vertices = shape.get('vertices') or []
+        if not vertices:
+            continue
+        closed = shape.get('type') in ('rectangle', 'polygon')
+        elements.append({
+            'id': shape.get('id'),
+            'kind': shape.get('layer', 'default'),
+            'bbox': vertices_bbox(vertices),
+            'vertices': vertices,
+            'area': polygon_area(vertices) if closed else 0.0,
+        })
+
+    for door in blueprint_data.get('doors', []):
+        position = door.get('position')
+        if not position:
+            continue
+        half_width = float(door.get('width', 0)) / 2.0
+        elements.append({
+            'id': door.get('id'),
+            'kind': 'door',
+            'bbox': vertices_bbox([position], pad=half_width),
+            'position': position,
+            'area': 0.0,
+        })
+
+    for kind, collection in (('driveway', 'driveways'), ('patio', 'patios')):
+        for item in blueprint_data.get(collection, []):
+            vertices = item.get('vertices') or []
+            if not vertices:
+                continue
+            elements.append({
+                'id': item.get('id'),
+                'kind': kind,
+                'bbox': vertices_bbox(vertices),
+                'vertices': vertices,
+                'surfaceType': item.get('surfaceType'),
+                'area': polygon_area(vertices),
+            })
+
+    for pathway in blueprint_data.get('pathways', []):
+        vertices = pathway.get('vertices') or []
+        if not vertices:
+            continue
+        width = float(pathway.get('width', 0))
+        elements.append({
+            'id': pathway.get('id'),
+            'kind': 'pathway',
+            # Pathways are centre lines, so pad the box by half the path width
+            'bbox': vertices_bbox(vertices, pad=width / 2.0),
+            'vertices': vertices,
+            'surfaceType': pathway.get('surfaceType'),
+            'area': polyline_length(vertices) * width,
+        })
+
+    return elements
+
+
+def summarize_element(element):
+    """Compact representation returned to clients (no vertex lists)"""
+    summary = {
+        'id': element['id'],
+        'kind': element['kind'],
+        'bbox': list(element['bbox']),
+        'area': round(element['area'], 3),
+    }
+    if element.get('surfaceType'):
+        summary['surfaceType'] = element['surfaceType']
+    if element.get('position'):
+        summary['position'] = element['position']
+    return summary
+
+
+class _Node:
+    __slots__ = ('bbox', 'children', 'leaf')
+
+    def __init__(self, bbox, children, leaf):
+        self.bbox = bbox
+        self.children = children
+        self.leaf = leaf
+
+
+def _str_pack(entries, capacity):
+    """
+    Sort-Tile-Recursive packing of (bbox, payload) entries into nodes:
+    sort by x-centre into vertical slices, then by y-centre within each slice.
+    """
+    count = len(entries)
+    leaf_count = math.ceil(count / capacity)
+    slice_count = math.ceil(math.sqrt(leaf_count))
+    slice_size = slice_count * capacity
+
+    entries = sorted(entries, key=lambda e: e[0][0] + e[0][2])
+    groups = []
+    for start in range(0, count, slice_size):
+        vertical_slice = sorted(entries[start:start + slice_size], key=lambda e: e[0][1] + e[0][3])
+        for i in range(0, len(vertical_slice), capacity):
+            groups.append(vertical_slice[i:i + capacity])
+    return groups
+
+
+class SpatialIndex:
+    """Static STR-packed R-tree over blueprint elements"""
+
+    def __init__(self, elements, capacity=NODE_CAPACITY):
+        self.elements = elements
+        self.root = None
+        if not elements:
+            return
+
+        level = [
+            _Node(bbox_union([e[0] for e in group]), [e[1] for e in group], True)
+            for group in _str_pack([(el['bbox'], el) for el in elements], capacity)
+        ]
+        while len(level) > 1:
+            level = [
+                _Node(bbox_union([e[0] for e in group]), [e[1] for e in group], False)
+                for group in _str_pack([(node.bbox, node) for node in level], capacity)
+            ]
+        self.root = level[0]
+
+    @classmethod
+    def from_blueprint(cls, blueprint_data):
+        return cls(parse_elements(blueprint_data))
+
+    def query_bbox(self, bbox, kinds=None):
+        """Elements whose bounding box intersects the given box"""
+        results = []
+        if self.root is None or not bbox_intersects(self.root.bbox, bbox):
+            return results
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.leaf:
+                for element in node.children:
+                    if bbox_intersects(element['bbox'], bbox) and (not kinds or element['kind'] in kinds):
+                        results.append(element)
+            else:
+                stack.extend(child for child in node.children if bbox_intersects(child.bbox, bbox))
+        return results
+
+    def nearest(self, x, y, kind=None):
+        """
+        Best-first search for the element nearest to (x, y).
+        Returns (element, distance) or (None, None) if nothing matches.
+        """
+        if self.root is None:
+            return None, None
+
+        counter = 0
+        heap = [(bbox_distance(self.root.bbox, x, y), counter, self.root)]
+        while heap:
+            distance, _, item = heapq.heappop(heap)
+            if isinstance(item, dict):
+                return item, distance
+            for child in item.children:
+                counter += 1
+                if item.leaf:
+                    if kind and child['kind'] != kind:
+                        continue
+                    if child.get('position'):
+                        child_distance = math.hypot(child['position']['x'] - x, child['position']['y'] - y)
+                    else:
+                        child_distance = bbox_distance(child['bbox'], x, y)
+                    heapq.heappush(heap, (child_distance, counter, child))
+                else:
+                    heapq.heappush(heap, (bbox_distance(child.bbox, x, y), counter, child))
+        return None, None
+
+    def paved_area_by_surface(self):
+        """Total paved area (sq ft) grouped by element kind and surface type"""
+        totals = {}
+        for element in self.elements:
+            if element['kind'] not in PAVED_KINDS:
+                continue
+            by_surface = totals.setdefault(element['kind'], {})
+            surface = element.get('surfaceType') or 'unknown'
+            by_surface[surface] = by_surface.get(surface, 0.0) + element['area']
+        return totals
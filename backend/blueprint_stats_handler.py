@@ -0,0 +1,56 @@
+import json
+from botocore.exceptions import ClientError
+from simple_auth import require_auth, respond
+from blueprint_geometry import compute_stats
+from repositories import BlueprintRepository
+
+blueprint_repository = BlueprintRepository()
+
+@require_auth
+def handler(event, context):
+    """
+    Get derived geometry numbers for a blueprint (plot area, house footprint,
+    paved area by surface type, free planting area). Results are cached on the
+    item as geometryStats and reused until the blueprint version changes.
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        blueprint_id = (event.get('pathParameters') or {}).get('blueprintId')
+        if not blueprint_id:
+            return respond(400, {"message": "Blueprint ID is required"})
+
+        blueprint = blueprint_repository.get(user_id, blueprint_id, fields=['blueprintData', 'version', 'geometryStats'])
+        if not blueprint:
+            return respond(404, {"message": "Blueprint not found"})
+
+        # Items created before versioning have no version attribute
+        version = int(blueprint.get('version', 0))
+
+        cached = blueprint.get('geometryStats')
+        if cached:
+            try:
+                cached = json.loads(cached)
+                if cached.get('version') == version:
+                    return respond(200, {"stats": cached['stats'], "version": version, "cached": True})
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse cached geometryStats for blueprint {blueprint_id}")
+
+        stats = compute_stats(blueprint.get('blueprintData', ''))
+
+        # Store as JSON string; only write if nobody saved a newer version meanwhile
+        cached_stats = {'geometryStats': json.dumps({"version": version, "stats": stats})}
+        if not blueprint_repository.set_if_version(user_id, blueprint_id, cached_stats, version):
+            print(f"Blueprint {blueprint_id} changed while computing stats, not caching")
+
+        return respond(200, {"stats": stats, "version": version, "cached": False})
+
+    except json.JSONDecodeError:
+        return respond(422, {"message": "Stored blueprintData is not valid JSON"})
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
@@ -0,0 +1,209 @@
+import copy
+import json
+import os
+import zlib
+
+# A full snapshot is stored at least every SNAPSHOT_INTERVAL versions, so
+# materializing any version replays at most SNAPSHOT_INTERVAL - 1 deltas
+SNAPSHOT_INTERVAL = int(os.environ.get('BLUEPRINT_SNAPSHOT_INTERVAL', '10'))
+
+# Delta operations:
+#   ["set", path, value]    replace the value at path
+#   ["del", path]           remove the value at path
+#   ["add", path, item]     append an id-keyed item to the list at path
+#   ["order", path, ids]    reorder the id-keyed list at path
+#   ["splice", path, start, delete_count, items]
+# Path segments are dict keys (str), list indices (int) or {"id": ...}
+# for elements of id-keyed lists such as shapes, doors and pathways.
+
+
+def _is_id_list(value):
+    # Ids must be hashable scalars; a list or dict id cannot key the list
+    if not all(isinstance(item, dict) and isinstance(item.get('id'), (str, int)) for item in value):
+        return False
+    ids = [item['id'] for item in value]
+    return len(set(ids)) == len(ids)
+
+
+def _same(old, new):
+    """Equality that also tells 0/1 from False/True (== does not), at any depth"""
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, dict):
+        return old.keys() == new.keys() and all(_same(value, new[key]) for key, value in old.items())
+    if isinstance(old, list):
+        return len(old) == len(new) and all(_same(a, b) for a, b in zip(old, new))
+    return old == new
+
+
+def diff(old, new, path=None):
+    """List of operations that turn old into new"""
+    path = path or []
+    if _same(old, new):
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append(["del", path + [key]])
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["set", path + [key], value])
+            else:
+                ops.extend(diff(old[key], value, path + [key]))
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        if old and new and _is_id_list(old) and _is_id_list(new):
+            return _diff_id_list(old, new, path)
+        return _diff_list(old, new, path)
+
+    return [["set", path, new]]
+
+
+def _diff_id_list(old, new, path):
+    ops = []
+    old_by_id = {item['id']: item for item in old}
+    new_ids = [item['id'] for item in new]
+    for item_id in old_by_id:
+        if item_id not in set(new_ids):
+            ops.append(["del", path + [{"id": item_id}]])
+    for item in new:
+        if item['id'] in old_by_id:
+            ops.extend(diff(old_by_id[item['id']], item, path + [{"id": item['id']}]))
+        else:
+            ops.append(["add", path, item])
+    kept_order = [item_id for item_id in old_by_id if item_id in set(new_ids)]
+    kept_order += [item_id for item_id in new_ids if item_id not in old_by_id]
+    if kept_order != new_ids:
+        ops.append(["order", path, new_ids])
+    return ops
+
+
+def _diff_list(old, new, path):
+    # Trim the common prefix and suffix, then either patch in place or splice
+    prefix = 0
+    while prefix < min(len(old), len(new)) and _same(old[prefix], new[prefix]):
+        prefix += 1
+    suffix = 0
+    while (suffix < min(len(old), len(new)) - prefix
+           and _same(old[len(old) - 1 - suffix], new[len(new) - 1 - suffix])):
+        suffix += 1
+
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+    if len(old_middle) == len(new_middle):
+        ops = []
+        for offset, (before, after) in enumerate(zip(old_middle, new_middle)):
+            ops.extend(diff(before, after, path + [prefix + offset]))
+        return ops
+    return [["splice", path, prefix, len(old_middle), new_middle]]
+
+
+def _resolve(container, segment):
+    """Turn a path segment into a concrete dict key or list index"""
+    if isinstance(segment, dict):
+        for index, item in enumerate(container):
+            if item.get('id') == segment['id']:
+                return index
+        raise KeyError(f"No element with id {segment['id']}")
+    return segment
+
+
+def _walk(doc, path):
+    target = doc
+    for segment in path:
+        target = target[_resolve(target, segment)]
+    return target
+
+
+def apply(doc, ops):
+    """Apply delta operations to a deep copy of doc"""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        kind, path = op[0], op[1]
+        if kind == "set" and not path:
+            doc = copy.deepcopy(op[2])
+        elif kind == "set":
+            parent = _walk(doc, path[:-1])
+            parent[_resolve(parent, path[-1])] = copy.deepcopy(op[2])
+        elif kind == "del":
+            parent = _walk(doc, path[:-1])
+            del parent[_resolve(parent, path[-1])]
+        elif kind == "add":
+            _walk(doc, path).append(copy.deepcopy(op[2]))
+        elif kind == "order":
+            target = _walk(doc, path)
+            by_id = {item['id']: item for item in target}
+            target[:] = [by_id[item_id] for item_id in op[2]]
+        elif kind == "splice":
+            target = _walk(doc, path)
+            start, delete_count = op[2], op[3]
+            target[start:start + delete_count] = copy.deepcopy(op[4])
+        else:
+            raise ValueError(f"Unknown delta operation {kind}")
+    return doc
+
+
+def encode(value):
+    """Compact compressed JSON, stored as a DynamoDB binary attribute"""
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decode(payload):
+    raw = payload.value if hasattr(payload, 'value') else bytes(payload)
+    return json.loads(zlib.decompress(raw).decode('utf-8'))
+
+
+def history_key(user_id, blueprint_id):
+    return f"{user_id}#{blueprint_id}"
+
+
+def build_version_item(user_id, blueprint_id, version, old_data, new_data, last_snapshot_version, created_at):
+    """
+    Version log entry for a save. Stores a delta against the previous version
+    unless a snapshot is due (no earlier snapshot, interval reached, or the
+    delta would be larger than the full document).
+    Returns (item, snapshot_version).
+    """
+    snapshot = encode(new_data)
+    payload, kind = snapshot, "snapshot"
+    if last_snapshot_version and version - last_snapshot_version < SNAPSHOT_INTERVAL and old_data is not None:
+        delta = encode(diff(old_data, new_data))
+        if len(delta) < len(snapshot):
+            payload, kind = delta, "delta"
+
+    snapshot_version = version if kind == "snapshot" else last_snapshot_version
+    item = {
+        "blueprintKey": history_key(user_id, blueprint_id),
+        "version": version,
+        "kind": kind,
+        "snapshotVersion": snapshot_version,
+        "payload": payload,
+        "sizeBytes": len(payload),
+        "createdAt": created_at
+    }
+    return item, snapshot_version
+
+
+def materialize(repository, user_id, blueprint_id, version):
+    """
+    Rebuild blueprintData as of a version: load its nearest snapshot and the
+    deltas after it (at most SNAPSHOT_INTERVAL items) and replay them.
+    Returns None if the version does not exist.
+    """
+    key = history_key(user_id, blueprint_id)
+    target = repository.get_version(key, version, fields=['snapshotVersion'])
+    if not target:
+        return None
+
+    snapshot_version = int(target['snapshotVersion'])
+    entries = sorted(repository.version_range(key, snapshot_version, version), key=lambda item: item['version'])
+    if not entries or entries[0]['kind'] != 'snapshot' or len(entries) != version - snapshot_version + 1:
+        raise ValueError(f"Version history for blueprint {blueprint_id} is incomplete")
+
+    data = decode(entries[0]['payload'])
+    for entry in entries[1:]:
+        data = apply(data, decode(entry['payload']))
+    return data
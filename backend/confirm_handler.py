@@ -1,6 +1,7 @@
 import json
 import boto3
 import os
+import rate_limit
 
 client = boto3.client("cognito-idp")
 
@@ -32,6 +33,11 @@ def handler(event, context):
             "body": json.dumps({"message": "Email and code are required"})
         }
 
+    # Reject bursts before they reach Cognito and use up the account's quota
+    retry_after = rate_limit.check("confirm", event, email)
+    if retry_after:
+        return rate_limit.throttled(respond, retry_after)
+
     try:
         client.confirm_sign_up(
             ClientId=os.environ["CLIENT_ID"],
@@ -62,6 +68,8 @@ def handler(event, context):
             "headers": cors_headers(),
             "body": json.dumps({"message": "User is already confirmed"})
         }
+    except client.exceptions.TooManyRequestsException:
+        return rate_limit.throttled(respond, 1)
     except Exception as e:
         return {
             "statusCode": 500,
@@ -69,6 +77,13 @@ def handler(event, context):
             "body": json.dumps({"message": "Internal server error"})
         }
 
+def respond(status, body):
+    return {
+        "statusCode": status,
+        "headers": cors_headers(),
+        "body": json.dumps(body)
+    }
+
 def cors_headers():
     return {
         "Access-Control-Allow-Origin": "*",
@@ -1,13 +1,17 @@
 import json
-import boto3
-import os
 import uuid
 from datetime import datetime
 from botocore.exceptions import ClientError
 from simple_auth import require_auth, respond
+from blueprint_simplify import parse_simplify_option, simplify_pathways
+from blueprint_versions import build_version_item
+from image_hash import data_hash, image_hashes, png_hash
+from repositories import BlueprintRepository, GardenRepository, cancellation_codes
+from search_index import index_blueprint
+import user_summary
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['BLUEPRINTS_TABLE'])
+blueprint_repository = BlueprintRepository()
+garden_repository = GardenRepository()
 
 @require_auth
 def handler(event, context):
@@ -17,7 +21,8 @@ def handler(event, context):
     {
         "gardenId": "uuid",
         "blueprintData": { ... },  # JSON data from replit_floorplan
-        "name": "Optional blueprint name"
+        "name": "Optional blueprint name",
+        "simplify": true | {"toleranceFt": 0.125, "keepOriginal": true}  # Optional
     }
     """
     try:
@@ -42,6 +47,18 @@ def handler(event, context):
         if not garden_id:
             return respond(400, {"message": "Garden ID is required"})
 
+        # Optionally thin out freehand pathway vertices before storing
+        try:
+            simplify, tolerance, keep_original = parse_simplify_option(body)
+        except (TypeError, ValueError):
+            return respond(400, {"message": "Invalid simplify options"})
+
+        simplification = None
+        original_pathways = {}
+        if simplify:
+            blueprint_data, original_pathways, simplification = simplify_pathways(blueprint_data, tolerance)
+            print(f"Pathway simplification: {simplification}")
+
         # Generate unique blueprint ID
         blueprint_id = str(uuid.uuid4())
 
@@ -57,14 +74,46 @@ def handler(event, context):
             "blueprintData": json.dumps(blueprint_data),  # Store as JSON string
             "pngImage": png_image,  # Store PNG as base64 string
             "pdfImage": pdf_image,  # Store PDF as base64 string
+            "dataHash": data_hash(blueprint_data),  # Lets unchanged saves be skipped
+            **({"pngHash": png_hash(png_image)} if png_image else {}),  # Exact digest, for skipping unchanged saves
+            **image_hashes(png_image),  # imagePHash / imageDHash, for similarity and duplicates
+            "version": 1,  # Incremented on every update
+            "lastSnapshotVersion": 1,
             "createdAt": current_time,
-            "updatedAt": current_time
+            "updatedAt": current_time,
+            "userUpdatedAt": f"{user_id}#{current_time}"  # GardenUserUpdatedIndex sort key
         }
 
+        if keep_original and original_pathways:
+            blueprint_item["originalPathways"] = json.dumps(original_pathways)
+
+        # Earlier blueprints of this user with the same render (exact pHash)
+        duplicates = []
+        if blueprint_item.get("imagePHash"):
+            duplicates = [
+                {"blueprintId": item["blueprintId"], "gardenId": item.get("gardenId"), "name": item.get("name")}
+                for item in blueprint_repository.find_by_image_hash(user_id, blueprint_item["imagePHash"])
+            ]
+
         print(f"Attempting to save blueprint: {blueprint_id}")
         
-        # Save to DynamoDB
-        table.put_item(Item=blueprint_item)
+        # Version 1 of the history log is always a full snapshot
+        version_item, _ = build_version_item(user_id, blueprint_id, 1, None, blueprint_data, 0, current_time)
+
+        # Save blueprint and its first version together, counting it on the
+        # garden and in the user's summary; the garden must exist
+        try:
+            blueprint_repository.create(blueprint_item, version_item, also=[
+                garden_repository.counter_update(user_id, garden_id, {"blueprintCount": 1}),
+                user_summary.edited(user_id, current_time, garden_id, blueprintCount=1)
+            ])
+        except ClientError as e:
+            if cancellation_codes(e)[2:3] == ["ConditionalCheckFailed"]:
+                return respond(404, {"message": "Garden not found"})
+            raise
+        finally:
+            garden_repository.invalidate(user_id, garden_id)
+        index_blueprint(blueprint_item)
         
         print(f"Successfully saved blueprint: {blueprint_id}")
 
@@ -73,11 +122,18 @@ def handler(event, context):
             **blueprint_item,
             "blueprintData": blueprint_data  # Return as object
         }
+        response_item.pop("originalPathways", None)
 
-        return respond(201, {
+        response_body = {
             "message": "Blueprint created successfully",
             "blueprint": response_item
-        })
+        }
+        if simplification:
+            response_body["simplification"] = simplification
+        if duplicates:
+            response_body["duplicateOf"] = duplicates
+
+        return respond(201, response_body)
 
     except json.JSONDecodeError:
         return respond(400, {"message": "Invalid JSON body"})
@@ -1,13 +1,15 @@
 import json
-import boto3
-import os
 import uuid
 from datetime import datetime
 from botocore.exceptions import ClientError
 from simple_auth import require_auth, respond
+from repositories import GardenRepository, cancellation_codes
+from search_index import index_garden
+from geocoding import garden_coordinates, parse_coordinates
+from garden_upload_url_handler import image_url_prefix
+import user_summary
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['GARDENS_TABLE'])
+garden_repository = GardenRepository()
 
 @require_auth
 def handler(event, context):
@@ -23,8 +25,22 @@ def handler(event, context):
         if not garden_name or not garden_location:
             return respond(400, {"message": "Garden name and location are required"})
 
-        # Generate unique garden ID
-        garden_id = str(uuid.uuid4())
+        try:
+            lat, lon = parse_coordinates(body.get("lat"), body.get("lon"))
+        except (TypeError, ValueError):
+            return respond(400, {"message": "Invalid lat/lon"})
+
+        # A garden whose image was uploaded first keeps the ID from
+        # /gardens/upload-url, so the image worker can find its row
+        garden_id = body.get("gardenId") or str(uuid.uuid4())
+        try:
+            garden_id = str(uuid.UUID(garden_id))
+        except (AttributeError, TypeError, ValueError):
+            return respond(400, {"message": "Invalid gardenId"})
+
+        image_url = body.get("imageUrl") or ""
+        if image_url and not (isinstance(image_url, str) and image_url.startswith(image_url_prefix(garden_id))):
+            return respond(400, {"message": "imageUrl must be an upload for this garden"})
 
         # Create garden item
         current_time = datetime.utcnow().isoformat()
@@ -34,12 +50,28 @@ def handler(event, context):
             "name": garden_name,
             "location": garden_location,
             "description": garden_description,
+            "imageUrl": image_url,
+            "plantCount": 0,
+            "blueprintCount": 0,
             "createdAt": current_time,
             "updatedAt": current_time
         }
 
-        # Save to DynamoDB
-        table.put_item(Item=garden_item)
+        # Coordinates are resolved once on write so spatial queries never call the geocoder
+        coordinates = garden_coordinates(garden_location, lat, lon)
+        if coordinates:
+            garden_item.update(coordinates)
+
+        # Save to DynamoDB, counting the garden in the user's summary atomically
+        try:
+            garden_repository.create(garden_item, also=[
+                user_summary.edited(user_id, current_time, garden_id, gardenCount=1)
+            ])
+        except ClientError as e:
+            if cancellation_codes(e)[:1] == ["ConditionalCheckFailed"]:
+                return respond(409, {"message": "Garden already exists"})
+            raise
+        index_garden(garden_item)
 
         return respond(201, {
             "message": "Garden created successfully",
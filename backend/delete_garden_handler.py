@@ -1,39 +1,58 @@
-import json
-import boto3
-import os
+import asyncio
 from botocore.exceptions import ClientError
-from simple_auth import require_auth, respond
+from simple_auth import require_auth_async, respond
+from repositories import BlueprintRepository, GardenRepository
+from blueprint_versions import history_key
+from async_support import AsyncRepository, run_blocking
+from search_index import remove_blueprint, remove_garden
+import user_summary
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['GARDENS_TABLE'])
+garden_repository = AsyncRepository(GardenRepository())
+blueprint_repository = AsyncRepository(BlueprintRepository())
 
-@require_auth
-def handler(event, context):
+
+async def delete_blueprint(user_id, blueprint_id):
+    """Delete a blueprint, its version log and its search postings together"""
+    await asyncio.gather(
+        blueprint_repository.delete(user_id, blueprint_id),
+        blueprint_repository.delete_versions(history_key(user_id, blueprint_id)),
+        run_blocking(remove_blueprint, user_id, blueprint_id)
+    )
+
+
+@require_auth_async
+async def handler(event, context):
+    """
+    Delete a garden along with the user's blueprints for it and their
+    version history. The garden delete and the blueprint lookup run
+    concurrently, then every blueprint is removed in parallel. The garden's
+    counters leave the user's summary in the same transaction as its delete.
+    """
     try:
         # Get authenticated user ID from the decorator
         user_id = event['user_id']
-        
+
         # Get garden ID from path parameters
         garden_id = event.get('pathParameters', {}).get('gardenId')
         if not garden_id:
             return respond(400, {"message": "Garden ID is required"})
 
-        # Delete garden from DynamoDB
-        response = table.delete_item(
-            Key={
-                'userId': user_id,
-                'gardenId': garden_id
-            },
-            ReturnValues="ALL_OLD"
+        deleted_garden, blueprint_ids = await asyncio.gather(
+            garden_repository.delete(user_id, garden_id, related=user_summary.garden_removed),
+            blueprint_repository.keys_for_garden(user_id, garden_id)
         )
 
-        deleted_garden = response.get('Attributes')
+        # Blueprints left behind by an earlier delete are cleaned up either way
+        await asyncio.gather(*(delete_blueprint(user_id, blueprint_id) for blueprint_id in blueprint_ids))
+
         if not deleted_garden:
             return respond(404, {"message": "Garden not found"})
+        await run_blocking(remove_garden, user_id, garden_id)
 
         return respond(200, {
             "message": "Garden deleted successfully",
-            "garden": deleted_garden
+            "garden": deleted_garden,
+            "deletedBlueprints": len(blueprint_ids)
         })
 
     except ClientError as e:
@@ -41,4 +60,4 @@ def handler(event, context):
         return respond(500, {"message": "Database error occurred"})
     except Exception as e:
         print(f"Unexpected error: {e}")
-        return respond(500, {"message": "Internal server error"})
\ No newline at end of file
+        return respond(500, {"message": "Internal server error"})
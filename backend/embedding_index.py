@@ -0,0 +1,354 @@
+"""
+Similarity index over the blueprint embedding corpus.
+
+Row i of the corpus matrix is the embedding of png_cache/empty/NNNN.png
+(NNNN = i), whose planted counterpart is png_cache/filled/NNNN.png. Vectors
+are L2-normalized, so the dot product is the cosine similarity.
+
+Stored forms, all in the corpus directory:
+    embeddings.npy        float32 (num_pairs, embedding_dim), the exact baseline
+    embeddings_int8.npz   int8 codes + per-dimension scales (4x smaller)
+    embeddings_pq.npz     product-quantization codes, 64 bytes per vector (80x smaller),
+                          plus 1.3 MB of codebooks
+
+A search scores every row with the compact codes, keeps the best candidates
+and reranks them exactly against the float rows. The float matrix is
+memory-mapped, so only the candidate rows are ever paged in.
+
+    python embedding_index.py build        # normalize embeddings.npy, write the int8 and PQ files
+"""
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+
+CORPUS_DIR = os.environ.get('EMBEDDINGS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blueprint_embeddings_db'))
+EMBEDDINGS_FILE = 'embeddings.npy'
+INT8_FILE = 'embeddings_int8.npz'
+PQ_FILE = 'embeddings_pq.npz'
+
+# Rows converted from int8 to float32 per matrix-vector product. Small blocks
+# keep the converted buffer (256 x 1280 x 4 bytes = 1.3 MB) in cache
+BLOCK_ROWS = 256
+# Candidates passed from the quantized scan to the exact rerank
+RERANK_CANDIDATES = 50
+# Batch search: queries x corpus rows scored per matrix multiply. The score
+# block is at most 256 x 4096 x 4 bytes = 4 MB, whatever the batch size.
+QUERY_BLOCK = 256
+CORPUS_BLOCK = 4096
+
+PQ_SUBSPACES = 64
+PQ_CENTROIDS = 256
+PQ_ITERATIONS = 20
+# k-means trains on at most this many vectors
+PQ_TRAINING_SAMPLE = 40 * PQ_CENTROIDS
+
+
+def load_metadata(corpus_dir=CORPUS_DIR):
+    with open(os.path.join(corpus_dir, 'metadata.json')) as f:
+        return json.load(f)
+
+
+_corpus_versions = {}
+
+
+def corpus_version(corpus_dir=CORPUS_DIR):
+    """
+    Fingerprint of the search corpus (embeddings plus the pHash prefilter),
+    computed once per process. Rebuilding either file changes it, which makes
+    every cached similarity result stale.
+    """
+    if corpus_dir not in _corpus_versions:
+        digest = hashlib.sha256()
+        for name in (EMBEDDINGS_FILE, 'png_hashes.npy'):
+            path = os.path.join(corpus_dir, name)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        _corpus_versions[corpus_dir] = digest.hexdigest()[:16]
+    return _corpus_versions[corpus_dir]
+
+
+def normalize(vectors):
+    """L2-normalize rows (a single vector is treated as one row)"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first (argpartition, then a small sort)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def top_k_batch(vectors, queries, k, query_block=QUERY_BLOCK, corpus_block=CORPUS_BLOCK):
+    """
+    (rows, similarities), each (len(queries), k), best first: exact top-k of
+    every query against every row of vectors. Scores are computed block by
+    block and merged into a running top-k, so memory does not grow with the
+    corpus or the number of queries.
+    """
+    queries = normalize(queries)
+    k = min(k, len(vectors))
+    rows = np.empty((len(queries), k), dtype=np.intp)
+    similarities = np.empty((len(queries), k), dtype=np.float32)
+
+    for q_start in range(0, len(queries), query_block):
+        block = queries[q_start:q_start + query_block]
+        best_rows = np.empty((len(block), 0), dtype=np.intp)
+        best_scores = np.empty((len(block), 0), dtype=np.float32)
+        for c_start in range(0, len(vectors), corpus_block):
+            chunk = np.asarray(vectors[c_start:c_start + corpus_block], dtype=np.float32)
+            chunk_rows = np.broadcast_to(np.arange(c_start, c_start + len(chunk)), (len(block), len(chunk)))
+            scores = np.concatenate([best_scores, block @ chunk.T], axis=1)
+            ids = np.concatenate([best_rows, chunk_rows], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                ids = np.take_along_axis(ids, keep, axis=1)
+            best_scores, best_rows = scores, ids
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        rows[q_start:q_start + len(block)] = np.take_along_axis(best_rows, order, axis=1)
+        similarities[q_start:q_start + len(block)] = np.take_along_axis(best_scores, order, axis=1)
+    return rows, similarities
+
+
+# ============================================
+# INT8 SCALAR QUANTIZATION
+# ============================================
+
+class Int8Quantizer:
+    """Symmetric per-dimension quantization: code = round(x / scale), scale = max|x| / 127"""
+
+    def __init__(self, scales=None):
+        self.scales = scales
+
+    def fit(self, vectors):
+        self.scales = np.maximum(np.abs(vectors).max(axis=0), 1e-12).astype(np.float32) / 127.0
+        return self
+
+    def encode(self, vectors):
+        return np.clip(np.rint(vectors / self.scales), -127, 127).astype(np.int8)
+
+    def decode(self, codes):
+        return codes.astype(np.float32) * self.scales
+
+    def scores(self, codes, queries):
+        """
+        Approximate dot products, shape (len(queries), len(codes)). The scales
+        are folded into the queries, so each block is one int8->float32 cast
+        plus one BLAS product.
+        """
+        scaled = np.atleast_2d(queries) * self.scales
+        out = np.empty((len(scaled), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), BLOCK_ROWS):
+            block = codes[start:start + BLOCK_ROWS].astype(np.float32)
+            out[:, start:start + len(block)] = scaled @ block.T
+        return out
+
+
+# ============================================
+# PRODUCT QUANTIZATION
+# ============================================
+
+def _kmeans(points, k, iterations, rng):
+    """Plain Lloyd's k-means with ||x||^2 - 2xc + ||c||^2 distances"""
+    k = min(k, len(points))
+    centroids = points[rng.choice(len(points), k, replace=False)].copy()
+    for _ in range(iterations):
+        distances = (np.einsum('ij,ij->i', points, points)[:, None]
+                     - 2 * points @ centroids.T
+                     + np.einsum('ij,ij->i', centroids, centroids)[None, :])
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Re-seed empty clusters on random points so every code is usable
+        if not filled.all():
+            centroids[~filled] = points[rng.choice(len(points), int((~filled).sum()))]
+    return centroids
+
+
+class ProductQuantizer:
+    """
+    Split each vector into M subvectors and store the nearest of K centroids
+    per subspace as one byte. Scores use asymmetric distance computation: the
+    query stays exact, one (M, K) table of partial dot products is built per
+    query, and a row's score is the sum of its M table entries. Codes are kept
+    subspace-major, shape (M, N), so each lookup pass reads contiguous bytes.
+    """
+
+    def __init__(self, subspaces=PQ_SUBSPACES, centroids=PQ_CENTROIDS, codebooks=None):
+        self.subspaces = subspaces
+        self.centroids = centroids
+        self.codebooks = codebooks  # (M, K, D / M)
+
+    def _split(self, vectors):
+        return vectors.reshape(len(vectors), self.subspaces, -1)
+
+    def fit(self, vectors, iterations=PQ_ITERATIONS, seed=0):
+        if vectors.shape[1] % self.subspaces:
+            raise ValueError(f"embedding_dim {vectors.shape[1]} is not divisible by {self.subspaces} subspaces")
+        rng = np.random.default_rng(seed)
+        if len(vectors) > PQ_TRAINING_SAMPLE:
+            vectors = vectors[rng.choice(len(vectors), PQ_TRAINING_SAMPLE, replace=False)]
+        parts = self._split(vectors)
+        books = [_kmeans(parts[:, m], self.centroids, iterations, rng) for m in range(self.subspaces)]
+        # Small corpora can have fewer points than centroids; pad so the codebook is rectangular
+        size = max(len(book) for book in books)
+        self.codebooks = np.stack([np.pad(book, ((0, size - len(book)), (0, 0)), mode='edge') for book in books]).astype(np.float32)
+        return self
+
+    def encode(self, vectors):
+        """uint8 codes, shape (M, len(vectors))"""
+        parts = self._split(vectors)
+        codes = np.empty((self.subspaces, len(vectors)), dtype=np.uint8)
+        for m in range(self.subspaces):
+            book = self.codebooks[m]
+            distances = -2 * parts[:, m] @ book.T + np.einsum('ij,ij->i', book, book)[None, :]
+            codes[m] = distances.argmin(axis=1)
+        return codes
+
+    def decode(self, codes):
+        return np.concatenate([self.codebooks[m][codes[m]] for m in range(self.subspaces)], axis=1)
+
+    def scores(self, codes, queries):
+        """Approximate dot products, shape (len(queries), N)"""
+        queries = np.atleast_2d(queries)
+        # tables[q, m, k] = <query_q subvector m, centroid k of subspace m>
+        tables = np.einsum('qmd,mkd->qmk', self._split(queries), self.codebooks)
+        out = np.zeros((len(queries), codes.shape[1]), dtype=np.float32)
+        for q, table in enumerate(tables):
+            for m in range(self.subspaces):
+                out[q] += table[m][codes[m]]
+        return out
+
+
+# ============================================
+# INDEX
+# ============================================
+
+class EmbeddingIndex:
+    """
+    Two-stage search: quantized scores over the whole corpus, exact rerank of
+    the top candidates. mode is 'float' (exact only), 'int8' or 'pq'.
+    """
+
+    def __init__(self, vectors, mode='int8', quantizer=None, codes=None):
+        self.vectors = vectors  # float32 rows, usually a read-only memmap
+        self.mode = mode
+        self.quantizer = quantizer
+        self.codes = codes
+
+    @classmethod
+    def from_vectors(cls, vectors, mode='int8'):
+        """Build in memory (benchmarks, rebuilds)"""
+        vectors = normalize(vectors)
+        if mode == 'float':
+            return cls(vectors, mode)
+        quantizer = Int8Quantizer().fit(vectors) if mode == 'int8' else ProductQuantizer().fit(vectors)
+        return cls(vectors, mode, quantizer, quantizer.encode(vectors))
+
+    @classmethod
+    def load(cls, corpus_dir=CORPUS_DIR, mode=None):
+        mode = mode or os.environ.get('EMBEDDING_INDEX_MODE', 'int8')
+        path = os.path.join(corpus_dir, EMBEDDINGS_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; build the corpus embeddings first")
+        vectors = np.load(path, mmap_mode='r')
+        if mode == 'float':
+            return cls(np.asarray(vectors), mode)
+        if mode == 'int8':
+            with np.load(os.path.join(corpus_dir, INT8_FILE)) as data:
+                return cls(vectors, mode, Int8Quantizer(data['scales']), data['codes'])
+        with np.load(os.path.join(corpus_dir, PQ_FILE)) as data:
+            codebooks = data['codebooks']
+            return cls(vectors, mode, ProductQuantizer(codebooks.shape[0], codebooks.shape[1], codebooks), data['codes'])
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def nbytes(self):
+        """Resident size of what every search touches (codes + quantizer, or the float matrix)"""
+        if self.mode == 'float':
+            return self.vectors.nbytes
+        extra = self.quantizer.scales.nbytes if self.mode == 'int8' else self.quantizer.codebooks.nbytes
+        return self.codes.nbytes + extra
+
+    def approximate_scores(self, queries):
+        if self.mode == 'float':
+            return np.atleast_2d(queries) @ np.asarray(self.vectors).T
+        return self.quantizer.scores(self.codes, queries)
+
+    def rerank(self, query, candidates, k):
+        """Exact cosine similarity for the candidate rows only"""
+        candidates = np.sort(candidates)  # sequential memmap reads
+        exact = np.asarray(self.vectors[candidates]) @ query
+        order = top_k(exact, k)
+        return candidates[order], exact[order]
+
+    def search(self, query, k=5, candidates=RERANK_CANDIDATES, rerank=True, rows=None):
+        """
+        [(row, similarity)] for the k nearest corpus rows, best first.
+        rows restricts the search to a prefiltered subset, scored exactly.
+        """
+        query = normalize(query)[0]
+        if rows is not None:
+            found, similarities = self.rerank(query, np.asarray(rows, dtype=np.intp), k)
+            return list(zip(found.tolist(), similarities.tolist()))
+        scores = self.approximate_scores(query)[0]
+        if self.mode == 'float' or not rerank:
+            rows = top_k(scores, k)
+            return list(zip(rows.tolist(), scores[rows].tolist()))
+        rows, similarities = self.rerank(query, top_k(scores, max(k, candidates)), k)
+        return list(zip(rows.tolist(), similarities.tolist()))
+
+    def search_batch(self, queries, k=5):
+        """Exact top-k for many queries at once: (rows, similarities), each (N, k)"""
+        return top_k_batch(self.vectors, queries, k)
+
+    def save(self, corpus_dir=CORPUS_DIR):
+        """Write the quantized codes next to embeddings.npy"""
+        if self.mode == 'int8':
+            np.savez(os.path.join(corpus_dir, INT8_FILE), codes=self.codes, scales=self.quantizer.scales)
+        elif self.mode == 'pq':
+            np.savez(os.path.join(corpus_dir, PQ_FILE), codes=self.codes, codebooks=self.quantizer.codebooks)
+
+
+_indexes = {}
+
+
+def get_index(mode=None):
+    """Index loaded once per container"""
+    mode = mode or os.environ.get('EMBEDDING_INDEX_MODE', 'int8')
+    if mode not in _indexes:
+        _indexes[mode] = EmbeddingIndex.load(mode=mode)
+    return _indexes[mode]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build quantized forms of the blueprint embedding corpus")
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--corpus', default=CORPUS_DIR)
+    args = parser.parse_args()
+
+    vectors = normalize(np.load(os.path.join(args.corpus, EMBEDDINGS_FILE)))
+    np.save(os.path.join(args.corpus, EMBEDDINGS_FILE), vectors)
+    print(f"{len(vectors)} vectors, float32 {vectors.nbytes / 1e6:.2f} MB")
+    for mode in ('int8', 'pq'):
+        index = EmbeddingIndex.from_vectors(vectors, mode)
+        index.save(args.corpus)
+        print(f"{mode}: {index.nbytes() / 1e6:.3f} MB")
+
+
+if __name__ == '__main__':
+    main()
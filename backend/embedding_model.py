@@ -0,0 +1,117 @@
+"""
+CPU inference for the blueprint embedding model through onnxruntime.
+
+The model (exported by export_embedding_model.py) maps a 512x512 RGB blueprint
+render to the embedding_dim vector stored in the corpus. Preprocessing is
+plain Pillow/NumPy, so no deep-learning framework is loaded at runtime.
+
+    python embedding_model.py build-corpus     # embed png_cache/empty/*.png into embeddings.npy
+"""
+import argparse
+import base64
+import glob
+import io
+import os
+import numpy as np
+from PIL import Image
+from embedding_index import CORPUS_DIR, EMBEDDINGS_FILE, load_metadata, normalize
+
+# Quantized model by default; EMBEDDING_MODEL can point at the float export
+MODEL_PATH = os.environ.get('EMBEDDING_MODEL', os.path.join(CORPUS_DIR, 'embedding_model.int8.onnx'))
+
+
+def _available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Threads for one inference. Lambda gets vCPUs in proportion to memory, so
+# the default follows the CPUs actually available to this process.
+INTRA_OP_THREADS = int(os.environ.get('ONNX_INTRA_OP_THREADS', '0')) or _available_cpus()
+
+# ImageNet statistics the backbone was trained with
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+BATCH_SIZE = 8
+
+
+def load_image(source):
+    """PIL image from a path, raw bytes or a base64 (data URL) string"""
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, str) and not os.path.exists(source):
+        source = base64.b64decode(source.split(',', 1)[-1])
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+
+def preprocess(source, size):
+    """(3, size, size) float32: transparent areas on white, resized, ImageNet-normalized"""
+    image = load_image(source)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    image = image.convert('RGB')
+    if image.size != (size, size):
+        image = image.resize((size, size), Image.BILINEAR)
+    pixels = np.asarray(image, dtype=np.float32) / 255.0
+    return ((pixels - MEAN) / STD).transpose(2, 0, 1)
+
+
+class EmbeddingModel:
+    def __init__(self, path=MODEL_PATH, threads=INTRA_OP_THREADS, size=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        # One request at a time per process; parallelism comes from intra-op threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.size = size or load_metadata()['img_size']
+
+    def embed(self, sources, batch_size=BATCH_SIZE):
+        """L2-normalized embeddings, shape (len(sources), embedding_dim)"""
+        outputs = []
+        for start in range(0, len(sources), batch_size):
+            batch = np.stack([preprocess(source, self.size) for source in sources[start:start + batch_size]])
+            outputs.append(self.session.run(None, {self.input_name: batch})[0])
+        return normalize(np.concatenate(outputs).reshape(len(sources), -1))
+
+    def embed_one(self, source):
+        return self.embed([source])[0]
+
+
+_model = None
+
+
+def get_model():
+    """Model session created once per container"""
+    global _model
+    if _model is None:
+        _model = EmbeddingModel()
+    return _model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the corpus PNGs with the ONNX model")
+    parser.add_argument('command', choices=['build-corpus'])
+    parser.add_argument('--corpus', default=CORPUS_DIR)
+    parser.add_argument('--model', default=MODEL_PATH)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, 'png_cache', 'empty', '*.png')))
+    model = EmbeddingModel(args.model)
+    vectors = np.concatenate([model.embed(paths[start:start + 64]) for start in range(0, len(paths), 64)])
+    np.save(os.path.join(args.corpus, EMBEDDINGS_FILE), vectors.astype(np.float32))
+    print(f"Embedded {len(paths)} images into {args.corpus}/{EMBEDDINGS_FILE} {vectors.shape}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Export gardens and blueprint metadata to columnar files for offline reporting.
+
+Both tables are read with a parallel Scan (see migrate.py), projected so the
+base64 images never leave DynamoDB, and streamed into one Parquet (or Arrow
+IPC) file per dataset and Scan segment:
+
+    <out>/gardens/part-0003.parquet
+    <out>/blueprints/part-0003.parquet
+    <out>/_manifest.json
+
+Each worker holds one Scan page and at most --row-group rows before they are
+flushed as a row group, so memory stays bounded however large the tables get.
+Blueprint rows carry geometry stats derived from blueprintData (the cached
+geometryStats when it matches the item's version). The export is not a
+point-in-time snapshot: items written during the run may or may not appear.
+
+    pip install -r requirements-analytics.txt
+    python export_analytics.py exports/2026-10-19 --segments 8 --max-rcu 200
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from blueprint_geometry import compute_stats_batch
+from migrate import CapacityLimiter, scan_page
+from repositories import from_item, get_client, projection
+
+ROW_GROUP_SIZE = 10000
+
+# Column name -> pyarrow type factory name
+GARDEN_COLUMNS = [
+    ('userId', 'string'), ('gardenId', 'string'), ('name', 'string'), ('location', 'string'),
+    ('lat', 'float64'), ('lon', 'float64'), ('geohash', 'string'),
+    ('plantCount', 'int64'), ('blueprintCount', 'int64'), ('hasImage', 'bool_'),
+    ('descriptionLength', 'int64'), ('createdAt', 'string'), ('updatedAt', 'string'),
+]
+
+BLUEPRINT_COLUMNS = [
+    ('userId', 'string'), ('blueprintId', 'string'), ('gardenId', 'string'), ('name', 'string'),
+    ('version', 'int64'), ('createdAt', 'string'), ('updatedAt', 'string'),
+    ('blueprintDataBytes', 'int64'), ('shapeCount', 'int64'), ('doorCount', 'int64'),
+    ('drivewayCount', 'int64'), ('pathwayCount', 'int64'), ('patioCount', 'int64'),
+    ('plotArea', 'float64'), ('houseFootprint', 'float64'), ('totalPavedArea', 'float64'),
+    ('freePlantingArea', 'float64'), ('pavedArea', 'string'),
+]
+
+# Attributes read from each table; images and simplification originals are never fetched
+GARDEN_FIELDS = ['userId', 'gardenId', 'name', 'location', 'description', 'lat', 'lon', 'geohash',
+                 'plantCount', 'blueprintCount', 'imageUrl', 'createdAt', 'updatedAt']
+BLUEPRINT_FIELDS = ['userId', 'blueprintId', 'gardenId', 'name', 'version', 'createdAt', 'updatedAt',
+                    'blueprintData', 'geometryStats']
+
+
+def garden_rows(items):
+    return [{
+        'userId': item['userId'],
+        'gardenId': item['gardenId'],
+        'name': item.get('name'),
+        'location': item.get('location'),
+        'lat': item.get('lat'),
+        'lon': item.get('lon'),
+        'geohash': item.get('geohash'),
+        'plantCount': item.get('plantCount'),
+        'blueprintCount': item.get('blueprintCount'),
+        'hasImage': bool(item.get('imageUrl')),
+        'descriptionLength': len(item.get('description') or ''),
+        'createdAt': item.get('createdAt'),
+        'updatedAt': item.get('updatedAt'),
+    } for item in items]
+
+
+def _cached_stats(item, version):
+    try:
+        cached = json.loads(item['geometryStats']) if item.get('geometryStats') else None
+    except json.JSONDecodeError:
+        return None
+    return cached['stats'] if cached and cached.get('version') == version else None
+
+
+def blueprint_rows(items):
+    """Blueprint metadata plus geometry stats; uncached stats are computed in one batch per page"""
+    rows, data, pending = [], [], []
+    for item in items:
+        version = int(item.get('version', 0))
+        raw = item.get('blueprintData') or ''
+        try:
+            parsed = json.loads(raw) if raw else {}
+        except json.JSONDecodeError:
+            parsed = None
+
+        row = {
+            'userId': item['userId'],
+            'blueprintId': item['blueprintId'],
+            'gardenId': item.get('gardenId'),
+            'name': item.get('name'),
+            'version': version,
+            'createdAt': item.get('createdAt'),
+            'updatedAt': item.get('updatedAt'),
+            'blueprintDataBytes': len(raw),
+        }
+        if isinstance(parsed, dict):
+            row.update({
+                'shapeCount': len(parsed.get('shapes') or []),
+                'doorCount': len(parsed.get('doors') or []),
+                'drivewayCount': len(parsed.get('driveways') or []),
+                'pathwayCount': len(parsed.get('pathways') or []),
+                'patioCount': len(parsed.get('patios') or []),
+            })
+            stats = _cached_stats(item, version)
+            if stats is None:
+                pending.append(len(rows))
+                data.append(parsed)
+            else:
+                row['stats'] = stats
+        rows.append(row)
+
+    if data:
+        try:
+            computed = compute_stats_batch(data)
+        except (KeyError, TypeError, ValueError) as e:
+            # One malformed blueprint should not drop the page; fall back to one at a time
+            print(f"Warning: batch geometry stats failed ({e}), computing individually")
+            computed = []
+            for blueprint_data in data:
+                try:
+                    computed.append(compute_stats_batch([blueprint_data])[0])
+                except (KeyError, TypeError, ValueError):
+                    computed.append(None)
+        for index, stats in zip(pending, computed):
+            rows[index]['stats'] = stats
+
+    for row in rows:
+        stats = row.pop('stats', None)
+        if stats:
+            row.update({key: stats[key] for key in ('plotArea', 'houseFootprint', 'totalPavedArea', 'freePlantingArea')})
+            row['pavedArea'] = json.dumps(stats['pavedArea'], sort_keys=True)
+    return rows
+
+
+DATASETS = {
+    'gardens': (os.environ.get('GARDENS_TABLE', 'florify-gardens-dev'), GARDEN_FIELDS, GARDEN_COLUMNS, garden_rows),
+    'blueprints': (os.environ.get('BLUEPRINTS_TABLE', 'florify-blueprints-dev'), BLUEPRINT_FIELDS, BLUEPRINT_COLUMNS, blueprint_rows),
+}
+
+
+class PartWriter:
+    """Streams rows into one Parquet or Arrow IPC file, one row group per flush"""
+
+    def __init__(self, path, columns, file_format, row_group_size=ROW_GROUP_SIZE):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.path = path
+        self.schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in columns])
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.buffer = []
+        self.rows = 0
+        self._writer = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self.file_format == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(self.path, self.schema, compression='zstd')
+        return self.pa.ipc.new_file(self.path, self.schema)
+
+    def write(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self._writer is None:
+            self._writer = self._open()
+        table = self.pa.Table.from_pylist(self.buffer, schema=self.schema)
+        self._writer.write_table(table)
+        self.rows += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+        return self.rows
+
+
+class Export:
+    def __init__(self, out_dir, total_segments, limiter, file_format='parquet', client=None):
+        self.out_dir = out_dir
+        self.total_segments = total_segments
+        self.limiter = limiter
+        self.file_format = file_format
+        self.client = client or get_client()
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def export_segment(self, dataset, segment):
+        table_name, fields, columns, to_rows = DATASETS[dataset]
+        expression, names = projection(fields)
+        extension = 'parquet' if self.file_format == 'parquet' else 'arrow'
+        writer = PartWriter(os.path.join(self.out_dir, dataset, f"part-{segment:04d}.{extension}"), columns, self.file_format)
+
+        start_key = None
+        while True:
+            response = scan_page(self.client, self.limiter, table_name, segment, self.total_segments, start_key,
+                                 ProjectionExpression=expression, ExpressionAttributeNames=names)
+            writer.write(to_rows([from_item(item) for item in response.get('Items', [])]))
+            start_key = response.get('LastEvaluatedKey')
+            if start_key is None:
+                break
+
+        rows = writer.close()
+        with self._lock:
+            self.counts[dataset] = self.counts.get(dataset, 0) + rows
+        return rows
+
+    def run(self, datasets, workers):
+        started = time.monotonic()
+        tasks = [(dataset, segment) for dataset in datasets for segment in range(self.total_segments)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() re-raises the first worker error
+            list(pool.map(lambda task: self.export_segment(*task), tasks))
+
+        manifest = {
+            'exportedAt': datetime.utcnow().isoformat(),
+            'format': self.file_format,
+            'totalSegments': self.total_segments,
+            'rows': self.counts,
+            'seconds': round(time.monotonic() - started, 1)
+        }
+        with open(os.path.join(self.out_dir, '_manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export gardens and blueprints to Parquet/Arrow for analytics")
+    parser.add_argument('out_dir', help="Output directory")
+    parser.add_argument('--datasets', nargs='+', choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    parser.add_argument('--segments', type=int, default=8, help="Scan TotalSegments per table")
+    parser.add_argument('--workers', type=int, help="Concurrent segments (default: --segments)")
+    parser.add_argument('--max-rcu', type=float, default=0, help="Read capacity units per second across all workers (0 = unlimited)")
+    args = parser.parse_args()
+
+    export = Export(args.out_dir, args.segments, CapacityLimiter(args.max_rcu), args.format)
+    manifest = export.run(args.datasets, args.workers or args.segments)
+    print(f"Exported {manifest['rows']} to {args.out_dir} in {manifest['seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Export the blueprint embedding model to ONNX and quantize it for CPU serving.
+
+The backbone is torchvision's EfficientNet-B0 with the classifier removed:
+global-average-pooled features of embedding_dim (1280) per image. Pass the
+fine-tuned weights the corpus was embedded with via --weights; without them
+the ImageNet weights are used.
+
+Writes into the corpus directory:
+    embedding_model.onnx        float32 graph
+    embedding_model.int8.onnx   dynamic int8 quantization of the weights
+
+    pip install -r requirements-model-export.txt
+    python export_embedding_model.py --weights blueprint_encoder.pt
+"""
+import argparse
+import os
+from embedding_index import CORPUS_DIR, load_metadata
+
+OPSET = 17
+
+
+def build_model(weights=None):
+    import torch
+    import torchvision
+
+    model = torchvision.models.efficientnet_b0(weights=None if weights else 'IMAGENET1K_V1')
+    model.classifier = torch.nn.Identity()
+    if weights:
+        state = torch.load(weights, map_location='cpu')
+        state = state.get('state_dict', state)
+        # Checkpoints saved from a DataParallel or wrapper module carry a key prefix
+        for prefix in ('module.', 'model.'):
+            if state and all(key.startswith(prefix) for key in state):
+                state = {key[len(prefix):]: value for key, value in state.items()}
+        # The classifier is replaced by Identity, so its weights are the only ones allowed to be left over
+        state = {key: value for key, value in state.items() if not key.startswith('classifier.')}
+        # strict: a mismatched checkpoint must not export a randomly initialised backbone
+        model.load_state_dict(state, strict=True)
+    return model.eval()
+
+
+def export(model, path, size):
+    import torch
+
+    example = torch.zeros(1, 3, size, size)
+    torch.onnx.export(
+        model, example, path,
+        input_names=['image'], output_names=['embedding'],
+        dynamic_axes={'image': {0: 'batch'}, 'embedding': {0: 'batch'}},
+        opset_version=OPSET, do_constant_folding=True
+    )
+
+
+def quantize(source, target):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    # Weights become int8; activations are quantized on the fly per batch
+    quantize_dynamic(source, target, weight_type=QuantType.QUInt8, op_types_to_quantize=['Conv', 'MatMul', 'Gemm'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX (float32 and int8)")
+    parser.add_argument('--weights', help="Fine-tuned state dict (.pt)")
+    parser.add_argument('--out-dir', default=CORPUS_DIR)
+    args = parser.parse_args()
+
+    size = load_metadata()['img_size']
+    float_path = os.path.join(args.out_dir, 'embedding_model.onnx')
+    int8_path = os.path.join(args.out_dir, 'embedding_model.int8.onnx')
+
+    export(build_model(args.weights), float_path, size)
+    quantize(float_path, int8_path)
+    for path in (float_path, int8_path):
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
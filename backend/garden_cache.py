@@ -0,0 +1,122 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Writes only invalidate entries in the process that made them, so the cache
+# is only enabled where every request runs in one process: local_server with
+# a single worker sets GARDEN_CACHE=1. On Lambda the create/update/delete
+# functions run apart from the readers and every lookup goes to the table.
+# Entries also expire after a TTL as a backstop.
+CACHE_TTL_SECONDS = float(os.environ.get('GARDEN_CACHE_TTL', '30'))
+CACHE_MAX_ENTRIES = int(os.environ.get('GARDEN_CACHE_SIZE', '512'))
+
+# Key used for a user's full garden list
+LIST_KEY = '__list__'
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return (found, value)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries)
+        }
+
+
+garden_cache = TTLCache()
+
+
+def enabled():
+    return os.environ.get('GARDEN_CACHE') == '1'
+
+
+def get_garden(user_id, garden_id, loader, cache=garden_cache):
+    """Read-through lookup of one garden; loader() fetches it on a miss"""
+    if not enabled():
+        return loader()
+    key = (user_id, garden_id)
+    found, garden = cache.get(key)
+    if not found:
+        garden = loader()
+        # Cache only hits so a garden created elsewhere shows up immediately
+        if garden is not None:
+            cache.put(key, garden)
+    return garden
+
+
+def list_gardens(user_id, loader, cache=garden_cache):
+    """Read-through lookup of a user's garden list"""
+    if not enabled():
+        return loader()
+    key = (user_id, LIST_KEY)
+    found, gardens = cache.get(key)
+    if not found:
+        gardens = loader()
+        cache.put(key, gardens)
+    return gardens
+
+
+def invalidate_garden(user_id, garden_id=None, cache=garden_cache):
+    """Drop a garden and the user's list after a write"""
+    keys = [(user_id, LIST_KEY)]
+    if garden_id:
+        keys.append((user_id, garden_id))
+    cache.invalidate(*keys)
+
+
+def log_metrics():
+    """Emit cache counters as one JSON log line for CloudWatch metric filters"""
+    if not enabled():
+        return
+    print(json.dumps({"metric": "garden_cache", **garden_cache.stats()}))
@@ -0,0 +1,165 @@
+import argparse
+import boto3
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_plus
+from PIL import Image, ImageOps, features
+from repositories import GardenRepository
+
+s3_bucket = os.environ.get('S3_BUCKET_NAME', 'florify-garden-images')
+s3_region = os.environ.get('COGNITO_REGION', 'eu-north-1')
+table_name = os.environ.get('GARDENS_TABLE', 'florify-gardens-dev')
+
+# Variant name -> longest edge in pixels
+VARIANT_SIZES = {
+    'thumb': 320,
+    'card': 640,
+    'display': 1600,
+}
+WEBP_QUALITY = 80
+AVIF_QUALITY = 55
+
+# Variants live outside gardens/ so writing them does not retrigger the upload event
+VARIANT_PREFIX = 'garden-variants'
+# Variant keys include a hash of the original, so a replaced image gets new
+# URLs and the variants can be cached as immutable
+VARIANT_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+executor = ThreadPoolExecutor(max_workers=6)
+
+
+class GardenNotReady(Exception):
+    """The upload arrived before its garden row; raising lets S3 retry the event"""
+
+
+def output_formats():
+    """WebP always; AVIF when the installed Pillow can encode it"""
+    formats = [('webp', 'WEBP', 'image/webp', {'quality': WEBP_QUALITY, 'method': 4})]
+    if features.check('avif'):
+        formats.append(('avif', 'AVIF', 'image/avif', {'quality': AVIF_QUALITY}))
+    return formats
+
+
+def load_image(data):
+    """
+    Decode an upload, apply its EXIF orientation and drop everything else.
+    Re-encoding from raw pixels strips EXIF/GPS/ICC metadata from the variants.
+    """
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    return image
+
+
+def _render(image, size, fmt, options):
+    variant = image.copy()
+    variant.thumbnail((size, size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def render_variants(data):
+    """
+    Produce every (size, format) variant of an image in parallel.
+    Returns {"thumb.webp": (bytes, content_type), ...}.
+    """
+    image = load_image(data)
+    # Never upscale: sizes beyond the original collapse to the original size
+    longest = max(image.size)
+
+    jobs = {}
+    for name, size in VARIANT_SIZES.items():
+        for extension, fmt, content_type, options in output_formats():
+            future = executor.submit(_render, image, min(size, longest), fmt, options)
+            jobs[f"{name}.{extension}"] = (future, content_type)
+    return {filename: (future.result(), content_type) for filename, (future, content_type) in jobs.items()}
+
+
+def variant_url(key):
+    return f"https://{s3_bucket}.s3.{s3_region}.amazonaws.com/{key}"
+
+
+def process_upload(s3_client, garden_repository, bucket, key):
+    """
+    Build variants for one uploaded garden image and record them on the garden
+    as imageVariants = {"thumb": {"webp": url, "avif": url}, "card": ..., "display": ...}
+    """
+    # Upload keys look like gardens/{garden_id}/image.{ext}
+    parts = key.split('/')
+    if len(parts) != 3 or parts[0] != 'gardens':
+        print(f"Skipping unexpected key {key}")
+        return None
+    garden_id = parts[1]
+
+    obj = s3_client.get_object(Bucket=bucket, Key=key)
+    user_id = obj.get('Metadata', {}).get('user-id')
+    if not user_id:
+        print(f"Skipping {key}: no user-id metadata")
+        return None
+    data = obj['Body'].read()
+
+    variants = render_variants(data)
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    uploads = []
+    urls = {}
+    for filename, (payload, content_type) in variants.items():
+        variant_key = f"{VARIANT_PREFIX}/{garden_id}/{digest}/{filename}"
+        uploads.append(executor.submit(
+            s3_client.put_object,
+            Bucket=bucket,
+            Key=variant_key,
+            Body=payload,
+            ContentType=content_type,
+            CacheControl=VARIANT_CACHE_CONTROL
+        ))
+        name, extension = filename.split('.')
+        urls.setdefault(name, {})[extension] = variant_url(variant_key)
+    for upload in uploads:
+        upload.result()
+
+    print(f"Garden {garden_id}: {len(data)} byte original -> "
+          + ", ".join(f"{name} {len(payload)}" for name, (payload, _) in variants.items()))
+
+    if garden_repository.update(user_id, garden_id, {'imageVariants': urls}) is None:
+        raise GardenNotReady(f"Garden {garden_id} does not exist yet")
+    return urls
+
+
+def handler(event, context):
+    """S3 ObjectCreated trigger for gardens/{garden_id}/image.{ext} uploads"""
+    s3_client = boto3.client('s3')
+    garden_repository = GardenRepository(table_name)
+
+    processed = 0
+    for record in event.get('Records', []):
+        bucket = record['s3']['bucket']['name']
+        key = unquote_plus(record['s3']['object']['key'])
+        if process_upload(s3_client, garden_repository, bucket, key):
+            processed += 1
+    return {"processed": processed}
+
+
+def main():
+    """Local worker: render variants for image files into a directory"""
+    parser = argparse.ArgumentParser(description="Render garden image variants locally")
+    parser.add_argument('images', nargs='+', help="Image files to process")
+    parser.add_argument('--out', default='variants', help="Output directory")
+    args = parser.parse_args()
+
+    for path in args.images:
+        with open(path, 'rb') as f:
+            data = f.read()
+        target = os.path.join(args.out, os.path.splitext(os.path.basename(path))[0])
+        os.makedirs(target, exist_ok=True)
+        for filename, (payload, _) in render_variants(data).items():
+            with open(os.path.join(target, filename), 'wb') as f:
+                f.write(payload)
+            print(f"{path} -> {filename}: {len(payload)} bytes (original {len(data)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from botocore.exceptions import ClientError
+from simple_auth import require_auth_async, respond
+from repositories import BlueprintRepository, GardenRepository
+from async_support import AsyncRepository
+import garden_cache
+
+garden_repository = AsyncRepository(GardenRepository())
+blueprint_repository = AsyncRepository(BlueprintRepository())
+
+# Only the fields the garden detail page shows
+GARDEN_FIELDS = ['gardenId', 'name', 'location', 'description', 'imageUrl', 'plantCount', 'createdAt', 'updatedAt']
+BLUEPRINT_FIELDS = ['blueprintId', 'gardenId', 'userId', 'name', 'version', 'geometryStats', 'createdAt', 'updatedAt']
+IMAGE_FIELDS = ['pngImage', 'pdfImage']
+
+
+async def fetch_garden(user_id, garden_id):
+    # Full rows are cached where enabled, so trim after the read
+    garden = await garden_repository.get(user_id, garden_id)
+    if not garden:
+        return None
+    return {field: garden[field] for field in GARDEN_FIELDS if field in garden}
+
+
+async def fetch_blueprint(user_id, garden_id, include_images):
+    # Newest blueprint key from the KEYS_ONLY index, then one projected GetItem
+    key = await blueprint_repository.latest_key_for_garden(user_id, garden_id)
+    if not key:
+        return None
+
+    fields = BLUEPRINT_FIELDS + (IMAGE_FIELDS if include_images else [])
+    blueprint = await blueprint_repository.get(key[0], key[1], fields)
+    if not blueprint:
+        return None
+    blueprint.pop('userId', None)
+
+    # geometryStats is stored as a JSON string; only surface it if still current
+    cached_stats = blueprint.pop('geometryStats', None)
+    if cached_stats:
+        try:
+            cached_stats = json.loads(cached_stats)
+            if cached_stats.get('version') == blueprint.get('version'):
+                blueprint['stats'] = cached_stats['stats']
+        except json.JSONDecodeError:
+            print(f"Warning: Could not parse geometryStats for blueprint {blueprint.get('blueprintId')}")
+    return blueprint
+
+
+@require_auth_async
+async def handler(event, context):
+    """
+    Garden detail page data in one call: the garden row and its blueprint
+    metadata, fetched concurrently after a single token verification.
+    Blueprint images are left out unless ?images=true is passed.
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        garden_id = (event.get('pathParameters') or {}).get('gardenId')
+        if not garden_id:
+            return respond(400, {"message": "Garden ID is required"})
+
+        params = event.get('queryStringParameters') or {}
+        include_images = params.get('images') == 'true'
+
+        garden, blueprint = await asyncio.gather(
+            fetch_garden(user_id, garden_id),
+            fetch_blueprint(user_id, garden_id, include_images)
+        )
+        garden_cache.log_metrics()
+
+        if not garden:
+            return respond(404, {"message": "Garden not found"})
+
+        return respond(200, {
+            "garden": garden,
+            "blueprint": blueprint
+        })
+
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
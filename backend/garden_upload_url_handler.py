@@ -0,0 +1,81 @@
+import os
+import uuid
+import boto3
+from botocore.exceptions import ClientError
+from simple_auth import require_auth, respond
+
+s3_bucket = os.environ.get('S3_BUCKET_NAME', 'florify-garden-images')
+s3_region = os.environ.get('COGNITO_REGION', 'eu-north-1')
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+s3_client = boto3.client('s3')
+
+
+def image_url_prefix(garden_id):
+    """Public URL prefix of the images uploaded for a garden"""
+    return f"https://{s3_bucket}.s3.{s3_region}.amazonaws.com/gardens/{garden_id}/"
+
+
+def generate_presigned_post(garden_id, filename, content_type, user_id):
+    """
+    Generate presigned POST data for S3 upload.
+    The uploader's user ID is attached as object metadata so the image
+    worker can find the garden row once variants are rendered.
+    Returns (upload_data, public_url) tuple.
+    """
+    try:
+        file_extension = filename.split('.')[-1] if '.' in filename else 'jpg'
+        s3_key = f"gardens/{garden_id}/image.{file_extension}"
+
+        presigned_post = s3_client.generate_presigned_post(
+            Bucket=s3_bucket,
+            Key=s3_key,
+            Fields={"Content-Type": content_type, "x-amz-meta-user-id": user_id},
+            Conditions=[
+                {"Content-Type": content_type},
+                {"x-amz-meta-user-id": user_id},
+                ["content-length-range", 1, MAX_UPLOAD_BYTES]
+            ],
+            ExpiresIn=3600  # 1 hour
+        )
+        return presigned_post, image_url_prefix(garden_id) + f"image.{file_extension}"
+
+    except ClientError as e:
+        print(f"Error generating presigned POST: {str(e)}")
+        return None, None
+
+
+@require_auth
+def handler(event, context):
+    """
+    Presigned upload for a new garden's image:
+    GET /gardens/upload-url?filename=garden.jpg&contentType=image/jpeg
+
+    The returned gardenId is the one to send to POST /gardens, so the image
+    worker can record variants on the garden the upload belongs to.
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        params = event.get('queryStringParameters') or {}
+        filename = params.get('filename')
+        content_type = params.get('contentType', 'image/jpeg')
+        if not filename:
+            return respond(400, {"message": "filename parameter is required"})
+
+        garden_id = str(uuid.uuid4())
+        upload_data, public_url = generate_presigned_post(garden_id, filename, content_type, user_id)
+        if not upload_data:
+            return respond(500, {"message": "Failed to generate upload URL"})
+
+        return respond(200, {
+            "uploadData": upload_data,
+            "publicUrl": public_url,
+            "gardenId": garden_id
+        })
+
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
@@ -1,5 +1,4 @@
 import json
-import boto3
 import os
 import uuid
 import requests
@@ -7,20 +6,17 @@ from datetime import datetime
 from botocore.exceptions import ClientError
 from jose import jwt, jwk
 from jose.exceptions import JWTError, JWKError
-
-# Initialize AWS services
-dynamodb = boto3.resource('dynamodb')
-s3_client = boto3.client('s3')
+from repositories import GardenRepository
+from garden_upload_url_handler import generate_presigned_post
 
 # Get configuration from environment variables
 table_name = os.environ.get('GARDENS_TABLE_NAME', 'florify-gardens')
-s3_bucket = os.environ.get('S3_BUCKET_NAME', 'florify-garden-images')
 cognito_user_pool_id = os.environ.get('COGNITO_USER_POOL_ID')
 cognito_region = os.environ.get('COGNITO_REGION', 'eu-north-1')
 user_id_claim = os.environ.get('USER_ID_CLAIM', 'sub')
 
-# Initialize DynamoDB table
-table = dynamodb.Table(table_name)
+# Garden rows go through the shared repository (tuned client, marshalling)
+garden_repository = GardenRepository(table_name)
 
 # Cache for JWKS to avoid repeated API calls
 _jwks_cache = None
@@ -154,13 +150,7 @@ def query_gardens_for_user(user_id):
     Returns list of garden items.
     """
     try:
-        response = table.query(
-            KeyConditionExpression='userId = :user_id',
-            ExpressionAttributeValues={
-                ':user_id': user_id
-            }
-        )
-        return response.get('Items', [])
+        return garden_repository.list_for_user(user_id)
     except ClientError as e:
         print(f"Error querying gardens for user {user_id}: {str(e)}")
         return []
@@ -171,43 +161,12 @@ def put_garden_item(item):
     Returns True on success, False on failure.
     """
     try:
-        table.put_item(Item=item)
+        garden_repository.put(item)
         return True
     except ClientError as e:
         print(f"Error putting garden item: {str(e)}")
         return False
 
-def generate_presigned_post(garden_id, filename, content_type):
-    """
-    Generate presigned POST data for S3 upload.
-    Returns (upload_data, public_url) tuple.
-    """
-    try:
-        # Create S3 key for the image
-        file_extension = filename.split('.')[-1] if '.' in filename else 'jpg'
-        s3_key = f"gardens/{garden_id}/image.{file_extension}"
-        
-        # Generate presigned POST
-        presigned_post = s3_client.generate_presigned_post(
-            Bucket=s3_bucket,
-            Key=s3_key,
-            Fields={"Content-Type": content_type},
-            Conditions=[
-                {"Content-Type": content_type},
-                ["content-length-range", 1, 10 * 1024 * 1024]  # 10MB max
-            ],
-            ExpiresIn=3600  # 1 hour
-        )
-        
-        # Generate public URL
-        public_url = f"https://{s3_bucket}.s3.{cognito_region}.amazonaws.com/{s3_key}"
-        
-        return presigned_post, public_url
-        
-    except ClientError as e:
-        print(f"Error generating presigned POST: {str(e)}")
-        return None, None
-
 def handler(event, context):
     """Main Lambda handler for gardens API"""
     
@@ -249,7 +208,7 @@ def handler(event, context):
             # Generate a new garden ID for the upload
             garden_id = str(uuid.uuid4())
             
-            upload_data, public_url = generate_presigned_post(garden_id, filename, content_type)
+            upload_data, public_url = generate_presigned_post(garden_id, filename, content_type, user_id)
             
             if not upload_data:
                 return respond(500, {"message": "Failed to generate upload URL"})
@@ -0,0 +1,72 @@
+import asyncio
+from botocore.exceptions import ClientError
+from simple_auth import require_auth_async, respond
+from repositories import GardenRepository
+from async_support import AsyncRepository
+from geocoding import parse_coordinates
+import geohash
+
+garden_repository = AsyncRepository(GardenRepository())
+
+DEFAULT_RADIUS_KM = 5.0
+MAX_RADIUS_KM = 200.0
+
+
+async def gardens_near(user_id, lat, lon, radius_km):
+    """
+    The user's gardens within radius_km, nearest first. Covering geohash
+    prefixes are queried in parallel, then candidates are refined by exact
+    great-circle distance.
+    """
+    cells = geohash.covering_cells(lat, lon, radius_km)
+    results = await asyncio.gather(*(garden_repository.near_prefix(user_id, cell) for cell in cells))
+
+    candidates = list({garden['gardenId']: garden for cell in results for garden in cell}.values())
+    if not candidates:
+        return [], len(cells), 0
+
+    distances = geohash.haversine_km(lat, lon, [g['lat'] for g in candidates], [g['lon'] for g in candidates])
+    nearby = [
+        {**garden, 'distanceKm': round(float(distance), 3)}
+        for garden, distance in zip(candidates, distances)
+        if distance <= radius_km
+    ]
+    nearby.sort(key=lambda garden: garden['distanceKm'])
+    return nearby, len(cells), len(candidates)
+
+
+@require_auth_async
+async def handler(event, context):
+    """
+    Gardens near a point: GET /gardens/near?lat=&lon=&radius=
+    radius is in kilometres (default 5, max 200)
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        params = event.get('queryStringParameters') or {}
+        try:
+            lat, lon = parse_coordinates(params.get('lat'), params.get('lon'))
+            radius_km = float(params.get('radius', DEFAULT_RADIUS_KM))
+        except (TypeError, ValueError):
+            return respond(400, {"message": "Invalid lat, lon or radius"})
+        if lat is None:
+            return respond(400, {"message": "Query parameters lat and lon are required"})
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            return respond(400, {"message": f"radius must be between 0 and {MAX_RADIUS_KM:g} km"})
+
+        gardens, cells, candidates = await gardens_near(user_id, lat, lon, radius_km)
+        print(f"Near query: {cells} cells, {candidates} candidates, {len(gardens)} within {radius_km} km")
+
+        return respond(200, {
+            "gardens": gardens,
+            "count": len(gardens)
+        })
+
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
@@ -0,0 +1,64 @@
+from botocore.exceptions import ClientError
+from simple_auth import require_auth, respond
+from geocoding import GeocodingError, get_geocoder, parse_coordinates
+
+
+@require_auth
+def geocode(event, context):
+    """
+    Coordinates for an address, served from the geocode cache when possible
+    GET /geocode?address=...
+    """
+    try:
+        params = event.get('queryStringParameters') or {}
+        address = (params.get('address') or '').strip()
+        if not address:
+            return respond(400, {"message": "Query parameter address is required"})
+
+        result = get_geocoder().geocode(address)
+        if not result:
+            return respond(404, {"message": "Address not found"})
+
+        return respond(200, {"result": result})
+
+    except GeocodingError as e:
+        print(f"Geocoding error: {e}")
+        return respond(502, {"message": "Geocoding service unavailable"})
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
+
+
+@require_auth
+def reverse(event, context):
+    """
+    Nearest address for coordinates
+    GET /geocode/reverse?lat=...&lon=...
+    """
+    try:
+        params = event.get('queryStringParameters') or {}
+        try:
+            lat, lon = parse_coordinates(params.get('lat'), params.get('lon'))
+        except (TypeError, ValueError):
+            return respond(400, {"message": "Invalid lat/lon"})
+        if lat is None:
+            return respond(400, {"message": "Query parameters lat and lon are required"})
+
+        result = get_geocoder().reverse(lat, lon)
+        if not result:
+            return respond(404, {"message": "No address found for these coordinates"})
+
+        return respond(200, {"result": result})
+
+    except GeocodingError as e:
+        print(f"Geocoding error: {e}")
+        return respond(502, {"message": "Geocoding service unavailable"})
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
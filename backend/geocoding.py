@@ -0,0 +1,310 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import requests
+from botocore.exceptions import BotoCoreError, ClientError
+from garden_cache import TTLCache
+import geohash
+from repositories import GeocodeCacheRepository
+
+GEOCODER_PROVIDER = os.environ.get('GEOCODER_PROVIDER', 'nominatim')
+GEOCODER_TIMEOUT = float(os.environ.get('GEOCODER_TIMEOUT', '3'))
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org')
+NOMINATIM_USER_AGENT = os.environ.get('NOMINATIM_USER_AGENT', 'florify-backend/1.0')
+FIXTURES_PATH = os.environ.get('GEOCODER_FIXTURES', os.path.join(os.path.dirname(__file__), 'geocoding_fixtures.json'))
+
+# Found addresses rarely move; misses are retried sooner in case of typos fixed upstream
+FOUND_TTL_SECONDS = 90 * 24 * 3600
+MISS_TTL_SECONDS = 24 * 3600
+MEMORY_CACHE_SIZE = int(os.environ.get('GEOCODE_MEMORY_CACHE_SIZE', '1024'))
+
+# Reverse lookups share a cache entry within ~11 m (4 decimal places)
+REVERSE_PRECISION = 4
+
+ABBREVIATIONS = {
+    'st': 'street', 'rd': 'road', 'ave': 'avenue', 'av': 'avenue', 'blvd': 'boulevard',
+    'dr': 'drive', 'ln': 'lane', 'ct': 'court', 'pl': 'place', 'sq': 'square',
+    'hwy': 'highway', 'n': 'north', 's': 'south', 'e': 'east', 'w': 'west',
+}
+
+
+class GeocodingError(Exception):
+    """The provider could not be reached or returned an error"""
+
+
+def normalize_address(address):
+    """
+    Canonical cache key for free-text addresses: accents, case, punctuation
+    and common street abbreviations do not produce separate entries.
+    "12 Main St., Málaga" -> "12 main street, malaga"
+    """
+    text = unicodedata.normalize('NFKD', str(address or ''))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    parts = []
+    for part in text.split(','):
+        part_words = re.findall(r'[a-z0-9]+', part)
+        if part_words:
+            parts.append(' '.join(ABBREVIATIONS.get(word, word) for word in part_words))
+    return ', '.join(parts)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+
+def parse_coordinates(lat, lon):
+    """
+    (lat, lon) as floats from request values, or (None, None) if both are
+    absent. Raises ValueError for partial, non-numeric or out-of-range input.
+    """
+    if lat is None and lon is None:
+        return None, None
+    if lat is None or lon is None:
+        raise ValueError("lat and lon must be given together")
+    lat, lon = float(lat), float(lon)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("Coordinates out of range")
+    return lat, lon
+
+
+# ============================================
+# PROVIDERS
+# ============================================
+# A provider returns {"lat", "lon", "formattedAddress", "placeId"} or None
+# when nothing matches, and raises GeocodingError when it cannot answer.
+
+class NominatimProvider:
+    """OpenStreetMap Nominatim; requests are spaced to respect its 1 req/s policy"""
+
+    name = 'nominatim'
+    MIN_INTERVAL = 1.0
+
+    def __init__(self, base_url=NOMINATIM_URL, user_agent=NOMINATIM_USER_AGENT, timeout=GEOCODER_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = user_agent
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+
+    def _get(self, path, params):
+        with self._lock:
+            wait = self._last_request + self.MIN_INTERVAL - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request = time.monotonic()
+        try:
+            response = self.session.get(f"{self.base_url}/{path}", params={**params, 'format': 'jsonv2'}, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GeocodingError(f"Nominatim {path} failed: {e}")
+
+    @staticmethod
+    def _result(place):
+        if not place or 'lat' not in place:
+            return None
+        return {
+            'lat': float(place['lat']),
+            'lon': float(place['lon']),
+            'formattedAddress': place.get('display_name', ''),
+            'placeId': f"osm:{place.get('osm_type', '')}{place.get('osm_id', place.get('place_id', ''))}"
+        }
+
+    def geocode(self, address):
+        places = self._get('search', {'q': address, 'limit': 1})
+        return self._result(places[0]) if places else None
+
+    def reverse(self, lat, lon):
+        return self._result(self._get('reverse', {'lat': lat, 'lon': lon}))
+
+
+class FixtureProvider:
+    """Answers from a JSON fixture file instead of the network (local runs and tests)"""
+
+    name = 'fixture'
+    MAX_REVERSE_KM = 5.0
+
+    def __init__(self, path=FIXTURES_PATH, places=None):
+        if places is None:
+            with open(path) as f:
+                places = json.load(f)['places']
+        self.places = {normalize_address(place['address']): place for place in places}
+        self.calls = 0
+
+    @staticmethod
+    def _result(place):
+        return {
+            'lat': place['lat'],
+            'lon': place['lon'],
+            'formattedAddress': place.get('formattedAddress', place['address']),
+            'placeId': f"fixture:{normalize_address(place['address'])}"
+        }
+
+    def geocode(self, address):
+        self.calls += 1
+        place = self.places.get(normalize_address(address))
+        return self._result(place) if place else None
+
+    def reverse(self, lat, lon):
+        self.calls += 1
+        if not self.places:
+            return None
+        nearest = min(self.places.values(), key=lambda place: haversine_km(lat, lon, place['lat'], place['lon']))
+        if haversine_km(lat, lon, nearest['lat'], nearest['lon']) > self.MAX_REVERSE_KM:
+            return None
+        return self._result(nearest)
+
+
+PROVIDERS = {
+    'nominatim': NominatimProvider,
+    'fixture': FixtureProvider,
+}
+
+
+# ============================================
+# PERSISTENT CACHE TIER
+# ============================================
+# A store returns (found, result) so cached misses (None) are distinguishable.
+# Stores are best-effort: these errors count as a cache miss / skipped write.
+STORE_ERRORS = (ClientError, BotoCoreError, sqlite3.Error)
+
+class DynamoGeocodeStore:
+    def __init__(self, repository=None):
+        self.repository = repository or GeocodeCacheRepository()
+
+    def get(self, key):
+        item = self.repository.get(key)
+        return (True, item.get('result')) if item else (False, None)
+
+    def put(self, key, result, ttl_seconds):
+        self.repository.put(key, result, ttl_seconds)
+
+
+class SQLiteGeocodeStore:
+    """Single-file cache for running outside AWS"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_cache "
+            "(cache_key TEXT PRIMARY KEY, result TEXT, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM geocode_cache WHERE cache_key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return False, None
+        return True, json.loads(row[0]) if row[0] else None
+
+    def put(self, key, result, ttl_seconds):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geocode_cache VALUES (?, ?, ?)",
+                (key, json.dumps(result) if result is not None else None, time.time() + ttl_seconds)
+            )
+            self._db.commit()
+
+
+# ============================================
+# GEOCODER
+# ============================================
+
+class Geocoder:
+    """Provider behind an in-memory LRU and an optional persistent store"""
+
+    def __init__(self, provider, store=None, memory=None):
+        self.provider = provider
+        self.store = store
+        self.memory = memory or TTLCache(max_entries=MEMORY_CACHE_SIZE, ttl=MISS_TTL_SECONDS)
+
+    def _lookup(self, key, fetch):
+        found, result = self.memory.get(key)
+        if found:
+            return result
+        if self.store:
+            try:
+                found, result = self.store.get(key)
+            except STORE_ERRORS as e:
+                print(f"Warning: geocode cache read failed, treating as a miss: {e}")
+                found = False
+            if found:
+                self.memory.put(key, result)
+                return result
+
+        result = fetch()
+        if result is not None:
+            result = {**result, 'provider': self.provider.name}
+        self.memory.put(key, result)
+        if self.store:
+            try:
+                self.store.put(key, result, FOUND_TTL_SECONDS if result else MISS_TTL_SECONDS)
+            except STORE_ERRORS as e:
+                print(f"Warning: geocode cache write failed: {e}")
+        return result
+
+    def geocode(self, address):
+        """Coordinates for a free-text address, or None if it cannot be found"""
+        normalized = normalize_address(address)
+        if not normalized:
+            return None
+        return self._lookup(f"addr:{normalized}", lambda: self.provider.geocode(address))
+
+    def reverse(self, lat, lon):
+        """Nearest address for coordinates, or None"""
+        lat, lon = round(lat, REVERSE_PRECISION), round(lon, REVERSE_PRECISION)
+        return self._lookup(f"rev:{lat:.{REVERSE_PRECISION}f},{lon:.{REVERSE_PRECISION}f}",
+                            lambda: self.provider.reverse(lat, lon))
+
+
+_geocoder = None
+
+
+def get_geocoder():
+    """Container-wide geocoder configured from the environment"""
+    global _geocoder
+    if _geocoder is None:
+        if os.environ.get('GEOCODE_CACHE_TABLE'):
+            store = DynamoGeocodeStore()
+        elif os.environ.get('GEOCODE_CACHE_DB'):
+            store = SQLiteGeocodeStore(os.environ['GEOCODE_CACHE_DB'])
+        else:
+            store = None
+        _geocoder = Geocoder(PROVIDERS[GEOCODER_PROVIDER](), store)
+    return _geocoder
+
+
+def garden_coordinates(location, lat=None, lon=None, raise_errors=False):
+    """
+    lat/lon/geohash fields for a garden write. Coordinates sent by the client (e.g.
+    from the browser's geolocation) win; otherwise the location text is
+    geocoded. Returns None when no coordinates can be determined; a provider
+    outage never fails the write unless raise_errors is set, in which case
+    GeocodingError is raised so the caller can tell it from an unknown address.
+    """
+    if lat is None or lon is None:
+        try:
+            result = get_geocoder().geocode(location)
+        except GeocodingError as e:
+            if raise_errors:
+                raise
+            print(f"Warning: geocoding failed for {location!r}: {e}")
+            return None
+        if not result:
+            return None
+        lat, lon = result['lat'], result['lon']
+    # geohash is the sort key of UserGeohashIndex ("gardens near" queries)
+    return {'lat': lat, 'lon': lon, 'geohash': geohash.encode(lat, lon)}
@@ -0,0 +1,104 @@
+import math
+import numpy as np
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+DECODE = {ch: i for i, ch in enumerate(BASE32)}
+
+# Stored precision: 9 characters is a ~4.8 m x 4.8 m cell
+STORE_PRECISION = 9
+# A proximity query fans out to at most this many prefix queries
+MAX_COVER_CELLS = 12
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode(lat, lon, precision=STORE_PRECISION):
+    """Standard geohash: interleaved longitude/latitude bisection bits, base32"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        target, bounds = (lon, lon_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if target >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def bounds(geohash):
+    """(min_lat, min_lon, max_lat, max_lon) of a cell"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for ch in geohash:
+        value = DECODE[ch]
+        for shift in range(4, -1, -1):
+            span = lon_range if even else lat_range
+            mid = (span[0] + span[1]) / 2
+            if value >> shift & 1:
+                span[0] = mid
+            else:
+                span[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def cell_size(precision):
+    """(lat_degrees, lon_degrees) spanned by a cell of the given precision"""
+    bits = 5 * precision
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def _wrap_lon(lon):
+    return (lon + 180.0) % 360.0 - 180.0
+
+
+def covering_cells(lat, lon, radius_km, max_cells=MAX_COVER_CELLS):
+    """
+    Geohash prefixes whose union covers the circle's bounding box, using the
+    finest precision that needs no more than max_cells prefixes.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    # Longitude degrees shrink towards the poles; near them the box spans every longitude
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    dlon = 180.0 if cos_lat < 1e-6 else min(dlat / cos_lat, 180.0)
+
+    for precision in range(STORE_PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        rows = math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step) + 1
+        columns = min(math.floor((lon + dlon) / lon_step) - math.floor((lon - dlon) / lon_step) + 1,
+                      round(360.0 / lon_step))
+        if rows * columns <= max_cells or precision == 1:
+            break
+
+    # Step through the box one cell at a time; every row/column is hit at least once
+    cells = set()
+    lat_steps = [min_lat + i * lat_step for i in range(rows)] + [max_lat]
+    lon_steps = [lon - dlon + i * lon_step for i in range(columns)] + [lon + dlon]
+    for cell_lat in lat_steps:
+        for cell_lon in lon_steps:
+            cells.add(encode(min(cell_lat, max_lat), _wrap_lon(min(cell_lon, lon + dlon)), precision))
+    return sorted(cells)
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance from one point to arrays of points, vectorized"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
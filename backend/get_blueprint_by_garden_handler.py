@@ -1,50 +1,38 @@
 import json
-import boto3
-import os
 from botocore.exceptions import ClientError
 from simple_auth import require_auth, respond
+from repositories import BlueprintRepository
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['BLUEPRINTS_TABLE'])
+blueprint_repository = BlueprintRepository()
 
 @require_auth
 def handler(event, context):
     """
-    Get blueprint for a specific garden
+    Get the newest blueprint for a specific garden
     """
     try:
         # Get authenticated user ID from the decorator
         user_id = event['user_id']
-        
+
         # Get garden ID from path parameters
         garden_id = event.get('pathParameters', {}).get('gardenId')
-        
+
         if not garden_id:
             return respond(400, {"message": "Garden ID is required"})
 
-        # Query DynamoDB using GSI on gardenId
-        response = table.query(
-            IndexName='GardenIdIndex',
-            KeyConditionExpression='gardenId = :gardenId',
-            FilterExpression='userId = :userId',
-            ExpressionAttributeValues={
-                ':gardenId': garden_id,
-                ':userId': user_id
-            }
-        )
-
-        blueprints = response.get('Items', [])
-        
-        # Return the first blueprint if exists
-        if blueprints:
+        # Newest key comes from the KEYS_ONLY GardenUserUpdatedIndex
+        blueprint = blueprint_repository.latest_for_garden(user_id, garden_id)
+
+        if blueprint:
             # Parse blueprintData JSON string back to object
-            if 'blueprintData' in blueprints[0] and isinstance(blueprints[0]['blueprintData'], str):
+            if 'blueprintData' in blueprint and isinstance(blueprint['blueprintData'], str):
                 try:
-                    blueprints[0]['blueprintData'] = json.loads(blueprints[0]['blueprintData'])
+                    blueprint['blueprintData'] = json.loads(blueprint['blueprintData'])
                 except json.JSONDecodeError:
                     print(f"Warning: Could not parse blueprintData")
-            
-            return respond(200, {"blueprint": blueprints[0]})
+
+            blueprint.pop('originalPathways', None)
+            return respond(200, {"blueprint": blueprint})
         else:
             return respond(404, {"message": "No blueprint found for this garden"})
 
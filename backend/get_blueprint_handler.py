@@ -1,16 +1,16 @@
 import json
-import boto3
-import os
 from botocore.exceptions import ClientError
 from simple_auth import require_auth, respond
+from blueprint_simplify import restore_originals
+from repositories import BlueprintRepository
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['BLUEPRINTS_TABLE'])
+blueprint_repository = BlueprintRepository()
 
 @require_auth
 def handler(event, context):
     """
-    Get a specific blueprint by ID
+    Get a specific blueprint by ID.
+    Pass ?original=true to get pathways with their pre-simplification vertices.
     """
     try:
         # Get authenticated user ID from the decorator
@@ -24,17 +24,7 @@ def handler(event, context):
         if not blueprint_id:
             return respond(400, {"message": "Blueprint ID is required"})
 
-        # Query DynamoDB
-        response = table.get_item(
-            Key={
-                'userId': user_id,
-                'blueprintId': blueprint_id
-            }
-        )
-
-        print(f"DynamoDB response: {response}")
-
-        blueprint = response.get('Item')
+        blueprint = blueprint_repository.get(user_id, blueprint_id)
         if not blueprint:
             print(f"Blueprint not found for user {user_id}, blueprint {blueprint_id}")
             return respond(404, {"message": "Blueprint not found"})
@@ -49,6 +39,14 @@ def handler(event, context):
             except json.JSONDecodeError as e:
                 print(f"Warning: Could not parse blueprintData for blueprint {blueprint_id}: {e}")
 
+        original_pathways = blueprint.pop('originalPathways', None)
+        params = event.get('queryStringParameters') or {}
+        if params.get('original') == 'true' and original_pathways and isinstance(blueprint.get('blueprintData'), dict):
+            try:
+                blueprint['blueprintData'] = restore_originals(blueprint['blueprintData'], original_pathways)
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse originalPathways for blueprint {blueprint_id}")
+
         return respond(200, {"blueprint": blueprint})
 
     except ClientError as e:
@@ -0,0 +1,45 @@
+from botocore.exceptions import ClientError
+from simple_auth import require_auth, respond
+from blueprint_versions import materialize
+from repositories import BlueprintRepository
+
+blueprint_repository = BlueprintRepository()
+
+@require_auth
+def handler(event, context):
+    """
+    Get blueprintData as it was at a specific version
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        path_parameters = event.get('pathParameters') or {}
+        blueprint_id = path_parameters.get('blueprintId')
+        if not blueprint_id:
+            return respond(400, {"message": "Blueprint ID is required"})
+
+        try:
+            version = int(path_parameters.get('version'))
+        except (TypeError, ValueError):
+            return respond(400, {"message": "Version must be an integer"})
+
+        blueprint_data = materialize(blueprint_repository, user_id, blueprint_id, version)
+        if blueprint_data is None:
+            return respond(404, {"message": "Version not found"})
+
+        return respond(200, {
+            "blueprintId": blueprint_id,
+            "version": version,
+            "blueprintData": blueprint_data
+        })
+
+    except ValueError as e:
+        print(f"Version history error: {e}")
+        return respond(500, {"message": "Version history is incomplete"})
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
@@ -1,11 +1,9 @@
-import json
-import boto3
-import os
 from botocore.exceptions import ClientError
 from simple_auth import require_auth, respond
+from repositories import GardenRepository
+import garden_cache
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['GARDENS_TABLE'])
+garden_repository = GardenRepository()
 
 @require_auth
 def handler(event, context):
@@ -18,15 +16,9 @@ def handler(event, context):
         if not garden_id:
             return respond(400, {"message": "Garden ID is required"})
 
-        # Get garden from DynamoDB
-        response = table.get_item(
-            Key={
-                'userId': user_id,
-                'gardenId': garden_id
-            }
-        )
-
-        garden = response.get('Item')
+        # Get garden from DynamoDB (cached only where writes can invalidate it)
+        garden = garden_repository.get(user_id, garden_id)
+        garden_cache.log_metrics()
         if not garden:
             return respond(404, {"message": "Garden not found"})
 
@@ -1,11 +1,9 @@
-import json
-import boto3
-import os
 from botocore.exceptions import ClientError
 from simple_auth import require_auth, respond
+from repositories import GardenRepository
+import garden_cache
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['GARDENS_TABLE'])
+garden_repository = GardenRepository()
 
 @require_auth
 def handler(event, context):
@@ -13,16 +11,10 @@ def handler(event, context):
         # Get authenticated user ID from the decorator
         user_id = event['user_id']
 
-        # Query gardens for this user
-        response = table.query(
-            KeyConditionExpression='userId = :userId',
-            ExpressionAttributeValues={
-                ':userId': user_id
-            }
-        )
+        # Query gardens for this user (cached only where writes can invalidate it)
+        gardens = garden_repository.list_for_user(user_id)
+        garden_cache.log_metrics()
 
-        gardens = response.get('Items', [])
-        
         return respond(200, {
             "gardens": gardens,
             "count": len(gardens)
@@ -0,0 +1,37 @@
+# gunicorn -c gunicorn.conf.py local_server:app
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+
+# Pre-fork: one process per core (plus one), each with its own threads.
+# Handlers spend most of their time waiting on AWS, so threads keep a core busy.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+worker_class = 'gthread'
+# Cache invalidations stay inside a process, so the garden cache is only safe with one worker
+if workers == 1:
+    os.environ.setdefault('GARDEN_CACHE', '1')
+threads = int(os.environ.get('WORKER_THREADS', '16'))
+
+# HTTP keep-alive between the load balancer and the workers
+keepalive = int(os.environ.get('KEEPALIVE', '75'))
+timeout = 30
+graceful_timeout = 30
+
+# Handlers are imported after the fork (no preload): boto3 clients and their
+# connection pools must not be shared across processes. Each worker then keeps
+# its clients, garden cache and geocode cache for its whole lifetime.
+preload_app = False
+
+# Recycle workers now and then so memory growth cannot accumulate
+max_requests = int(os.environ.get('MAX_REQUESTS', '20000'))
+max_requests_jitter = 2000
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    # Build the app (imports every handler) before the worker takes traffic
+    import local_server
+    local_server.get_app()
@@ -0,0 +1,159 @@
+"""
+Content hashes for blueprints.
+
+- data_hash: SHA-256 of blueprintData in canonical JSON, for exact "nothing
+  changed" checks on save
+- png_hash: SHA-256 of the stored base64 PNG string, the same check for the image
+- phash / dhash: 64-bit perceptual hashes of a PNG. Re-renders of the same
+  drawing land on the same or a nearby hash, so the Hamming distance is a
+  cheap similarity signal that needs no model.
+
+Corpus hashes (pHash of every png_cache/empty image) are kept in
+png_hashes.npy next to the embeddings and serve as a first-stage filter
+before embedding similarity.
+
+    python image_hash.py build-corpus
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+from PIL import Image
+from embedding_index import CORPUS_DIR
+
+CORPUS_HASHES_FILE = 'png_hashes.npy'
+
+# pHash: DCT of a 32x32 grayscale thumbnail, keeping the 8x8 lowest frequencies
+PHASH_SIZE = 32
+PHASH_LOW = 8
+
+
+def data_hash(blueprint_data):
+    """SHA-256 hex digest of blueprintData (object or JSON string), independent of key order"""
+    if isinstance(blueprint_data, str):
+        blueprint_data = json.loads(blueprint_data) if blueprint_data else {}
+    canonical = json.dumps(blueprint_data or {}, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def png_hash(png_image):
+    """SHA-256 hex digest of a base64 PNG exactly as stored, or None if there is none"""
+    if not png_image:
+        return None
+    return hashlib.sha256(png_image.encode('utf-8')).hexdigest()
+
+
+def _grayscale(source, size):
+    from embedding_model import load_image
+
+    image = load_image(source)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Transparent areas count as white paper, like the renderer's background
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    return np.asarray(image.convert('L').resize(size, Image.LANCZOS), dtype=np.float64)
+
+
+def _pack(bits):
+    """Boolean array (64 values) -> unsigned 64-bit integer, most significant bit first"""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def phash(source):
+    """Perceptual hash: low-frequency DCT coefficients above their median"""
+    pixels = _grayscale(source, (PHASH_SIZE, PHASH_SIZE))
+    coefficients = (_DCT @ pixels @ _DCT.T)[:PHASH_LOW, :PHASH_LOW]
+    # The DC term only encodes overall brightness
+    median = np.median(coefficients.ravel()[1:])
+    return _pack(coefficients > median)
+
+
+def dhash(source):
+    """Difference hash: whether each pixel of a 9x8 thumbnail is brighter than its right neighbour"""
+    pixels = _grayscale(source, (9, 8))
+    return _pack(pixels[:, 1:] > pixels[:, :-1])
+
+
+def to_hex(value):
+    return f"{value:016x}"
+
+
+def from_hex(text):
+    return int(text, 16)
+
+
+def image_hashes(png_image):
+    """{'imagePHash', 'imageDHash'} for a base64 PNG, or {} if there is none or it does not decode"""
+    if not png_image:
+        return {}
+    try:
+        return {'imagePHash': to_hex(phash(png_image)), 'imageDHash': to_hex(dhash(png_image))}
+    except Exception as e:
+        print(f"Warning: Could not hash PNG image: {e}")
+        return {}
+
+
+def hamming(hashes, query):
+    """Bit distance from query to every hash in a uint64 array"""
+    diff = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(query))
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(diff).astype(np.int32)
+    return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1).astype(np.int32)
+
+
+class CorpusHashes:
+    """pHash of every corpus pair, row-aligned with embeddings.npy"""
+
+    def __init__(self, hashes):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+
+    @classmethod
+    def load(cls, corpus_dir=CORPUS_DIR):
+        return cls(np.load(os.path.join(corpus_dir, CORPUS_HASHES_FILE)))
+
+    def candidates(self, query, max_distance):
+        """(rows, distances) within max_distance bits, nearest first"""
+        distances = hamming(self.hashes, query)
+        rows = np.flatnonzero(distances <= max_distance)
+        order = np.argsort(distances[rows], kind='stable')
+        return rows[order], distances[rows][order]
+
+
+_corpus_hashes = None
+
+
+def get_corpus_hashes():
+    global _corpus_hashes
+    if _corpus_hashes is None:
+        _corpus_hashes = CorpusHashes.load()
+    return _corpus_hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash the corpus PNGs for the similarity prefilter")
+    parser.add_argument('command', choices=['build-corpus'])
+    parser.add_argument('--corpus', default=CORPUS_DIR)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, 'png_cache', 'empty', '*.png')))
+    hashes = np.array([phash(path) for path in paths], dtype=np.uint64)
+    np.save(os.path.join(args.corpus, CORPUS_HASHES_FILE), hashes)
+    print(f"Hashed {len(paths)} images into {args.corpus}/{CORPUS_HASHES_FILE}")
+
+
+if __name__ == '__main__':
+    main()
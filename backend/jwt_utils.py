@@ -1,4 +1,5 @@
 import json
+from decimal import Decimal
 import boto3
 import requests
 from botocore.exceptions import ClientError
@@ -21,11 +22,17 @@ def cors_headers():
         "Access-Control-Allow-Headers": "Content-Type,Authorization"
     }
 
+def json_default(value):
+    """Serialize DynamoDB numbers (Decimal) as int or float"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 def respond(status, body):
     return {
         "statusCode": status,
         "headers": cors_headers(),
-        "body": json.dumps(body)
+        "body": json.dumps(body, default=json_default)
     }
 
 def get_cognito_public_keys():
@@ -0,0 +1,35 @@
+from botocore.exceptions import ClientError
+from simple_auth import require_auth, respond
+from blueprint_versions import history_key
+from repositories import BlueprintRepository
+
+blueprint_repository = BlueprintRepository()
+
+@require_auth
+def handler(event, context):
+    """
+    List the saved versions of a blueprint, newest first
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        blueprint_id = (event.get('pathParameters') or {}).get('blueprintId')
+        if not blueprint_id:
+            return respond(400, {"message": "Blueprint ID is required"})
+
+        versions = blueprint_repository.list_versions(history_key(user_id, blueprint_id))
+        if not versions:
+            return respond(404, {"message": "No version history for this blueprint"})
+
+        return respond(200, {
+            "versions": versions,
+            "count": len(versions)
+        })
+
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
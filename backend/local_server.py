@@ -0,0 +1,244 @@
+"""
+Serve the Lambda handlers over plain HTTP (WSGI) for self-hosted nodes.
+
+Routes and environment come from serverless.yml, so a handler is reachable
+under the same path and method as behind API Gateway. Each request is turned
+into an API Gateway proxy event (REST v1 fields plus the HTTP API v2
+requestContext some handlers read) and the handler's response is written back.
+
+    gunicorn -c gunicorn.conf.py local_server:app     # pre-fork, multi-worker
+    python local_server.py --port 8000                # single process, for development
+"""
+import argparse
+import base64
+import importlib
+import json
+import os
+import re
+import time
+import uuid
+from urllib.parse import parse_qsl
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, make_server
+import yaml
+
+SERVERLESS_CONFIG = os.environ.get('SERVERLESS_CONFIG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serverless.yml'))
+
+# Use the first X-Forwarded-For address as the caller IP (only behind a trusted proxy)
+TRUST_FORWARDED_FOR = os.environ.get('TRUST_FORWARDED_FOR', '') == '1'
+
+# Handlers that are not wired in serverless.yml but still served
+EXTRA_ROUTES = []
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "OPTIONS,POST,GET,PUT,DELETE",
+    "Access-Control-Allow-Headers": "Content-Type,Authorization"
+}
+
+STATUS_TEXT = {
+    200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 401: 'Unauthorized',
+    403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+    422: 'Unprocessable Entity', 429: 'Too Many Requests', 500: 'Internal Server Error',
+    502: 'Bad Gateway', 503: 'Service Unavailable',
+}
+
+
+def load_config(path=SERVERLESS_CONFIG):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def load_routes(config):
+    """(method, path, "module.function") for every http event in serverless.yml"""
+    routes = []
+    for function in (config.get('functions') or {}).values():
+        for event in function.get('events') or []:
+            http = event.get('http') if isinstance(event, dict) else None
+            if http:
+                routes.append((http['method'].upper(), http['path'].strip('/'), function['handler']))
+    return routes + EXTRA_ROUTES
+
+
+class Route:
+    def __init__(self, method, path, handler_name):
+        self.method = method
+        self.path = path
+        self.handler_name = handler_name
+        self.params = re.findall(r'{(\w+)}', path)
+        pattern = re.sub(r'{(\w+)}', r'(?P<\1>[^/]+)', path)
+        self.regex = re.compile(f'^/{pattern}/?$')
+        self.handler = None
+
+    def sort_key(self):
+        # Literal segments win over parameters (gardens/search before gardens/{gardenId})
+        return len(self.params), -len(self.path)
+
+    def load(self):
+        module_name, function_name = self.handler_name.rsplit('.', 1)
+        self.handler = getattr(importlib.import_module(module_name), function_name)
+
+
+class LambdaContext:
+    """The parts of the Lambda context object handlers may touch"""
+
+    def __init__(self, function_name, timeout=30):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def _headers(environ):
+    headers = {}
+    for key, value in environ.items():
+        if key.startswith('HTTP_'):
+            headers[key[5:].replace('_', '-').title()] = value
+    if environ.get('CONTENT_TYPE'):
+        headers['Content-Type'] = environ['CONTENT_TYPE']
+    if environ.get('CONTENT_LENGTH'):
+        headers['Content-Length'] = environ['CONTENT_LENGTH']
+    return headers
+
+
+def _query(environ):
+    pairs = parse_qsl(environ.get('QUERY_STRING', ''), keep_blank_values=True)
+    # API Gateway keeps the last value of repeated parameters
+    return dict(pairs) or None
+
+
+def build_event(environ, route, path_parameters):
+    """API Gateway proxy event for a WSGI request"""
+    method = environ['REQUEST_METHOD']
+    path = environ.get('PATH_INFO', '/')
+    headers = _headers(environ)
+
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    raw = environ['wsgi.input'].read(length) if length else b''
+    try:
+        body, is_base64 = raw.decode('utf-8'), False
+    except UnicodeDecodeError:
+        body, is_base64 = base64.b64encode(raw).decode('ascii'), True
+
+    source_ip = environ.get('REMOTE_ADDR', '')
+    if TRUST_FORWARDED_FOR and headers.get('X-Forwarded-For'):
+        source_ip = headers['X-Forwarded-For'].split(',')[0].strip()
+
+    return {
+        'resource': f'/{route.path}',
+        'path': path,
+        'httpMethod': method,
+        'headers': headers,
+        'queryStringParameters': _query(environ),
+        'pathParameters': path_parameters or None,
+        'body': body if raw else None,
+        'isBase64Encoded': is_base64,
+        'requestContext': {
+            'identity': {'sourceIp': source_ip},
+            'http': {'method': method, 'path': path, 'sourceIp': source_ip},
+            'requestTimeEpoch': int(time.time() * 1000),
+        },
+    }
+
+
+class Application:
+    """WSGI app dispatching to the Lambda handlers. Build one per worker process."""
+
+    def __init__(self, config=None):
+        config = config or load_config()
+        # Same environment the functions get on Lambda; real env vars take precedence
+        for key, value in ((config.get('provider') or {}).get('environment') or {}).items():
+            os.environ.setdefault(key, str(value))
+
+        self.routes = sorted((Route(*route) for route in load_routes(config)), key=Route.sort_key)
+        # Import every handler now so module-level clients and caches are created
+        # once per worker, not on the first request that happens to hit them
+        for route in self.routes:
+            route.load()
+
+    def match(self, method, path):
+        """(route, path_parameters) or (None, allowed_methods)"""
+        allowed = set()
+        for route in self.routes:
+            match = route.regex.match(path)
+            if not match:
+                continue
+            if route.method == method:
+                return route, match.groupdict()
+            allowed.add(route.method)
+        return None, allowed
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = environ.get('PATH_INFO', '/')
+
+        if path == '/healthz':
+            return self._reply(start_response, 200, {'Content-Type': 'application/json'}, b'{"status": "ok"}')
+
+        route, params = self.match(method, path)
+        if route is None:
+            if params and method == 'OPTIONS':
+                # API Gateway answers CORS preflight itself for cors: true routes
+                return self._reply(start_response, 200, dict(CORS_HEADERS), b'')
+            status = 405 if params else 404
+            message = json.dumps({"message": STATUS_TEXT[status]}).encode('utf-8')
+            return self._reply(start_response, status, {'Content-Type': 'application/json', **CORS_HEADERS}, message)
+
+        event = build_event(environ, route, params)
+        try:
+            result = route.handler(event, LambdaContext(route.handler_name))
+        except Exception as e:
+            print(f"Unhandled error in {route.handler_name}: {e}")
+            result = {'statusCode': 502, 'body': json.dumps({"message": "Internal server error"})}
+
+        headers = {'Content-Type': 'application/json', **(result.get('headers') or {})}
+        body = result.get('body') or ''
+        payload = base64.b64decode(body) if result.get('isBase64Encoded') else body.encode('utf-8')
+        return self._reply(start_response, result.get('statusCode', 200), headers, payload)
+
+    @staticmethod
+    def _reply(start_response, status, headers, payload):
+        headers['Content-Length'] = str(len(payload))
+        start_response(f"{status} {STATUS_TEXT.get(status, '')}".strip(),
+                       [(name, str(value)) for name, value in headers.items()])
+        return [payload]
+
+
+_application = None
+
+
+def get_app():
+    global _application
+    if _application is None:
+        _application = Application()
+    return _application
+
+
+def app(environ, start_response):
+    """WSGI entry point (local_server:app); the Application is built lazily per process"""
+    return get_app()(environ, start_response)
+
+
+class ThreadingServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Florify API locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    # One process serves every route, so garden writes invalidate the cache its reads use
+    os.environ.setdefault('GARDEN_CACHE', '1')
+    application = get_app()
+    for route in application.routes:
+        print(f"{route.method:7} /{route.path} -> {route.handler_name}")
+    print(f"Listening on http://{args.host}:{args.port}")
+    make_server(args.host, args.port, application, server_class=ThreadingServer).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
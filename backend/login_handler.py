@@ -2,6 +2,7 @@ import json
 import boto3
 import os
 from botocore.exceptions import ClientError
+import rate_limit
 
 client = boto3.client("cognito-idp")
 
@@ -36,6 +37,11 @@ def handler(event, context):
     if not email or not password:
         return respond(400, {"message": "Email and password are required"})
 
+    # Reject bursts before they reach Cognito and use up the account's quota
+    retry_after = rate_limit.check("login", event, email)
+    if retry_after:
+        return rate_limit.throttled(respond, retry_after)
+
     try:
         response = client.initiate_auth(
             ClientId=os.environ["CLIENT_ID"],
@@ -51,7 +57,8 @@ def handler(event, context):
             "message": "Login successful",
             "token": tokens.get("IdToken"),  # Use ID token for authentication
             "accessToken": tokens.get("AccessToken"),
-            "refreshToken": tokens.get("RefreshToken")
+            "refreshToken": tokens.get("RefreshToken"),
+            "expiresIn": tokens.get("ExpiresIn")  # Seconds until the ID token expires
         })
 
     except client.exceptions.NotAuthorizedException:
@@ -63,6 +70,9 @@ def handler(event, context):
     except client.exceptions.UserNotFoundException:
         return respond(400, {"message": "User does not exist"})
 
+    except client.exceptions.TooManyRequestsException:
+        return rate_limit.throttled(respond, 1)
+
     except ClientError as e:
         print("ClientError:", e)
         error = e.response["Error"]
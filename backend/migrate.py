@@ -0,0 +1,364 @@
+"""
+Rewrite every item of a table (blueprints by default) through a transform.
+
+The table is read with a parallel Scan (one worker per segment), each item
+is passed to a transform, and changed items are written back with
+BatchWriteItem. Reads and writes share a capacity budget, and progress is
+checkpointed per segment so an interrupted run resumes where it stopped.
+BatchWriteItem has no conditions: an item saved between its scan and the
+write-back is overwritten, so run rewrites in a quiet window.
+
+    python migrate.py user-updated-at --segments 16 --max-rcu 400 --max-wcu 200
+    python migrate.py mypackage.transforms:compress --dry-run
+    python migrate.py user-updated-at --checkpoint migrate-user-updated-at.json   # resume
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from repositories import BATCH_WRITE_SIZE, from_item, get_client, to_item
+
+# Errors worth backing off and retrying (the client's own retries were exhausted)
+RETRYABLE_ERRORS = {
+    'ProvisionedThroughputExceededException', 'ThrottlingException',
+    'RequestLimitExceeded', 'InternalServerError', 'ServiceUnavailable'
+}
+MAX_ATTEMPTS = 10
+SCAN_PAGE_SIZE = int(os.environ.get('MIGRATE_SCAN_PAGE_SIZE', '200'))
+
+
+# ============================================
+# TRANSFORMS
+# ============================================
+# A transform takes an item (plain Python values) and returns the item to
+# write back, or None to leave it untouched. It must be idempotent: after a
+# resume, items of a partly finished page are transformed again.
+
+def user_updated_at(item):
+    """Backfill userUpdatedAt so the item appears in GardenUserUpdatedIndex"""
+    # Never-updated items sort by their creation time
+    updated_at = item.get('updatedAt') or item.get('createdAt')
+    if item.get('userUpdatedAt') or not updated_at:
+        return None
+    return {**item, 'userUpdatedAt': f"{item['userId']}#{updated_at}"}
+
+
+def drop_empty_images(item):
+    """Remove pngImage/pdfImage attributes stored as empty strings"""
+    empty = [field for field in ('pngImage', 'pdfImage') if item.get(field) == '']
+    if not empty:
+        return None
+    return {key: value for key, value in item.items() if key not in empty}
+
+
+def content_hashes(item):
+    """Backfill dataHash and the PNG hashes used to skip unchanged saves and find duplicates"""
+    from image_hash import data_hash, image_hashes, png_hash
+
+    hashed = item.get('dataHash') and (item.get('pngHash') or not item.get('pngImage'))
+    if hashed or 'blueprintData' not in item:
+        return None
+    try:
+        hashes = {'dataHash': data_hash(item['blueprintData']), **image_hashes(item.get('pngImage'))}
+        if item.get('pngImage'):
+            hashes['pngHash'] = png_hash(item['pngImage'])
+    except ValueError:
+        print(f"Skipping {item.get('blueprintId')}: blueprintData is not valid JSON")
+        return None
+    return {**item, **hashes}
+
+
+TRANSFORMS = {
+    'user-updated-at': user_updated_at,
+    'drop-empty-images': drop_empty_images,
+    'content-hashes': content_hashes,
+}
+
+
+def load_transform(name):
+    """A built-in transform by name, or any function given as "module:function" """
+    if name in TRANSFORMS:
+        return TRANSFORMS[name]
+    if ':' not in name:
+        raise ValueError(f"Unknown transform {name!r} (built-in: {', '.join(TRANSFORMS)})")
+    module_name, function_name = name.split(':', 1)
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+# ============================================
+# CAPACITY
+# ============================================
+
+class CapacityLimiter:
+    """
+    Token bucket in capacity units shared by all workers. Callers acquire an
+    estimate before a request and settle with the ConsumedCapacity DynamoDB
+    reports, so the long-run rate tracks what the table actually spent.
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, units_per_second, clock=time.monotonic):
+        self.rate = float(units_per_second)
+        self.clock = clock
+        # Allow up to one second of burst
+        self.tokens = self.rate
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, units):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= min(units, self.rate):
+                    self.tokens -= units
+                    return
+                wait = (min(units, self.rate) - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def settle(self, estimated, consumed):
+        """Charge (or refund) the difference between the estimate and the actual cost"""
+        if not self.rate or consumed is None:
+            return
+        with self._lock:
+            self.tokens -= consumed - estimated
+
+
+def _consumed(response):
+    capacity = response.get('ConsumedCapacity')
+    if isinstance(capacity, list):
+        return sum(entry.get('CapacityUnits', 0) for entry in capacity)
+    return capacity.get('CapacityUnits') if capacity else None
+
+
+def _backoff(attempt):
+    # Full jitter, capped at 20 seconds
+    return random.uniform(0, min(20, 0.1 * 2 ** attempt))
+
+
+def scan_page(client, limiter, table_name, segment, total_segments, start_key=None, **params):
+    """
+    One page of a parallel Scan segment, paced by a read CapacityLimiter and
+    retried with backoff on throttling. Extra params (e.g. ProjectionExpression)
+    are passed to Scan.
+    """
+    params.update({
+        'TableName': table_name,
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'Limit': SCAN_PAGE_SIZE,
+        'ReturnConsumedCapacity': 'TOTAL'
+    })
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+
+    # A 1 MB page costs at most 128 RCUs with eventually consistent reads
+    estimate = 8
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire(estimate)
+        try:
+            response = client.scan(**params)
+        except ClientError as e:
+            limiter.settle(estimate, 0)
+            if e.response['Error']['Code'] not in RETRYABLE_ERRORS or attempt == MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+        limiter.settle(estimate, _consumed(response))
+        return response
+
+
+# ============================================
+# CHECKPOINT
+# ============================================
+
+class Checkpoint:
+    """
+    Per-segment progress in a JSON file: the last Scan key whose page has been
+    fully written, whether the segment is done, and counters. Saved after every
+    page with an atomic rename, so a crash loses at most the pages in flight.
+    """
+
+    def __init__(self, path, table_name, transform_name, total_segments):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {
+            'table': table_name,
+            'transform': transform_name,
+            'totalSegments': total_segments,
+            'segments': {}
+        }
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if (saved['table'], saved['transform'], saved['totalSegments']) != (table_name, transform_name, total_segments):
+                raise ValueError(f"Checkpoint {path} is for {saved['table']}/{saved['transform']} "
+                                 f"with {saved['totalSegments']} segments")
+            self.state = saved
+
+    def segment(self, segment):
+        with self._lock:
+            return dict(self.state['segments'].setdefault(
+                str(segment), {'lastKey': None, 'done': False, 'scanned': 0, 'changed': 0, 'written': 0}))
+
+    def update(self, segment, **values):
+        with self._lock:
+            entry = self.state['segments'].setdefault(str(segment), {})
+            for key, value in values.items():
+                entry[key] = entry.get(key, 0) + value if key in ('scanned', 'changed', 'written') else value
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(temporary, self.path)
+
+    def totals(self):
+        with self._lock:
+            segments = self.state['segments'].values()
+            return {
+                'scanned': sum(entry.get('scanned', 0) for entry in segments),
+                'changed': sum(entry.get('changed', 0) for entry in segments),
+                'written': sum(entry.get('written', 0) for entry in segments),
+                'segmentsDone': sum(1 for entry in segments if entry.get('done'))
+            }
+
+
+# ============================================
+# MIGRATION
+# ============================================
+
+class Migration:
+    def __init__(self, table_name, transform, checkpoint, read_limiter, write_limiter,
+                 total_segments, dry_run=False, client=None):
+        self.table_name = table_name
+        self.transform = transform
+        self.checkpoint = checkpoint
+        self.read_limiter = read_limiter
+        self.write_limiter = write_limiter
+        self.total_segments = total_segments
+        self.dry_run = dry_run
+        self.client = client or get_client()
+
+    def _scan_page(self, segment, start_key):
+        return scan_page(self.client, self.read_limiter, self.table_name, segment, self.total_segments, start_key)
+
+    def _write(self, items):
+        """BatchWriteItem in chunks of 25, resubmitting unprocessed items with backoff"""
+        for start in range(0, len(items), BATCH_WRITE_SIZE):
+            pending = [{'PutRequest': {'Item': to_item(item)}} for item in items[start:start + BATCH_WRITE_SIZE]]
+            attempt = 0
+            while pending:
+                # At least 1 WCU per item (more per extra KB; settled below)
+                estimate = len(pending)
+                self.write_limiter.acquire(estimate)
+                try:
+                    response = self.client.batch_write_item(
+                        RequestItems={self.table_name: pending},
+                        ReturnConsumedCapacity='TOTAL'
+                    )
+                except ClientError as e:
+                    self.write_limiter.settle(estimate, 0)
+                    if e.response['Error']['Code'] not in RETRYABLE_ERRORS:
+                        raise
+                else:
+                    self.write_limiter.settle(estimate, _consumed(response))
+                    pending = (response.get('UnprocessedItems') or {}).get(self.table_name, [])
+                    if not pending:
+                        break
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS:
+                    raise RuntimeError(f"{len(pending)} items still unprocessed after {attempt} attempts")
+                time.sleep(_backoff(attempt))
+
+    def run_segment(self, segment):
+        state = self.checkpoint.segment(segment)
+        if state['done']:
+            return
+        start_key = state['lastKey']
+
+        while True:
+            response = self._scan_page(segment, start_key)
+            items = [from_item(item) for item in response.get('Items', [])]
+            changed = [new for new in map(self.transform, items) if new is not None]
+            if changed and not self.dry_run:
+                self._write(changed)
+
+            start_key = response.get('LastEvaluatedKey')
+            # The key is only recorded once the page's writes have landed
+            self.checkpoint.update(
+                segment,
+                lastKey=start_key,
+                done=start_key is None,
+                scanned=len(items),
+                changed=len(changed),
+                written=0 if self.dry_run else len(changed)
+            )
+            if start_key is None:
+                return
+
+    def run(self, workers, progress_interval=10):
+        started = time.monotonic()
+        stop = threading.Event()
+
+        def report():
+            while not stop.wait(progress_interval):
+                totals = self.checkpoint.totals()
+                elapsed = time.monotonic() - started
+                print(f"[{elapsed:6.0f}s] scanned {totals['scanned']}, changed {totals['changed']}, "
+                      f"written {totals['written']}, segments done {totals['segmentsDone']}/{self.total_segments}")
+
+        reporter = threading.Thread(target=report, daemon=True)
+        reporter.start()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # list() re-raises the first worker error
+                list(pool.map(self.run_segment, range(self.total_segments)))
+        finally:
+            stop.set()
+        return self.checkpoint.totals()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite table items through a transform with a parallel Scan")
+    parser.add_argument('transform', help=f"Built-in ({', '.join(TRANSFORMS)}) or module:function")
+    parser.add_argument('--table', default=os.environ.get('BLUEPRINTS_TABLE', 'florify-blueprints-dev'))
+    parser.add_argument('--segments', type=int, default=8, help="Scan TotalSegments")
+    parser.add_argument('--workers', type=int, help="Concurrent segments (default: one per segment)")
+    parser.add_argument('--max-rcu', type=float, default=0, help="Read capacity units per second (0 = unlimited)")
+    parser.add_argument('--max-wcu', type=float, default=0, help="Write capacity units per second (0 = unlimited)")
+    parser.add_argument('--checkpoint', help="Progress file (default: migrate-<transform>.json)")
+    parser.add_argument('--dry-run', action='store_true', help="Scan and transform without writing")
+    args = parser.parse_args()
+
+    transform = load_transform(args.transform)
+    checkpoint_path = args.checkpoint or f"migrate-{args.transform.replace(':', '-')}{'-dry-run' if args.dry_run else ''}.json"
+    checkpoint = Checkpoint(checkpoint_path, args.table, args.transform, args.segments)
+    if checkpoint.totals()['scanned']:
+        print(f"Resuming from {checkpoint_path}: {checkpoint.totals()}")
+
+    migration = Migration(
+        args.table, transform, checkpoint,
+        CapacityLimiter(args.max_rcu), CapacityLimiter(args.max_wcu),
+        args.segments, dry_run=args.dry_run
+    )
+    totals = migration.run(args.workers or args.segments)
+    print(f"Done: {totals}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""
+Planting masks for the corpus pairs.
+
+Each png_cache/filled/NNNN.png is png_cache/empty/NNNN.png with planting beds
+drawn in. Diffing a pair, closing small gaps in the bed outlines and filling
+their interiors gives a mask of where planting was added; its connected
+regions are traced into simplified polygons.
+
+Everything is precomputed into a mask bank next to the embeddings:
+    planting_runs.npy      uint16 run lengths of every mask, concatenated
+                           (row-major MASK_SIZE x MASK_SIZE, background first)
+    planting_index.npy     per pair: offset and count into the runs, planted
+                           fraction and the drawing extent in the empty image
+    planting_regions.json  per pair: region polygons in extent coordinates (0..1)
+
+The arrays are memory-mapped, so looking up a pair reads only its runs, and
+regions can be mapped onto a user's plot without any pixel work.
+
+    python planting_masks.py build
+    python planting_masks.py show 3 --out mask.png
+"""
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+from blueprint_simplify import rdp_mask
+from blueprint_spatial import vertices_bbox
+from embedding_index import CORPUS_DIR
+
+RUNS_FILE = 'planting_runs.npy'
+INDEX_FILE = 'planting_index.npy'
+REGIONS_FILE = 'planting_regions.json'
+
+# Masks are stored at 128 x 128 (4 x 4 max-pooled from the 512 px renders);
+# runs are uint16, so MASK_SIZE ** 2 must stay below 65536
+MASK_SIZE = 128
+# Per-channel difference that counts as a change; antialiasing noise stays below it
+DIFF_THRESHOLD = 24
+# Pixels that are not white in the empty render make up its drawing extent
+INK_THRESHOLD = 250
+# Regions smaller than this fraction of the mask are specks, not beds
+MIN_REGION_FRACTION = 0.0005
+# Polygon simplification tolerance, in mask pixels
+SIMPLIFY_TOLERANCE = 0.75
+
+INDEX_DTYPE = np.dtype([
+    ('offset', np.int64), ('count', np.int32), ('planted', np.float32),
+    ('x0', np.float32), ('y0', np.float32), ('x1', np.float32), ('y1', np.float32)
+])
+
+
+def _pixels(path):
+    return np.asarray(Image.open(path).convert('RGB'), dtype=np.int16)
+
+
+# ============================================
+# MASK OPERATIONS
+# ============================================
+
+def diff_mask(empty, filled, threshold=DIFF_THRESHOLD):
+    """Pixels where the two (H, W, 3) renders differ in any channel"""
+    return (np.abs(empty - filled).max(axis=2) > threshold)
+
+
+def downsample(mask, size=MASK_SIZE):
+    """Max-pool a square boolean mask down to size x size"""
+    factor = mask.shape[0] // size
+    return mask[:size * factor, :size * factor].reshape(size, factor, size, factor).any(axis=(1, 3))
+
+
+def _shift(mask, dy, dx):
+    out = np.zeros_like(mask)
+    h, w = mask.shape
+    out[max(dy, 0):h + min(dy, 0), max(dx, 0):w + min(dx, 0)] = \
+        mask[max(-dy, 0):h + min(-dy, 0), max(-dx, 0):w + min(-dx, 0)]
+    return out
+
+
+def dilate(mask, radius=1):
+    out = mask.copy()
+    for dy in range(-radius, radius + 1):
+        for dx in range(-radius, radius + 1):
+            out |= _shift(mask, dy, dx)
+    return out
+
+
+def erode(mask, radius=1):
+    return ~dilate(~mask, radius)
+
+
+def close(mask, radius=1):
+    """Bridge gaps up to 2 * radius pixels wide in outlines"""
+    return erode(dilate(mask, radius), radius)
+
+
+def _segment_min(labels, mask):
+    """Give every horizontal run of mask pixels the smallest label in it"""
+    flat_mask = mask.ravel()
+    starts = flat_mask & ~np.r_[False, flat_mask[:-1]]
+    starts[::mask.shape[1]] = flat_mask[::mask.shape[1]]  # runs never continue onto the next row
+    segment = np.cumsum(starts) - 1
+    flat = labels.ravel()
+    minimum = np.full(int(starts.sum()), np.iinfo(labels.dtype).max, dtype=labels.dtype)
+    np.minimum.at(minimum, segment[flat_mask], flat[flat_mask])
+    flat[flat_mask] = minimum[segment[flat_mask]]
+
+
+def label(mask, connectivity=8):
+    """
+    Connected components: (labels, count), labels 1..count, 0 for background.
+    Labels spread along whole row and column runs per pass (plus diagonal
+    neighbours for 8-connectivity), so blobs converge in a few passes.
+    """
+    big = np.iinfo(np.int32).max
+    labels = np.where(mask, np.arange(1, mask.size + 1, dtype=np.int32).reshape(mask.shape), big)
+    while True:
+        before = labels.copy()
+        _segment_min(labels, mask)
+        transposed = np.ascontiguousarray(labels.T)
+        _segment_min(transposed, np.ascontiguousarray(mask.T))
+        labels = transposed.T.copy()
+        if connectivity == 8:
+            for dy, dx in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                shifted = np.full_like(labels, big)
+                h, w = labels.shape
+                shifted[max(dy, 0):h + min(dy, 0), max(dx, 0):w + min(dx, 0)] = \
+                    labels[max(-dy, 0):h + min(-dy, 0), max(-dx, 0):w + min(-dx, 0)]
+                labels = np.where(mask, np.minimum(labels, shifted), big)
+        if np.array_equal(labels, before):
+            break
+    unique, compact = np.unique(labels[mask], return_inverse=True)
+    result = np.zeros(mask.shape, dtype=np.int32)
+    result[mask] = compact.ravel() + 1
+    return result, len(unique)
+
+
+def fill_holes(mask):
+    """Set background pixels that cannot reach the border (bed interiors)"""
+    labels, _ = label(~mask, connectivity=4)
+    border = np.unique(np.r_[labels[0], labels[-1], labels[:, 0], labels[:, -1]])
+    return mask | ((labels > 0) & ~np.isin(labels, border))
+
+
+def extent(empty, threshold=INK_THRESHOLD):
+    """(x0, y0, x1, y1) of the drawn content as fractions of the image"""
+    ink = empty.min(axis=2) < threshold
+    rows, cols = np.flatnonzero(ink.any(axis=1)), np.flatnonzero(ink.any(axis=0))
+    if not len(rows):
+        return 0.0, 0.0, 1.0, 1.0
+    h, w = ink.shape
+    return cols[0] / w, rows[0] / h, (cols[-1] + 1) / w, (rows[-1] + 1) / h
+
+
+# ============================================
+# RUN-LENGTH ENCODING
+# ============================================
+
+def rle_encode(mask):
+    """Run lengths of a boolean mask in row-major order, starting with background"""
+    flat = mask.ravel()
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    runs = np.diff(np.r_[0, changes, flat.size])
+    if flat.size and flat[0]:
+        runs = np.r_[0, runs]
+    return runs.astype(np.uint16)
+
+
+def rle_decode(runs, shape=(MASK_SIZE, MASK_SIZE)):
+    values = np.arange(len(runs)) % 2 == 1
+    return np.repeat(values, runs).reshape(shape)
+
+
+# ============================================
+# POLYGONS
+# ============================================
+
+# Moore neighbourhood, clockwise starting west (image coordinates, y down)
+_NEIGHBOURS = ((0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1))
+
+
+def trace_outline(region):
+    """Outer boundary pixels of a single 8-connected region, clockwise, as (row, col)"""
+    rows, cols = np.nonzero(region)
+    start = (int(rows[0]), int(cols[0]))  # topmost, then leftmost: its west neighbour is outside
+    h, w = region.shape
+    outline = [start]
+    current, direction = start, 0
+    while True:
+        for step in range(8):
+            d = (direction + step) % 8
+            y, x = current[0] + _NEIGHBOURS[d][0], current[1] + _NEIGHBOURS[d][1]
+            if 0 <= y < h and 0 <= x < w and region[y, x]:
+                # Resume the scan from the neighbour just before the one found
+                current, direction = (y, x), (d + 5) % 8
+                break
+        else:
+            return outline  # isolated pixel
+        if current == start and len(outline) > 1:
+            return outline
+        outline.append(current)
+
+
+def region_polygons(mask, min_fraction=MIN_REGION_FRACTION, tolerance=SIMPLIFY_TOLERANCE):
+    """[{polygon: [[x, y], ...] in 0..1 of the mask, area, bbox}] per region, largest first"""
+    labels, count = label(mask)
+    if not count:
+        return []
+    areas = np.bincount(labels.ravel(), minlength=count + 1)[1:]
+    size = float(mask.shape[0])
+    regions = []
+    for index in np.argsort(-areas):
+        if areas[index] < min_fraction * mask.size:
+            break
+        outline = np.array(trace_outline(labels == index + 1), dtype=np.float64)
+        # Pixel centres, (row, col) -> (x, y)
+        points = (outline[:, ::-1] + 0.5) / size
+        if len(points) > 2:
+            points = points[rdp_mask(np.vstack([points, points[:1]]), tolerance / size)[:-1]]
+        regions.append({
+            "polygon": np.round(points, 4).tolist(),
+            "area": round(float(areas[index]) / mask.size, 5),
+            "bbox": np.round([*points.min(axis=0), *points.max(axis=0)], 4).tolist()
+        })
+    return regions
+
+
+# ============================================
+# PIPELINE
+# ============================================
+
+def extract(empty_path, filled_path):
+    """(mask, regions, extent) for one corpus pair; regions are relative to the extent"""
+    empty, filled = _pixels(empty_path), _pixels(filled_path)
+    mask = fill_holes(close(downsample(diff_mask(empty, filled))))
+    x0, y0, x1, y1 = extent(empty)
+    regions = region_polygons(mask)
+    for region in regions:
+        polygon = np.array(region["polygon"])
+        polygon = (polygon - [x0, y0]) / [max(x1 - x0, 1e-6), max(y1 - y0, 1e-6)]
+        region["polygon"] = np.round(polygon, 4).tolist()
+        region["bbox"] = np.round([*polygon.min(axis=0), *polygon.max(axis=0)], 4).tolist()
+    return mask, regions, (x0, y0, x1, y1)
+
+
+def _extract_encoded(paths):
+    mask, regions, frame = extract(*paths)
+    return rle_encode(mask), float(mask.mean()), frame, regions
+
+
+def build(corpus_dir=CORPUS_DIR, workers=None):
+    """Extract every pair and write the mask bank into the corpus directory"""
+    empties = sorted(glob.glob(os.path.join(corpus_dir, 'png_cache', 'empty', '*.png')))
+    pairs = [(path, path.replace(f"{os.sep}empty{os.sep}", f"{os.sep}filled{os.sep}")) for path in empties]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_extract_encoded, pairs, chunksize=16))
+
+    index = np.zeros(len(results), dtype=INDEX_DTYPE)
+    offset = 0
+    for row, (runs, planted, frame, _) in enumerate(results):
+        index[row] = (offset, len(runs), planted, *frame)
+        offset += len(runs)
+    np.save(os.path.join(corpus_dir, RUNS_FILE), np.concatenate([runs for runs, *_ in results]))
+    np.save(os.path.join(corpus_dir, INDEX_FILE), index)
+    with open(os.path.join(corpus_dir, REGIONS_FILE), 'w') as f:
+        json.dump([regions for *_, regions in results], f, separators=(',', ':'))
+    return index
+
+
+class MaskBank:
+    """Memory-mapped planting masks and their region polygons, row-aligned with the corpus"""
+
+    def __init__(self, runs, index, regions):
+        self.runs = runs
+        self.index = index
+        self._regions = regions
+
+    @classmethod
+    def load(cls, corpus_dir=CORPUS_DIR):
+        runs = np.load(os.path.join(corpus_dir, RUNS_FILE), mmap_mode='r')
+        index = np.load(os.path.join(corpus_dir, INDEX_FILE), mmap_mode='r')
+        with open(os.path.join(corpus_dir, REGIONS_FILE)) as f:
+            regions = json.load(f)
+        return cls(runs, index, regions)
+
+    def __len__(self):
+        return len(self.index)
+
+    def mask(self, row):
+        entry = self.index[row]
+        return rle_decode(self.runs[entry['offset']:entry['offset'] + entry['count']])
+
+    def planted_fraction(self, row):
+        return float(self.index[row]['planted'])
+
+    def regions(self, row):
+        return self._regions[row]
+
+    def transfer(self, row, bbox):
+        """Region polygons of a pair mapped into bbox = (minX, minY, maxX, maxY) of a user's plot"""
+        min_x, min_y, max_x, max_y = bbox
+        scale = np.array([max_x - min_x, max_y - min_y])
+        transferred = []
+        for region in self._regions[row]:
+            polygon = np.array(region["polygon"]) * scale + [min_x, min_y]
+            transferred.append({
+                "vertices": [{"x": round(x, 3), "y": round(y, 3)} for x, y in polygon.tolist()],
+                "areaFraction": region["area"]
+            })
+        return transferred
+
+
+def plot_bbox(blueprint_data):
+    """(minX, minY, maxX, maxY) of the plot shape in blueprintData, or None"""
+    if isinstance(blueprint_data, str):
+        blueprint_data = json.loads(blueprint_data) if blueprint_data else {}
+    for shape in (blueprint_data or {}).get('shapes', []):
+        if shape.get('layer') == 'plot' and len(shape.get('vertices') or []) >= 3:
+            return vertices_bbox(shape['vertices'])
+    return None
+
+
+_bank = None
+
+
+def get_mask_bank():
+    global _bank
+    if _bank is None:
+        _bank = MaskBank.load()
+    return _bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute planting masks from the corpus pairs")
+    parser.add_argument('command', choices=['build', 'show'])
+    parser.add_argument('row', type=int, nargs='?', help="Pair to render (show)")
+    parser.add_argument('--corpus', default=CORPUS_DIR)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--out', default='planting_mask.png')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        index = build(args.corpus, args.workers)
+        size = sum(os.path.getsize(os.path.join(args.corpus, name)) for name in (RUNS_FILE, INDEX_FILE, REGIONS_FILE))
+        print(f"{len(index)} masks, mean planted fraction {index['planted'].mean():.3f}, bank {size / 1e6:.2f} MB")
+        return
+
+    bank = MaskBank.load(args.corpus)
+    Image.fromarray((~bank.mask(args.row)).astype(np.uint8) * 255).save(args.out)
+    print(f"Pair {args.row}: {len(bank.regions(args.row))} regions, planted {bank.planted_fraction(args.row):.3f}, wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+from botocore.exceptions import ClientError
+from simple_auth import require_auth, respond
+from blueprint_spatial import SpatialIndex, summarize_element
+from repositories import BlueprintRepository
+
+blueprint_repository = BlueprintRepository()
+
+# Parsed indexes cached per warm container, keyed by (blueprintId, updatedAt)
+_index_cache = {}
+INDEX_CACHE_SIZE = 32
+
+
+def load_index(user_id, blueprint_id):
+    """Fetch blueprintData only (no images) and build or reuse its spatial index"""
+    item = blueprint_repository.get(user_id, blueprint_id, fields=['blueprintData', 'updatedAt'])
+    if not item:
+        return None
+
+    cache_key = (blueprint_id, item.get('updatedAt'))
+    index = _index_cache.get(cache_key)
+    if index is None:
+        index = SpatialIndex.from_blueprint(item.get('blueprintData', ''))
+        if len(_index_cache) >= INDEX_CACHE_SIZE:
+            _index_cache.pop(next(iter(_index_cache)))
+        _index_cache[cache_key] = index
+    return index
+
+
+@require_auth
+def handler(event, context):
+    """
+    Answer geometry queries against a stored blueprint without returning it.
+    Query string parameter "op" selects the query:
+      - bbox: minX, minY, maxX, maxY, optional comma-separated kinds
+      - paved-area: total paved area by surface type
+      - nearest-door: x, y
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        blueprint_id = (event.get('pathParameters') or {}).get('blueprintId')
+        if not blueprint_id:
+            return respond(400, {"message": "Blueprint ID is required"})
+
+        params = event.get('queryStringParameters') or {}
+        op = params.get('op')
+
+        try:
+            if op == 'bbox':
+                bbox = tuple(float(params[name]) for name in ('minX', 'minY', 'maxX', 'maxY'))
+            elif op == 'nearest-door':
+                x, y = float(params['x']), float(params['y'])
+            elif op != 'paved-area':
+                return respond(400, {"message": "op must be one of bbox, paved-area, nearest-door"})
+        except (KeyError, ValueError):
+            return respond(400, {"message": f"Missing or invalid coordinates for op {op}"})
+
+        index = load_index(user_id, blueprint_id)
+        if index is None:
+            return respond(404, {"message": "Blueprint not found"})
+
+        if op == 'bbox':
+            kinds = set(params['kinds'].split(',')) if params.get('kinds') else None
+            elements = index.query_bbox(bbox, kinds)
+            return respond(200, {
+                "elements": [summarize_element(el) for el in elements],
+                "count": len(elements)
+            })
+
+        if op == 'paved-area':
+            totals = index.paved_area_by_surface()
+            return respond(200, {
+                "pavedArea": {
+                    kind: {surface: round(area, 3) for surface, area in by_surface.items()}
+                    for kind, by_surface in totals.items()
+                },
+                "totalPavedArea": round(sum(sum(s.values()) for s in totals.values()), 3)
+            })
+
+        door, distance = index.nearest(x, y, kind='door')
+        if door is None:
+            return respond(404, {"message": "Blueprint has no doors"})
+        return respond(200, {
+            "door": summarize_element(door),
+            "distance": round(distance, 3)
+        })
+
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+import time
+from botocore.exceptions import ClientError
+from repositories import RateLimitRepository
+
+# Idle buckets are dropped after this long (they would be full again anyway)
+BUCKET_TTL_SECONDS = 24 * 3600
+# Attempts at the optimistic read-modify-write before treating the key as contended
+MAX_CAS_ATTEMPTS = 3
+
+
+class Policy:
+    """Token bucket: capacity tokens, refilled continuously at refill_per_second"""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+    def refill(self, tokens, elapsed):
+        return min(self.capacity, tokens + elapsed * self.refill_per_second)
+
+    def retry_after(self, tokens):
+        """Seconds until one token is available"""
+        return max(1, int((1 - tokens) / self.refill_per_second + 0.999))
+
+
+def _policy(name, capacity, per_seconds):
+    """Policy from RATE_LIMIT_<NAME>=capacity/seconds, e.g. "5/60" = 5 requests per minute"""
+    value = os.environ.get(f"RATE_LIMIT_{name.upper()}")
+    if value:
+        capacity, per_seconds = (float(part) for part in value.split('/'))
+    return Policy(capacity, capacity / per_seconds)
+
+
+# Per action: the email bucket stops attacks on one account, the IP bucket stops
+# one source spraying many accounts. Both must have a token for the call to go out.
+POLICIES = {
+    'login': {'email': _policy('login_email', 5, 60), 'ip': _policy('login_ip', 30, 60)},
+    'signup': {'email': _policy('signup_email', 3, 3600), 'ip': _policy('signup_ip', 10, 600)},
+    'confirm': {'email': _policy('confirm_email', 10, 600), 'ip': _policy('confirm_ip', 30, 600)},
+    'resend': {'email': _policy('resend_email', 3, 900), 'ip': _policy('resend_ip', 10, 600)},
+    'refresh': {'ip': _policy('refresh_ip', 60, 60)},
+}
+
+
+class MemoryBucketStore:
+    """Process-local buckets for local runs and tests"""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, policy):
+        """Consume one token; returns (allowed, retry_after_seconds)"""
+        with self._lock:
+            now = self.clock()
+            tokens, updated_at = self._buckets.get(key, (policy.capacity, now))
+            tokens = policy.refill(tokens, now - updated_at)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return False, policy.retry_after(tokens)
+            self._buckets[key] = (tokens - 1, now)
+            return True, 0
+
+
+class DynamoBucketStore:
+    """
+    Buckets shared by every Lambda container. Each take is a consistent read
+    plus a conditional write on the previous updatedAt, retried on conflict.
+    """
+
+    def __init__(self, repository=None, clock=time.time):
+        self.repository = repository or RateLimitRepository()
+        self.clock = clock
+
+    def take(self, key, policy):
+        for _ in range(MAX_CAS_ATTEMPTS):
+            now = self.clock()
+            item = self.repository.get(key)
+            previous = item['updatedAt'] if item else None
+            tokens = policy.refill(item['tokens'], now - previous) if item else policy.capacity
+            if tokens < 1:
+                return False, policy.retry_after(tokens)
+            if self.repository.compare_and_set(key, tokens - 1, now, previous, int(now + BUCKET_TTL_SECONDS)):
+                return True, 0
+        # Losing every race means a burst is hitting this exact key
+        return False, 1
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = DynamoBucketStore() if os.environ.get('RATE_LIMIT_TABLE') else MemoryBucketStore()
+    return _store
+
+
+def source_ip(event):
+    """Caller IP from an API Gateway v1/v2 event (or X-Forwarded-For behind a proxy)"""
+    context = event.get('requestContext') or {}
+    ip = (context.get('identity') or {}).get('sourceIp') or (context.get('http') or {}).get('sourceIp')
+    if not ip:
+        headers = event.get('headers') or {}
+        forwarded = headers.get('X-Forwarded-For') or headers.get('x-forwarded-for') or ''
+        ip = forwarded.split(',')[0].strip()
+    return ip or 'unknown'
+
+
+def _email_key(email):
+    # Buckets are keyed by a hash so the table never holds plain addresses
+    return hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()[:32]
+
+
+def check(action, event, email=None, store=None):
+    """
+    Consume a token from each of the action's buckets (IP first, then email).
+    Returns 0 if the request may proceed, otherwise seconds until retry.
+    A limiter outage lets requests through rather than locking users out.
+    """
+    store = store or get_store()
+    identities = {'ip': source_ip(event)}
+    if email:
+        identities['email'] = _email_key(email)
+
+    try:
+        for kind in ('ip', 'email'):
+            policy = POLICIES[action].get(kind)
+            if policy is None or kind not in identities:
+                continue
+            allowed, retry_after = store.take(f"{action}#{kind}#{identities[kind]}", policy)
+            if not allowed:
+                print(f"Rate limited {action} by {kind}, retry after {retry_after}s")
+                return retry_after
+    except ClientError as e:
+        print(f"Warning: rate limiter unavailable, allowing request: {e}")
+    return 0
+
+
+def throttled(respond, retry_after):
+    """429 response built with the handler's own respond(), plus Retry-After"""
+    response = respond(429, {"message": "Too many attempts, please try again later", "retryAfter": retry_after})
+    response["headers"]["Retry-After"] = str(retry_after)
+    return response
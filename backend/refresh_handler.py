@@ -0,0 +1,77 @@
+import json
+import boto3
+import os
+from botocore.exceptions import ClientError
+import rate_limit
+
+client = boto3.client("cognito-idp")
+
+def cors_headers():
+    return {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "OPTIONS,POST,GET",
+        "Access-Control-Allow-Headers": "Content-Type"
+    }
+
+def respond(status, body):
+    return {
+        "statusCode": status,
+        "headers": cors_headers(),
+        "body": json.dumps(body)
+    }
+
+def handler(event, context):
+    """
+    Exchange a refresh token for new ID/access tokens (REFRESH_TOKEN_AUTH).
+    One cheap call instead of a full password login when the ID token expires.
+    Cognito does not rotate the refresh token here, so the client keeps its own.
+    """
+    # Handle CORS preflight
+    if event.get("httpMethod") == "OPTIONS":
+        return respond(200, {"message": "CORS preflight"})
+
+    try:
+        body = json.loads(event.get("body", "{}"))
+    except Exception:
+        return respond(400, {"message": "Invalid JSON body"})
+
+    refresh_token = body.get("refreshToken")
+    if not refresh_token:
+        return respond(400, {"message": "Refresh token is required"})
+
+    retry_after = rate_limit.check("refresh", event)
+    if retry_after:
+        return rate_limit.throttled(respond, retry_after)
+
+    try:
+        response = client.initiate_auth(
+            ClientId=os.environ["CLIENT_ID"],
+            AuthFlow="REFRESH_TOKEN_AUTH",
+            AuthParameters={
+                "REFRESH_TOKEN": refresh_token
+            }
+        )
+
+        tokens = response.get("AuthenticationResult", {})
+        return respond(200, {
+            "message": "Session refreshed",
+            "token": tokens.get("IdToken"),  # Use ID token for authentication
+            "accessToken": tokens.get("AccessToken"),
+            "expiresIn": tokens.get("ExpiresIn")
+        })
+
+    except client.exceptions.NotAuthorizedException:
+        # Expired or revoked refresh token: the client must log in again
+        return respond(401, {"message": "Session expired, please log in again"})
+
+    except client.exceptions.TooManyRequestsException:
+        return rate_limit.throttled(respond, 1)
+
+    except ClientError as e:
+        print("ClientError:", e)
+        error = e.response["Error"]
+        return respond(400, {"message": error.get("Message", "Unknown Cognito error")})
+
+    except Exception as e:
+        print("Unexpected error:", str(e))
+        return respond(500, {"message": "Internal server error"})
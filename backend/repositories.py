@@ -0,0 +1,862 @@
+import base64
+import os
+import threading
+import time
+from decimal import Decimal
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+import garden_cache
+
+# One tuned low-level client per container. Adaptive retries back off on
+# throttling, keep-alive avoids a TLS handshake per call, and the pool is
+# sized for the thread pools used by fan-out handlers.
+CLIENT_CONFIG = Config(
+    retries={
+        'mode': 'adaptive',
+        'max_attempts': int(os.environ.get('DYNAMODB_MAX_ATTEMPTS', '5'))
+    },
+    max_pool_connections=int(os.environ.get('DYNAMODB_MAX_POOL', '32')),
+    connect_timeout=float(os.environ.get('DYNAMODB_CONNECT_TIMEOUT', '2')),
+    read_timeout=float(os.environ.get('DYNAMODB_READ_TIMEOUT', '5')),
+    tcp_keepalive=True
+)
+
+# Point at DynamoDB Local (or another stand-in) when running outside AWS
+ENDPOINT_URL = os.environ.get('DYNAMODB_ENDPOINT_URL') or None
+
+# BatchWriteItem accepts at most 25 requests per call, BatchGetItem 100 keys
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+
+# Counters kept on every garden item (maintained with ADD, never SET by clients)
+GARDEN_COUNTERS = ('blueprintCount', 'plantCount')
+# Optimistic transactions retried this many times before giving up
+MAX_TRANSACTION_ATTEMPTS = 3
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Shared DynamoDB client (created lazily, safe to use from threads)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = boto3.client('dynamodb', config=CLIENT_CONFIG, endpoint_url=ENDPOINT_URL)
+    return _client
+
+
+def set_client(client):
+    """Replace the shared client (local stand-ins and benchmarks)"""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+# ============================================
+# MARSHALLING
+# ============================================
+# Hand-rolled for the attribute types this app stores; much cheaper than the
+# resource layer's generic TypeSerializer/TypeDeserializer round trip.
+
+def serialize(value):
+    """Python value -> DynamoDB attribute value"""
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    if isinstance(value, dict):
+        return {'M': {key: serialize(inner) for key, inner in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [serialize(inner) for inner in value]}
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if isinstance(value, set):
+        if all(isinstance(inner, str) for inner in value):
+            return {'SS': sorted(value)}
+        return {'NS': [str(inner) for inner in value]}
+    raise TypeError(f"Cannot store value of type {type(value).__name__}")
+
+
+def _number(text):
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+def deserialize(attribute):
+    """DynamoDB attribute value -> Python value (numbers become int/float)"""
+    (kind, value), = attribute.items()
+    if kind == 'S':
+        return value
+    if kind == 'N':
+        return _number(value)
+    if kind == 'BOOL':
+        return value
+    if kind == 'NULL':
+        return None
+    if kind == 'M':
+        return {key: deserialize(inner) for key, inner in value.items()}
+    if kind == 'L':
+        return [deserialize(inner) for inner in value]
+    if kind == 'B':
+        return value if isinstance(value, bytes) else base64.b64decode(value)
+    if kind == 'SS':
+        return set(value)
+    if kind == 'NS':
+        return {_number(inner) for inner in value}
+    raise TypeError(f"Unsupported attribute type {kind}")
+
+
+def to_item(item):
+    return {key: serialize(value) for key, value in item.items()}
+
+
+def from_item(item):
+    return {key: deserialize(value) for key, value in item.items()} if item else None
+
+
+def projection(fields):
+    """ProjectionExpression with every attribute aliased (avoids reserved words)"""
+    names = {f'#p{i}': field for i, field in enumerate(fields)}
+    return ', '.join(names), names
+
+
+class UpdateBuilder:
+    """Accumulates SET/REMOVE/ADD clauses with generated placeholder names"""
+
+    def __init__(self):
+        self.names = {}
+        self.values = {}
+        self._clauses = {'SET': [], 'REMOVE': [], 'ADD': []}
+
+    def name(self, attribute):
+        placeholder = f'#a{len(self.names)}'
+        self.names[placeholder] = attribute
+        return placeholder
+
+    def value(self, value):
+        placeholder = f':v{len(self.values)}'
+        self.values[placeholder] = serialize(value)
+        return placeholder
+
+    def set(self, fields):
+        for attribute, value in fields.items():
+            self._clauses['SET'].append(f"{self.name(attribute)} = {self.value(value)}")
+        return self
+
+    def remove(self, attributes):
+        for attribute in attributes:
+            self._clauses['REMOVE'].append(self.name(attribute))
+        return self
+
+    def add(self, fields):
+        for attribute, value in fields.items():
+            self._clauses['ADD'].append(f"{self.name(attribute)} {self.value(value)}")
+        return self
+
+    def expression(self):
+        return ' '.join(f"{clause} {', '.join(parts)}" for clause, parts in self._clauses.items() if parts)
+
+    def params(self, condition=None):
+        params = {
+            'UpdateExpression': self.expression(),
+            'ExpressionAttributeNames': self.names
+        }
+        if self.values:
+            params['ExpressionAttributeValues'] = self.values
+        if condition:
+            params['ConditionExpression'] = condition
+        return params
+
+
+def is_condition_failure(error):
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+def unchanged_condition(builder, attribute, expected):
+    """Condition that an attribute still holds a value read earlier (None = absent)"""
+    if expected is None:
+        return f"attribute_not_exists({builder.name(attribute)})"
+    return f"{builder.name(attribute)} = {builder.value(expected)}"
+
+
+def cancellation_codes(error):
+    """Per-item reasons of a cancelled transaction (None for items that passed)"""
+    if error.response['Error']['Code'] != 'TransactionCanceledException':
+        return []
+    return [reason.get('Code') if reason.get('Code') != 'None' else None
+            for reason in error.response.get('CancellationReasons', [])]
+
+
+def query_all(**kwargs):
+    """Run a Query to completion, following LastEvaluatedKey"""
+    client = get_client()
+    items = []
+    while True:
+        response = client.query(**kwargs)
+        items.extend(from_item(item) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def batch_write(table_name, puts=(), deletes=()):
+    """Put items and delete keys in batches of 25, resubmitting unprocessed requests"""
+    client = get_client()
+    requests = ([{'PutRequest': {'Item': to_item(item)}} for item in puts]
+                + [{'DeleteRequest': {'Key': to_item(key)}} for key in deletes])
+    for start in range(0, len(requests), BATCH_WRITE_SIZE):
+        pending = {table_name: requests[start:start + BATCH_WRITE_SIZE]}
+        attempt = 0
+        while pending:
+            if attempt:
+                time.sleep(min(0.05 * 2 ** attempt, 2))
+            pending = client.batch_write_item(RequestItems=pending).get('UnprocessedItems') or {}
+            attempt += 1
+
+
+def batch_delete(table_name, keys):
+    batch_write(table_name, deletes=keys)
+
+
+def batch_get(table_name, keys, fields=None):
+    """Items for keys in batches of 100, resubmitting unprocessed keys (any order, missing keys skipped)"""
+    client = get_client()
+    request = {}
+    if fields:
+        request['ProjectionExpression'], request['ExpressionAttributeNames'] = projection(fields)
+    items = []
+    for start in range(0, len(keys), BATCH_GET_SIZE):
+        pending = {table_name: {**request, 'Keys': [to_item(key) for key in keys[start:start + BATCH_GET_SIZE]]}}
+        attempt = 0
+        while pending:
+            if attempt:
+                time.sleep(min(0.05 * 2 ** attempt, 2))
+            response = client.batch_get_item(RequestItems=pending)
+            items.extend(from_item(item) for item in response.get('Responses', {}).get(table_name, []))
+            pending = response.get('UnprocessedKeys') or {}
+            attempt += 1
+    return items
+
+
+# ============================================
+# GARDENS
+# ============================================
+
+class GardenRepository:
+    """Garden rows keyed by (userId, gardenId), with a read-through container cache"""
+
+    def __init__(self, table_name=None, cache=None):
+        self.table_name = table_name or os.environ['GARDENS_TABLE']
+        # The shared cache is only valid for the default table
+        if cache is None:
+            cache = garden_cache.garden_cache if self.table_name == os.environ.get('GARDENS_TABLE') else garden_cache.TTLCache()
+        self.cache = cache
+
+    def _key(self, user_id, garden_id):
+        return {'userId': {'S': user_id}, 'gardenId': {'S': garden_id}}
+
+    def get(self, user_id, garden_id):
+        def load():
+            response = get_client().get_item(TableName=self.table_name, Key=self._key(user_id, garden_id))
+            return from_item(response.get('Item'))
+        return garden_cache.get_garden(user_id, garden_id, load, cache=self.cache)
+
+    def list_for_user(self, user_id, cached=True):
+        """All of a user's gardens; cached=False always queries the table"""
+        def load():
+            return query_all(
+                TableName=self.table_name,
+                KeyConditionExpression='userId = :userId',
+                ExpressionAttributeValues={':userId': {'S': user_id}}
+            )
+        if not cached:
+            return load()
+        return garden_cache.list_gardens(user_id, load, cache=self.cache)
+
+    def near_prefix(self, user_id, prefix):
+        """Gardens whose geohash starts with prefix, from the UserGeohashIndex projection"""
+        return query_all(
+            TableName=self.table_name,
+            IndexName='UserGeohashIndex',
+            KeyConditionExpression='userId = :userId AND begins_with(geohash, :prefix)',
+            ExpressionAttributeValues={
+                ':userId': {'S': user_id},
+                ':prefix': {'S': prefix}
+            }
+        )
+
+    def read(self, user_id, garden_id):
+        """Strongly consistent read that bypasses the cache"""
+        response = get_client().get_item(
+            TableName=self.table_name,
+            Key=self._key(user_id, garden_id),
+            ConsistentRead=True
+        )
+        return from_item(response.get('Item'))
+
+    def invalidate(self, user_id, garden_id):
+        garden_cache.invalidate_garden(user_id, garden_id, cache=self.cache)
+
+    def put(self, item):
+        get_client().put_item(TableName=self.table_name, Item=to_item(item))
+        self.invalidate(item['userId'], item['gardenId'])
+
+    def create(self, item, also=()):
+        """Write a new garden together with related TransactItems (e.g. the user summary)"""
+        get_client().transact_write_items(TransactItems=[
+            {
+                'Put': {
+                    'TableName': self.table_name,
+                    'Item': to_item(item),
+                    'ConditionExpression': 'attribute_not_exists(gardenId)'
+                }
+            },
+            *also
+        ])
+        self.invalidate(item['userId'], item['gardenId'])
+
+    def counter_update(self, user_id, garden_id, add):
+        """TransactItems entry adding to a garden's counters; fails if the garden is gone"""
+        builder = UpdateBuilder().add(add)
+        return {
+            'Update': {
+                'TableName': self.table_name,
+                'Key': self._key(user_id, garden_id),
+                **builder.params(condition='attribute_exists(gardenId)')
+            }
+        }
+
+    def set_counters(self, user_id, garden_id, counters, expected):
+        """
+        Overwrite counters on an existing garden, but only if they still hold
+        the expected values (None = attribute absent). Returns False when a
+        concurrent ADD changed them in between.
+        """
+        builder = UpdateBuilder().set(counters)
+        conditions = ['attribute_exists(gardenId)'] + [
+            unchanged_condition(builder, counter, expected.get(counter)) for counter in counters
+        ]
+        try:
+            get_client().update_item(
+                TableName=self.table_name,
+                Key=self._key(user_id, garden_id),
+                **builder.params(condition=' AND '.join(conditions))
+            )
+        except ClientError as e:
+            if is_condition_failure(e):
+                return False
+            raise
+        finally:
+            self.invalidate(user_id, garden_id)
+        return True
+
+    def update(self, user_id, garden_id, fields, remove=(), add=None, also=()):
+        """
+        Update an existing garden; returns the new item, or None if it does not
+        exist. Negative counter deltas only apply if the counter stays >= 0,
+        so None is also returned for an update that would underflow. With also,
+        the update and those TransactItems are written in one transaction.
+        """
+        builder = UpdateBuilder().set(fields).remove(remove).add(add or {})
+        conditions = ['attribute_exists(gardenId)']
+        for counter, delta in (add or {}).items():
+            if delta < 0:
+                conditions.append(f"{builder.name(counter)} >= {builder.value(-delta)}")
+        condition = ' AND '.join(conditions)
+
+        try:
+            if not also:
+                response = get_client().update_item(
+                    TableName=self.table_name,
+                    Key=self._key(user_id, garden_id),
+                    ReturnValues='ALL_NEW',
+                    **builder.params(condition=condition)
+                )
+                return from_item(response.get('Attributes'))
+
+            get_client().transact_write_items(TransactItems=[
+                {
+                    'Update': {
+                        'TableName': self.table_name,
+                        'Key': self._key(user_id, garden_id),
+                        **builder.params(condition=condition)
+                    }
+                },
+                *also
+            ])
+        except ClientError as e:
+            if is_condition_failure(e) or (cancellation_codes(e)[:1] == ['ConditionalCheckFailed']):
+                return None
+            raise
+        finally:
+            self.invalidate(user_id, garden_id)
+        # Transactions do not return the new item
+        return self.read(user_id, garden_id)
+
+    def delete(self, user_id, garden_id, related=None):
+        """
+        Delete a garden; returns the deleted item, or None if it did not exist.
+        related(garden) may return TransactItems to write with the delete (e.g.
+        subtracting the garden's counters from the user summary). The delete is
+        then conditioned on the counters read, and retried if they changed.
+        """
+        if related is None:
+            response = get_client().delete_item(
+                TableName=self.table_name,
+                Key=self._key(user_id, garden_id),
+                ReturnValues='ALL_OLD'
+            )
+            self.invalidate(user_id, garden_id)
+            return from_item(response.get('Attributes'))
+
+        try:
+            for _ in range(MAX_TRANSACTION_ATTEMPTS):
+                garden = self.read(user_id, garden_id)
+                if not garden:
+                    return None
+
+                builder = UpdateBuilder()
+                conditions = ['attribute_exists(gardenId)']
+                for counter in GARDEN_COUNTERS:
+                    name = builder.name(counter)
+                    if counter in garden:
+                        conditions.append(f"{name} = {builder.value(garden[counter])}")
+                    else:
+                        conditions.append(f"attribute_not_exists({name})")
+                delete = {
+                    'TableName': self.table_name,
+                    'Key': self._key(user_id, garden_id),
+                    'ConditionExpression': ' AND '.join(conditions),
+                    'ExpressionAttributeNames': builder.names
+                }
+                if builder.values:
+                    delete['ExpressionAttributeValues'] = builder.values
+
+                try:
+                    get_client().transact_write_items(TransactItems=[{'Delete': delete}, *related(garden)])
+                    return garden
+                except ClientError as e:
+                    if cancellation_codes(e)[:1] != ['ConditionalCheckFailed']:
+                        raise
+                    # A counter moved (or the garden went) between the read and the delete
+            raise RuntimeError(f"Garden {garden_id} kept changing during delete")
+        finally:
+            self.invalidate(user_id, garden_id)
+
+
+# ============================================
+# BLUEPRINTS
+# ============================================
+
+class BlueprintRepository:
+    """Blueprint items keyed by (userId, blueprintId) plus their version log"""
+
+    def __init__(self, table_name=None, versions_table_name=None):
+        self.table_name = table_name or os.environ['BLUEPRINTS_TABLE']
+        self.versions_table_name = versions_table_name or os.environ.get('BLUEPRINT_VERSIONS_TABLE')
+
+    def _key(self, user_id, blueprint_id):
+        return {'userId': {'S': user_id}, 'blueprintId': {'S': blueprint_id}}
+
+    def get(self, user_id, blueprint_id, fields=None):
+        params = {'TableName': self.table_name, 'Key': self._key(user_id, blueprint_id)}
+        if fields:
+            params['ProjectionExpression'], params['ExpressionAttributeNames'] = projection(fields)
+        return from_item(get_client().get_item(**params).get('Item'))
+
+    def get_many(self, keys, fields=None):
+        """Blueprints for (userId, blueprintId) pairs; missing ones are left out"""
+        keys = [{'userId': user_id, 'blueprintId': blueprint_id} for user_id, blueprint_id in keys]
+        return batch_get(self.table_name, keys, fields)
+
+    def list_for_user(self, user_id, fields):
+        expression, names = projection(fields)
+        return query_all(
+            TableName=self.table_name,
+            KeyConditionExpression='userId = :userId',
+            ExpressionAttributeValues={':userId': {'S': user_id}},
+            ProjectionExpression=expression,
+            ExpressionAttributeNames=names
+        )
+
+    def latest_key_for_garden(self, user_id, garden_id):
+        """
+        (userId, blueprintId) of the user's newest blueprint for a garden.
+        GardenUserUpdatedIndex is KEYS_ONLY and sorted by "<userId>#<updatedAt>",
+        so this reads a single small index entry. Misses fall back to
+        GardenIdIndex until USER_UPDATED_AT_BACKFILLED=1 marks the backfill done.
+        """
+        client = get_client()
+        response = client.query(
+            TableName=self.table_name,
+            IndexName='GardenUserUpdatedIndex',
+            KeyConditionExpression='gardenId = :gardenId AND begins_with(userUpdatedAt, :userPrefix)',
+            ExpressionAttributeValues={
+                ':gardenId': {'S': garden_id},
+                ':userPrefix': {'S': f"{user_id}#"}
+            },
+            ScanIndexForward=False,
+            Limit=1
+        )
+        items = response.get('Items', [])
+        if items:
+            return items[0]['userId']['S'], items[0]['blueprintId']['S']
+        if os.environ.get('USER_UPDATED_AT_BACKFILLED') == '1':
+            return None
+
+        # Until `migrate.py user-updated-at` has run, items written before
+        # userUpdatedAt existed are only in GardenIdIndex
+        items = query_all(
+            TableName=self.table_name,
+            IndexName='GardenIdIndex',
+            KeyConditionExpression='gardenId = :gardenId',
+            FilterExpression='userId = :userId',
+            ProjectionExpression='userId, blueprintId, updatedAt',
+            ExpressionAttributeValues={
+                ':gardenId': {'S': garden_id},
+                ':userId': {'S': user_id}
+            }
+        )
+        if items:
+            print(f"Garden {garden_id} has blueprints missing userUpdatedAt, used GardenIdIndex")
+            latest = max(items, key=lambda item: item.get('updatedAt', ''))
+            return latest['userId'], latest['blueprintId']
+        return None
+
+    def latest_for_garden(self, user_id, garden_id, fields=None):
+        key = self.latest_key_for_garden(user_id, garden_id)
+        return self.get(key[0], key[1], fields) if key else None
+
+    def keys_for_garden(self, user_id, garden_id):
+        """Blueprint IDs the user has for a garden"""
+        items = query_all(
+            TableName=self.table_name,
+            IndexName='GardenIdIndex',
+            KeyConditionExpression='gardenId = :gardenId',
+            FilterExpression='userId = :userId',
+            ProjectionExpression='blueprintId',
+            ExpressionAttributeValues={
+                ':gardenId': {'S': garden_id},
+                ':userId': {'S': user_id}
+            }
+        )
+        return [item['blueprintId'] for item in items]
+
+    def find_by_image_hash(self, user_id, image_phash):
+        """
+        The user's blueprints whose PNG has exactly this pHash (UserImageHashIndex),
+        or [] while the index is not deployed yet
+        """
+        try:
+            return query_all(
+                TableName=self.table_name,
+                IndexName='UserImageHashIndex',
+                KeyConditionExpression='userId = :userId AND imagePHash = :hash',
+                ExpressionAttributeValues={
+                    ':userId': {'S': user_id},
+                    ':hash': {'S': image_phash}
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ValidationException':
+                raise
+            print(f"Warning: UserImageHashIndex not available, skipping duplicate lookup: {e}")
+            return []
+
+    def create(self, item, version_item, also=()):
+        """
+        Write a new blueprint and its first version entry in one transaction,
+        along with any related TransactItems (garden counter, user summary)
+        """
+        get_client().transact_write_items(TransactItems=[
+            {'Put': {'TableName': self.table_name, 'Item': to_item(item)}},
+            {'Put': {'TableName': self.versions_table_name, 'Item': to_item(version_item)}},
+            *also
+        ])
+
+    def save(self, user_id, blueprint_id, fields, remove, expected_version, version_item, also=()):
+        """
+        Update a blueprint and append its version entry atomically (plus any
+        related TransactItems). The update only applies if the stored version
+        still equals expected_version (0 for items that predate versioning);
+        otherwise TransactionCanceledException is raised.
+        """
+        builder = UpdateBuilder().set(fields).remove(remove)
+        version_name = builder.name('version')
+        if expected_version:
+            condition = f"attribute_exists(blueprintId) AND {version_name} = {builder.value(expected_version)}"
+        else:
+            condition = f"attribute_exists(blueprintId) AND attribute_not_exists({version_name})"
+
+        get_client().transact_write_items(TransactItems=[
+            {
+                'Update': {
+                    'TableName': self.table_name,
+                    'Key': self._key(user_id, blueprint_id),
+                    **builder.params(condition=condition)
+                }
+            },
+            {
+                'Put': {
+                    'TableName': self.versions_table_name,
+                    'Item': to_item(version_item),
+                    'ConditionExpression': 'attribute_not_exists(blueprintKey)'
+                }
+            },
+            *also
+        ])
+
+    def set_if_version(self, user_id, blueprint_id, fields, version):
+        """
+        Set derived attributes (caches) only if the blueprint is still at
+        version. Returns False if it changed in the meantime.
+        """
+        builder = UpdateBuilder().set(fields)
+        version_name = builder.name('version')
+        condition = (f"attribute_exists(blueprintId) AND "
+                     f"(attribute_not_exists({version_name}) OR {version_name} = {builder.value(version)})")
+        try:
+            get_client().update_item(
+                TableName=self.table_name,
+                Key=self._key(user_id, blueprint_id),
+                **builder.params(condition=condition)
+            )
+        except ClientError as e:
+            if is_condition_failure(e):
+                return False
+            raise
+        return True
+
+    def delete(self, user_id, blueprint_id):
+        """Delete a blueprint item; returns True if it existed"""
+        response = get_client().delete_item(
+            TableName=self.table_name,
+            Key=self._key(user_id, blueprint_id),
+            ReturnValues='ALL_OLD'
+        )
+        return 'Attributes' in response
+
+    # Version log: blueprintKey = "<userId>#<blueprintId>", version (N)
+
+    def list_versions(self, history_key):
+        """Version metadata, newest first, without payloads"""
+        expression, names = projection(['version', 'kind', 'snapshotVersion', 'sizeBytes', 'createdAt'])
+        return query_all(
+            TableName=self.versions_table_name,
+            KeyConditionExpression='blueprintKey = :key',
+            ExpressionAttributeValues={':key': {'S': history_key}},
+            ProjectionExpression=expression,
+            ExpressionAttributeNames=names,
+            ScanIndexForward=False
+        )
+
+    def get_version(self, history_key, version, fields=None):
+        params = {
+            'TableName': self.versions_table_name,
+            'Key': {'blueprintKey': {'S': history_key}, 'version': {'N': str(version)}}
+        }
+        if fields:
+            params['ProjectionExpression'], params['ExpressionAttributeNames'] = projection(fields)
+        return from_item(get_client().get_item(**params).get('Item'))
+
+    def version_range(self, history_key, start, end):
+        """Version entries start..end inclusive, oldest first"""
+        return query_all(
+            TableName=self.versions_table_name,
+            KeyConditionExpression='blueprintKey = :key AND #version BETWEEN :start AND :end',
+            ExpressionAttributeNames={'#version': 'version'},
+            ExpressionAttributeValues={
+                ':key': {'S': history_key},
+                ':start': {'N': str(start)},
+                ':end': {'N': str(end)}
+            }
+        )
+
+    def delete_versions(self, history_key):
+        """Remove a blueprint's whole version log; returns the number of entries"""
+        entries = query_all(
+            TableName=self.versions_table_name,
+            KeyConditionExpression='blueprintKey = :key',
+            ExpressionAttributeValues={':key': {'S': history_key}},
+            ProjectionExpression='blueprintKey, #version',
+            ExpressionAttributeNames={'#version': 'version'}
+        )
+        batch_delete(self.versions_table_name, entries)
+        return len(entries)
+
+
+# ============================================
+# SEARCH INDEX
+# ============================================
+
+class SearchIndexRepository:
+    """
+    Per-user inverted index. Postings are keyed by userToken = "<userId>#<token>"
+    and docKey = "<docType>#<docId>"; each document also has a manifest item
+    listing its tokens so stale postings can be removed on the next write.
+    """
+
+    MANIFEST_TOKEN = '~manifest'
+
+    def __init__(self, table_name=None):
+        self.table_name = table_name or os.environ['SEARCH_INDEX_TABLE']
+
+    def postings(self, user_id, token):
+        return query_all(
+            TableName=self.table_name,
+            KeyConditionExpression='userToken = :key',
+            ExpressionAttributeValues={':key': {'S': f"{user_id}#{token}"}}
+        )
+
+    def manifest_key(self, user_id, doc_key):
+        return {'userToken': f"{user_id}#{self.MANIFEST_TOKEN}", 'docKey': doc_key}
+
+    def get_manifest(self, user_id, doc_key):
+        """Tokens currently indexed for a document (empty set if none)"""
+        response = get_client().get_item(
+            TableName=self.table_name,
+            Key=to_item(self.manifest_key(user_id, doc_key)),
+            ProjectionExpression='tokens'
+        )
+        item = from_item(response.get('Item')) or {}
+        return item.get('tokens', set())
+
+    def write(self, puts=(), deletes=()):
+        batch_write(self.table_name, puts, deletes)
+
+
+# ============================================
+# GEOCODE CACHE
+# ============================================
+
+class GeocodeCacheRepository:
+    """Persistent geocoding results keyed by normalized address (or rounded coordinates)"""
+
+    def __init__(self, table_name=None):
+        self.table_name = table_name or os.environ['GEOCODE_CACHE_TABLE']
+
+    def get(self, cache_key):
+        response = get_client().get_item(
+            TableName=self.table_name,
+            Key={'cacheKey': {'S': cache_key}}
+        )
+        item = from_item(response.get('Item'))
+        # Expired rows linger until DynamoDB's TTL sweep removes them
+        if not item or item.get('expiresAt', 0) < time.time():
+            return None
+        return item
+
+    def put(self, cache_key, result, ttl_seconds):
+        item = {'cacheKey': cache_key, 'expiresAt': int(time.time() + ttl_seconds)}
+        if result is not None:
+            item['result'] = result
+        get_client().put_item(TableName=self.table_name, Item=to_item(item))
+
+
+# ============================================
+# RATE LIMITS
+# ============================================
+
+class RateLimitRepository:
+    """Token-bucket state per key; idle buckets expire via the table's TTL"""
+
+    def __init__(self, table_name=None):
+        self.table_name = table_name or os.environ['RATE_LIMIT_TABLE']
+
+    def get(self, bucket_key):
+        response = get_client().get_item(
+            TableName=self.table_name,
+            Key={'bucketKey': {'S': bucket_key}},
+            ConsistentRead=True
+        )
+        return from_item(response.get('Item'))
+
+    def compare_and_set(self, bucket_key, tokens, updated_at, previous_updated_at, expires_at):
+        """
+        Store new bucket state only if nobody else wrote it since it was read
+        (previous_updated_at None means the bucket did not exist). Returns bool.
+        """
+        builder = UpdateBuilder().set({'tokens': tokens, 'updatedAt': updated_at, 'expiresAt': expires_at})
+        if previous_updated_at is None:
+            condition = 'attribute_not_exists(bucketKey)'
+        else:
+            condition = f"{builder.name('updatedAt')} = {builder.value(previous_updated_at)}"
+        try:
+            get_client().update_item(
+                TableName=self.table_name,
+                Key={'bucketKey': {'S': bucket_key}},
+                **builder.params(condition=condition)
+            )
+        except ClientError as e:
+            if is_condition_failure(e):
+                return False
+            raise
+        return True
+
+
+# ============================================
+# USER SUMMARY
+# ============================================
+
+class SummaryRepository:
+    """
+    One item per user with account totals (gardenCount, blueprintCount,
+    plantCount) and lastEditedAt. Counters only change through ADD deltas
+    written in the same transaction as the garden or blueprint write.
+    """
+
+    COUNTERS = ('gardenCount', 'blueprintCount', 'plantCount')
+
+    def __init__(self, table_name=None):
+        self.table_name = table_name or os.environ['USER_SUMMARY_TABLE']
+
+    def _key(self, user_id):
+        return {'userId': {'S': user_id}}
+
+    def get(self, user_id):
+        response = get_client().get_item(TableName=self.table_name, Key=self._key(user_id))
+        return from_item(response.get('Item'))
+
+    def change(self, user_id, add=None, fields=None):
+        """TransactItems entry applying counter deltas (ADD starts missing counters at 0)"""
+        builder = UpdateBuilder().set(fields or {}).add({key: value for key, value in (add or {}).items() if value})
+        return {
+            'Update': {
+                'TableName': self.table_name,
+                'Key': self._key(user_id),
+                **builder.params()
+            }
+        }
+
+    def initialize(self, user_id, fields, expected, overwrite=False):
+        """
+        Store recounted totals, marking the item with countedAt. The write only
+        applies if the counters still hold the expected values read before
+        counting, so deltas committed meanwhile are never overwritten. Unless
+        overwrite, only the first recount wins. Returns False if either
+        condition fails.
+        """
+        builder = UpdateBuilder().set(fields)
+        conditions = [unchanged_condition(builder, counter, expected.get(counter)) for counter in self.COUNTERS]
+        if not overwrite:
+            conditions.append(f"attribute_not_exists({builder.name('countedAt')})")
+        condition = ' AND '.join(conditions)
+        try:
+            get_client().update_item(
+                TableName=self.table_name,
+                Key=self._key(user_id),
+                **builder.params(condition=condition)
+            )
+        except ClientError as e:
+            if is_condition_failure(e):
+                return False
+            raise
+        return True
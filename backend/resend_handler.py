@@ -1,6 +1,7 @@
 import json
 import boto3
 import os
+import rate_limit
 
 client = boto3.client("cognito-idp")
 
@@ -31,6 +32,11 @@ def handler(event, context):
             "body": json.dumps({"message": "Email is required"})
         }
 
+    # Reject bursts before they reach Cognito and use up the account's quota
+    retry_after = rate_limit.check("resend", event, email)
+    if retry_after:
+        return rate_limit.throttled(respond, retry_after)
+
     try:
         client.resend_confirmation_code(
             ClientId=os.environ["CLIENT_ID"],
@@ -54,6 +60,8 @@ def handler(event, context):
             "headers": cors_headers(),
             "body": json.dumps({"message": "User not found"})
         }
+    except client.exceptions.TooManyRequestsException:
+        return rate_limit.throttled(respond, 1)
     except Exception as e:
         return {
             "statusCode": 500,
@@ -61,6 +69,13 @@ def handler(event, context):
             "body": json.dumps({"message": "Internal server error"})
         }
 
+def respond(status, body):
+    return {
+        "statusCode": status,
+        "headers": cors_headers(),
+        "body": json.dumps(body)
+    }
+
 def cors_headers():
     return {
         "Access-Control-Allow-Origin": "*",
@@ -0,0 +1,45 @@
+from botocore.exceptions import ClientError
+from simple_auth import require_auth_async, respond
+from search_index import FIELD_WEIGHTS, search
+
+MAX_LIMIT = 50
+
+
+@require_auth_async
+async def handler(event, context):
+    """
+    Search the user's gardens (name, location, description) and blueprints
+    (name) by word prefix, e.g. GET /gardens/search?q=rose back
+    Optional: type=garden|blueprint, limit (default 20, max 50)
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        params = event.get('queryStringParameters') or {}
+        query = (params.get('q') or '').strip()
+        if not query:
+            return respond(400, {"message": "Query parameter q is required"})
+
+        doc_type = params.get('type')
+        if doc_type and doc_type not in FIELD_WEIGHTS:
+            return respond(400, {"message": "type must be garden or blueprint"})
+
+        try:
+            limit = max(1, min(int(params.get('limit', 20)), MAX_LIMIT))
+        except ValueError:
+            return respond(400, {"message": "limit must be an integer"})
+
+        results = await search(user_id, query, {doc_type} if doc_type else None, limit)
+        return respond(200, {
+            "query": query,
+            "results": results,
+            "count": len(results)
+        })
+
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
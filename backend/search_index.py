@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import re
+import unicodedata
+from botocore.exceptions import ClientError
+from repositories import BlueprintRepository, GardenRepository, SearchIndexRepository
+from async_support import AsyncRepository
+
+# Every word is indexed under its prefixes (edge n-grams) of MIN_GRAM..MAX_GRAM
+# characters, so a prefix query is a single-key lookup per query term
+MIN_GRAM = 2
+MAX_GRAM = 15
+# Long descriptions only contribute their first words
+MAX_WORDS_PER_FIELD = 64
+
+# Field weights per document type; whole-word matches count double
+FIELD_WEIGHTS = {
+    'garden': {'name': 3, 'location': 2, 'description': 1},
+    'blueprint': {'name': 3},
+}
+
+_repository = None
+
+
+def get_repository():
+    global _repository
+    if _repository is None:
+        _repository = SearchIndexRepository()
+    return _repository
+
+
+def normalize(text):
+    """Lowercase and strip accents so "Jardín" matches "jardin" """
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def words(text):
+    return re.findall(r'[a-z0-9]+', normalize(text))
+
+
+def query_terms(query):
+    """Distinct query words, cut to MAX_GRAM; words shorter than MIN_GRAM are dropped"""
+    terms = []
+    for word in words(query):
+        term = word[:MAX_GRAM]
+        if len(term) >= MIN_GRAM and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_postings(doc_type, fields):
+    """{token: score} for a document; score is the best field weight, doubled for whole words"""
+    scores = {}
+    for field, weight in FIELD_WEIGHTS[doc_type].items():
+        for word in words(fields.get(field))[:MAX_WORDS_PER_FIELD]:
+            for length in range(MIN_GRAM, min(len(word), MAX_GRAM) + 1):
+                token = word[:length]
+                score = weight * 2 if length == len(word) else weight
+                scores[token] = max(scores.get(token, 0), score)
+    return scores
+
+
+def doc_key(doc_type, doc_id):
+    return f"{doc_type}#{doc_id}"
+
+
+def index_document(user_id, doc_type, doc_id, fields, garden_id=None, repository=None):
+    """
+    Bring the postings for one document up to date. Only tokens the document
+    lost are deleted; current postings are rewritten so titles stay fresh.
+    """
+    repository = repository or get_repository()
+    key = doc_key(doc_type, doc_id)
+    scores = build_postings(doc_type, fields)
+    old_tokens = repository.get_manifest(user_id, key)
+
+    posting = {
+        'docKey': key,
+        'docType': doc_type,
+        'docId': doc_id,
+        'title': fields.get('name') or '',
+    }
+    if doc_type == 'garden' and fields.get('location'):
+        posting['subtitle'] = fields['location']
+    if garden_id:
+        posting['gardenId'] = garden_id
+
+    puts = [{**posting, 'userToken': f"{user_id}#{token}", 'score': score} for token, score in scores.items()]
+    deletes = [{'userToken': f"{user_id}#{token}", 'docKey': key} for token in old_tokens - set(scores)]
+    manifest = repository.manifest_key(user_id, key)
+    if scores:
+        puts.append({**manifest, 'tokens': set(scores)})
+    elif old_tokens:
+        deletes.append(manifest)
+    repository.write(puts, deletes)
+
+
+def remove_document(user_id, doc_type, doc_id, repository=None):
+    repository = repository or get_repository()
+    key = doc_key(doc_type, doc_id)
+    old_tokens = repository.get_manifest(user_id, key)
+    if old_tokens:
+        deletes = [{'userToken': f"{user_id}#{token}", 'docKey': key} for token in old_tokens]
+        repository.write(deletes=deletes + [repository.manifest_key(user_id, key)])
+
+
+def _best_effort(action, *args):
+    # The index can be rebuilt from the tables, so a failed update must not fail the write
+    try:
+        action(*args)
+    except ClientError as e:
+        print(f"Warning: search index update failed for {args[1:3]}: {e}")
+
+
+def index_garden(garden):
+    _best_effort(index_document, garden['userId'], 'garden', garden['gardenId'], garden)
+
+
+def remove_garden(user_id, garden_id):
+    _best_effort(remove_document, user_id, 'garden', garden_id)
+
+
+def index_blueprint(blueprint):
+    _best_effort(index_document, blueprint['userId'], 'blueprint', blueprint['blueprintId'],
+                 blueprint, blueprint.get('gardenId'))
+
+
+def remove_blueprint(user_id, blueprint_id):
+    _best_effort(remove_document, user_id, 'blueprint', blueprint_id)
+
+
+async def search(user_id, query, doc_types=None, limit=20, repository=None):
+    """
+    Documents matching every query term as a word prefix, best score first.
+    Each term is one Query against the index; terms are looked up concurrently.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    repository = AsyncRepository(repository or get_repository())
+    postings_per_term = await asyncio.gather(*(repository.postings(user_id, term) for term in terms))
+
+    matches = None
+    for postings in postings_per_term:
+        by_doc = {posting['docKey']: posting for posting in postings
+                  if not doc_types or posting['docType'] in doc_types}
+        if matches is None:
+            matches = {key: (posting, posting['score']) for key, posting in by_doc.items()}
+        else:
+            matches = {key: (posting, score + by_doc[key]['score'])
+                       for key, (posting, score) in matches.items() if key in by_doc}
+        if not matches:
+            return []
+
+    results = []
+    for posting, score in matches.values():
+        result = {
+            'type': posting['docType'],
+            'id': posting['docId'],
+            'name': posting['title'],
+            'score': score
+        }
+        for field in ('subtitle', 'gardenId'):
+            if posting.get(field):
+                result[field] = posting[field]
+        results.append(result)
+    results.sort(key=lambda result: (-result['score'], result['name'].lower()))
+    return results[:limit]
+
+
+def rebuild_user(user_id):
+    """Re-index every garden and blueprint a user owns"""
+    gardens = GardenRepository().list_for_user(user_id)
+    blueprints = BlueprintRepository().list_for_user(user_id, ['userId', 'blueprintId', 'gardenId', 'name'])
+    for garden in gardens:
+        index_document(user_id, 'garden', garden['gardenId'], garden)
+    for blueprint in blueprints:
+        index_document(user_id, 'blueprint', blueprint['blueprintId'], blueprint, blueprint.get('gardenId'))
+    return len(gardens), len(blueprints)
+
+
+def main():
+    """Backfill or repair the search index for users"""
+    parser = argparse.ArgumentParser(description="Rebuild the garden search index")
+    parser.add_argument('users', nargs='+', help="User IDs to re-index")
+    args = parser.parse_args()
+
+    for user_id in args.users:
+        gardens, blueprints = rebuild_user(user_id)
+        print(f"{user_id}: indexed {gardens} gardens, {blueprints} blueprints")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ import json
 import boto3
 import os
 from botocore.exceptions import ClientError
+import rate_limit
 
 client = boto3.client("cognito-idp")
 
@@ -36,6 +37,11 @@ def handler(event, context):
     if not all([name, email, password]):
         return respond(400, {"message": "All fields are required"})
 
+    # Reject bursts before they reach Cognito and use up the account's quota
+    retry_after = rate_limit.check("signup", event, email)
+    if retry_after:
+        return rate_limit.throttled(respond, retry_after)
+
     try:
         response = client.sign_up(
             ClientId=os.environ["CLIENT_ID"],
@@ -57,6 +63,9 @@ def handler(event, context):
     except client.exceptions.InvalidParameterException as e:
         return respond(400, {"message": str(e)})
 
+    except client.exceptions.TooManyRequestsException:
+        return rate_limit.throttled(respond, 1)
+
     except ClientError as e:
         error = e.response["Error"]
         return respond(400, {"message": error.get("Message", "Unknown Cognito error")})
@@ -0,0 +1,102 @@
+import json
+from botocore.exceptions import ClientError
+from simple_auth import require_auth, respond
+from blueprint_similarity import similar_to_image
+from embedding_index import corpus_version
+from planting_masks import get_mask_bank, plot_bbox
+from repositories import BlueprintRepository
+
+blueprint_repository = BlueprintRepository()
+
+# Matches are computed and cached for the largest k; smaller requests slice them
+MAX_K = 20
+DEFAULT_K = 5
+
+def with_plantings(matches, blueprint_data):
+    """Matches plus their pair's planting regions placed on the blueprint's plot"""
+    bbox = plot_bbox(blueprint_data)
+    bank = get_mask_bank()
+    return [{**match, "plantings": bank.transfer(match['row'], bbox) if bbox else []} for match in matches]
+
+@require_auth
+def handler(event, context):
+    """
+    Nearest corpus pairs (empty plot -> planted version) for a blueprint's PNG:
+    GET /blueprints/{blueprintId}/similar?k=5&plantings=true
+
+    With plantings=true every match also carries the planting regions of its
+    pair, mapped onto this blueprint's plot bounding box (precomputed mask
+    bank, no pixel work).
+
+    Results are cached on the item as similarMatches, keyed by the blueprint
+    version and the corpus version, so a repeat view is a single small read.
+    A save bumps the version and a corpus rebuild changes corpus_version(),
+    either of which makes the cached matches stale.
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        blueprint_id = (event.get('pathParameters') or {}).get('blueprintId')
+        if not blueprint_id:
+            return respond(400, {"message": "Blueprint ID is required"})
+
+        params = event.get('queryStringParameters') or {}
+        try:
+            k = int(params.get('k', DEFAULT_K))
+        except ValueError:
+            return respond(400, {"message": "k must be an integer"})
+        if not 1 <= k <= MAX_K:
+            return respond(400, {"message": f"k must be between 1 and {MAX_K}"})
+        plantings = params.get('plantings', '').lower() == 'true'
+
+        # Read the cache without the (large) PNG first
+        fields = ['version', 'similarMatches'] + (['blueprintData'] if plantings else [])
+        blueprint = blueprint_repository.get(user_id, blueprint_id, fields=fields)
+        if not blueprint:
+            return respond(404, {"message": "Blueprint not found"})
+
+        # Items created before versioning have no version attribute
+        version = int(blueprint.get('version', 0))
+        corpus = corpus_version()
+
+        matches = None
+        cached = blueprint.get('similarMatches')
+        if cached:
+            try:
+                cached = json.loads(cached)
+                if cached.get('version') == version and cached.get('corpusVersion') == corpus:
+                    matches = cached['matches']
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse cached similarMatches for blueprint {blueprint_id}")
+
+        from_cache = matches is not None
+        if not from_cache:
+            png_image = (blueprint_repository.get(user_id, blueprint_id, fields=['pngImage']) or {}).get('pngImage')
+            if not png_image:
+                return respond(422, {"message": "Blueprint has no PNG image to match"})
+
+            matches = similar_to_image(png_image, MAX_K)
+
+            # Store as JSON string; only write if nobody saved a newer version meanwhile
+            cached_matches = {'similarMatches': json.dumps({"version": version, "corpusVersion": corpus, "matches": matches})}
+            if not blueprint_repository.set_if_version(user_id, blueprint_id, cached_matches, version):
+                print(f"Blueprint {blueprint_id} changed while matching, not caching")
+
+        matches = matches[:k]
+        if plantings:
+            matches = with_plantings(matches, blueprint.get('blueprintData'))
+
+        return respond(200, {"matches": matches, "version": version, "cached": from_cache})
+
+    except json.JSONDecodeError:
+        return respond(422, {"message": "Stored blueprintData is not valid JSON"})
+    except FileNotFoundError as e:
+        print(f"Similarity corpus missing: {e}")
+        return respond(503, {"message": "Similarity search is not available"})
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
@@ -1,7 +1,9 @@
 import json
+from decimal import Decimal
 import boto3
 import os
 from botocore.exceptions import ClientError
+from async_support import run
 
 def cors_headers():
     return {
@@ -10,11 +12,17 @@ def cors_headers():
         "Access-Control-Allow-Headers": "Content-Type,Authorization"
     }
 
+def json_default(value):
+    """Serialize DynamoDB numbers (Decimal) as int or float"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 def respond(status, body):
     return {
         "statusCode": status,
         "headers": cors_headers(),
-        "body": json.dumps(body)
+        "body": json.dumps(body, default=json_default)
     }
 
 def get_user_id_from_token(event):
@@ -85,4 +93,24 @@ def require_auth(handler_func):
         # Call the original handler
         return handler_func(event, context)
     
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def require_auth_async(handler_coro):
+    """
+    require_auth for async handlers: authenticates synchronously, then runs
+    the coroutine on the container's event loop so Lambda sees a plain function
+    """
+    def wrapper(event, context):
+        # Handle CORS preflight
+        if event.get("httpMethod") == "OPTIONS":
+            return respond(200, {"message": "CORS preflight"})
+
+        user_id, error = get_user_id_from_token(event)
+        if error:
+            return respond(401, {"message": f"Authentication required: {error}"})
+
+        event['user_id'] = user_id
+        return run(handler_coro(event, context))
+
+    return wrapper
@@ -1,17 +1,43 @@
 import json
-import boto3
-import os
 from datetime import datetime
 from botocore.exceptions import ClientError
 from simple_auth import require_auth, respond
+from blueprint_simplify import parse_simplify_option, simplify_pathways
+from blueprint_versions import build_version_item
+from image_hash import data_hash, image_hashes, png_hash
+from repositories import BlueprintRepository
+from search_index import index_blueprint
+import user_summary
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['BLUEPRINTS_TABLE'])
+blueprint_repository = BlueprintRepository()
+
+def parse_blueprint(item):
+    """blueprintData JSON string back to an object for responses"""
+    item.pop('originalPathways', None)
+    if 'blueprintData' in item and isinstance(item['blueprintData'], str):
+        try:
+            item['blueprintData'] = json.loads(item['blueprintData'])
+        except json.JSONDecodeError:
+            print(f"Warning: Could not parse blueprintData")
+    return item
+
+def load_stored_data(blueprint):
+    """Previous blueprintData as an object, or None if missing or unparseable"""
+    try:
+        return json.loads(blueprint['blueprintData']) if blueprint.get('blueprintData') else None
+    except json.JSONDecodeError:
+        print(f"Warning: Could not parse stored blueprintData")
+        return None
 
 @require_auth
 def handler(event, context):
     """
-    Update an existing blueprint
+    Update an existing blueprint. Every save appends an entry to the version
+    log (a delta against the previous version or a periodic snapshot) in the
+    same transaction as the item update.
+
+    A save whose name, blueprintData hash and PNG SHA-256 all match the stored
+    blueprint, and that sends no PDF, is skipped (no write, no new version).
     """
     try:
         # Get authenticated user ID from the decorator
@@ -24,61 +50,124 @@ def handler(event, context):
             return respond(400, {"message": "Blueprint ID is required"})
 
         body = json.loads(event.get("body", "{}"))
-        
-        # Build update expression
-        update_expression = "SET updatedAt = :updatedAt"
-        expression_values = {
-            ':updatedAt': datetime.utcnow().isoformat()
+
+        # Read the current data and version to diff against
+        current = blueprint_repository.get(user_id, blueprint_id, fields=['blueprintData', 'version', 'lastSnapshotVersion', 'gardenId', 'name', 'dataHash', 'pngHash'])
+        if not current:
+            return respond(404, {"message": "Blueprint not found"})
+
+        # Items created before versioning have no version attribute
+        current_version = int(current.get('version', 0))
+        new_version = current_version + 1
+        old_data = load_stored_data(current)
+        new_data = old_data
+
+        current_time = datetime.utcnow().isoformat()
+        # Bumping the version makes caches keyed on it (e.g. geometryStats) go stale
+        fields = {
+            'updatedAt': current_time,
+            'userUpdatedAt': f"{user_id}#{current_time}",  # GardenUserUpdatedIndex sort key
+            'version': new_version
         }
-        expression_names = {}
 
         if 'name' in body:
-            update_expression += ", #name = :name"
-            expression_values[':name'] = body['name']
-            expression_names['#name'] = 'name'
+            fields['name'] = body['name']
 
+        # Similarity matches are for the old render; drop them rather than keep stale data
+        remove_attributes = ['similarMatches']
+        simplification = None
         if 'blueprintData' in body:
-            update_expression += ", blueprintData = :blueprintData"
+            blueprint_data = body['blueprintData']
+
+            # Optionally thin out freehand pathway vertices before storing
+            try:
+                simplify, tolerance, keep_original = parse_simplify_option(body)
+            except (TypeError, ValueError):
+                return respond(400, {"message": "Invalid simplify options"})
+
+            original_pathways = {}
+            if simplify:
+                blueprint_data, original_pathways, simplification = simplify_pathways(blueprint_data, tolerance)
+                print(f"Pathway simplification: {simplification}")
+
+            new_data = blueprint_data
             # Store as JSON string
-            expression_values[':blueprintData'] = json.dumps(body['blueprintData'])
+            fields['blueprintData'] = json.dumps(blueprint_data)
+            fields['dataHash'] = data_hash(blueprint_data)
+
+            # Originals from a previous save no longer match the new data
+            if keep_original and original_pathways:
+                fields['originalPathways'] = json.dumps(original_pathways)
+            else:
+                remove_attributes.append('originalPathways')
 
+        png_hashes = {}
         if 'pngImage' in body:
-            update_expression += ", pngImage = :pngImage"
-            expression_values[':pngImage'] = body['pngImage']
+            fields['pngImage'] = body['pngImage']
+            if body['pngImage']:
+                fields['pngHash'] = png_hash(body['pngImage'])
+            else:
+                remove_attributes.append('pngHash')
+            png_hashes = image_hashes(body['pngImage'])
+            if png_hashes:
+                fields.update(png_hashes)
+            else:
+                remove_attributes += ['imagePHash', 'imageDHash']
 
         if 'pdfImage' in body:
-            update_expression += ", pdfImage = :pdfImage"
-            expression_values[':pdfImage'] = body['pdfImage']
-
-        # Update item in DynamoDB
-        response = table.update_item(
-            Key={
-                'userId': user_id,
-                'blueprintId': blueprint_id
-            },
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values,
-            ExpressionAttributeNames=expression_names if expression_names else None,
-            ConditionExpression='attribute_exists(blueprintId)',
-            ReturnValues='ALL_NEW'
+            fields['pdfImage'] = body['pdfImage']
+
+        # Items saved before hashing have no dataHash; derive it from the stored data
+        stored_hash = current.get('dataHash') or (data_hash(old_data) if old_data is not None else None)
+        unchanged = (
+            body.get('name', current.get('name')) == current.get('name')
+            and ('dataHash' not in fields or fields['dataHash'] == stored_hash)
+            # Exact digest: pHash is lossy and would drop small edits to the render.
+            # Without a stored digest (or a new PNG) the save is always written.
+            and ('pngImage' not in body or (fields.get('pngHash') is not None and fields['pngHash'] == current.get('pngHash')))
+            # The PDF is not hashed, so a save that sends one is always written
+            and 'pdfImage' not in body
         )
+        if unchanged:
+            print(f"Blueprint {blueprint_id} unchanged, skipping save")
+            return respond(200, {
+                "message": "Blueprint unchanged",
+                "unchanged": True,
+                "blueprint": parse_blueprint(blueprint_repository.get(user_id, blueprint_id))
+            })
 
-        # Parse blueprintData JSON string back to object for response
-        updated_item = response['Attributes']
-        if 'blueprintData' in updated_item and isinstance(updated_item['blueprintData'], str):
-            try:
-                updated_item['blueprintData'] = json.loads(updated_item['blueprintData'])
-            except json.JSONDecodeError:
-                print(f"Warning: Could not parse blueprintData")
+        version_item, snapshot_version = build_version_item(
+            user_id, blueprint_id, new_version, old_data,
+            new_data if new_data is not None else {},
+            int(current.get('lastSnapshotVersion', 0)), current_time
+        )
+        fields['lastSnapshotVersion'] = snapshot_version
 
-        return respond(200, {
+        # Update the item and append the version entry atomically; the version
+        # condition rejects a concurrent save that read the same base version
+        try:
+            blueprint_repository.save(user_id, blueprint_id, fields, remove_attributes, current_version, version_item, also=[
+                user_summary.edited(user_id, current_time, current.get('gardenId'))
+            ])
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'TransactionCanceledException':
+                return respond(409, {"message": "Blueprint was modified by another save, please reload"})
+            raise
+
+        updated_item = blueprint_repository.get(user_id, blueprint_id)
+        if 'name' in body:
+            index_blueprint(updated_item)
+
+        response_body = {
             "message": "Blueprint updated successfully",
-            "blueprint": updated_item
-        })
+            "blueprint": parse_blueprint(updated_item)
+        }
+        if simplification:
+            response_body["simplification"] = simplification
+
+        return respond(200, response_body)
 
     except ClientError as e:
-        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-            return respond(404, {"message": "Blueprint not found"})
         print(f"DynamoDB error: {e}")
         return respond(500, {"message": "Database error occurred"})
     except json.JSONDecodeError:
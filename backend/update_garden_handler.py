@@ -1,15 +1,21 @@
 import json
-import boto3
-import os
 from datetime import datetime
 from botocore.exceptions import ClientError
 from simple_auth import require_auth, respond
+from repositories import GardenRepository
+from search_index import index_garden
+from geocoding import GeocodingError, garden_coordinates, parse_coordinates
+import user_summary
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['GARDENS_TABLE'])
+garden_repository = GardenRepository()
 
 @require_auth
 def handler(event, context):
+    """
+    Update a garden. plantCountDelta (e.g. 3 or -1) adjusts plantCount
+    atomically, together with the user's summary; a delta that would take
+    the count below zero is rejected with 409.
+    """
     try:
         # Get authenticated user ID from the decorator
         user_id = event['user_id']
@@ -25,44 +31,59 @@ def handler(event, context):
         garden_location = body.get("location")
         garden_description = body.get("description")
 
-        # Build update expression dynamically
-        current_time = datetime.utcnow().isoformat()
-        update_expression = "SET updatedAt = :updatedAt"
-        expression_attribute_values = {
-            ":updatedAt": current_time
-        }
+        try:
+            lat, lon = parse_coordinates(body.get("lat"), body.get("lon"))
+        except (TypeError, ValueError):
+            return respond(400, {"message": "Invalid lat/lon"})
+
+        plant_delta = body.get("plantCountDelta", 0)
+        if isinstance(plant_delta, bool) or not isinstance(plant_delta, int):
+            return respond(400, {"message": "plantCountDelta must be an integer"})
+
+        # Collect the fields to change
+        fields = {"updatedAt": datetime.utcnow().isoformat()}
 
         if garden_name is not None:
-            update_expression += ", #name = :name"
-            expression_attribute_values[":name"] = garden_name
+            fields["name"] = garden_name
 
         if garden_location is not None:
-            update_expression += ", #location = :location"
-            expression_attribute_values[":location"] = garden_location
+            fields["location"] = garden_location
 
         if garden_description is not None:
-            update_expression += ", description = :description"
-            expression_attribute_values[":description"] = garden_description
+            fields["description"] = garden_description
 
-        # Update garden in DynamoDB
-        response = table.update_item(
-            Key={
-                'userId': user_id,
-                'gardenId': garden_id
-            },
-            UpdateExpression=update_expression,
-            ExpressionAttributeNames={
-                '#name': 'name',
-                '#location': 'location'
-            },
-            ExpressionAttributeValues=expression_attribute_values,
-            ReturnValues="ALL_NEW"
-        )
+        # Explicit coordinates, or a location text that actually changed, replace
+        # the stored lat/lon. An address the geocoder does not know drops them
+        # (they would be stale); a geocoder outage keeps them.
+        remove = []
+        if lat is not None:
+            fields.update(garden_coordinates(garden_location, lat, lon))
+        elif garden_location is not None:
+            stored = garden_repository.read(user_id, garden_id) or {}
+            if garden_location != stored.get("location"):
+                try:
+                    coordinates = garden_coordinates(garden_location, raise_errors=True)
+                except GeocodingError as e:
+                    print(f"Warning: geocoding failed for {garden_location!r}, keeping coordinates: {e}")
+                else:
+                    if coordinates:
+                        fields.update(coordinates)
+                    else:
+                        remove = ["lat", "lon", "geohash"]
 
-        updated_garden = response.get('Attributes')
+        # Update garden and the user's summary in one transaction (None if it does not exist)
+        add = {"plantCount": plant_delta} if plant_delta else None
+        updated_garden = garden_repository.update(user_id, garden_id, fields, remove=remove, add=add, also=[
+            user_summary.edited(user_id, fields["updatedAt"], garden_id, plantCount=plant_delta)
+        ])
         if not updated_garden:
+            if plant_delta < 0 and garden_repository.read(user_id, garden_id):
+                return respond(409, {"message": "plantCount cannot go below zero"})
             return respond(404, {"message": "Garden not found"})
 
+        if len(fields) > 1:
+            index_garden(updated_garden)
+
         return respond(200, {
             "message": "Garden updated successfully",
             "garden": updated_garden
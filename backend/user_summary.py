@@ -0,0 +1,125 @@
+import argparse
+from collections import Counter
+from datetime import datetime
+from repositories import BlueprintRepository, GardenRepository, SummaryRepository
+
+# A recount starts over when a write changes a counter while it is counting
+RECOUNT_ATTEMPTS = 5
+
+_repository = None
+
+
+def get_repository():
+    global _repository
+    if _repository is None:
+        _repository = SummaryRepository()
+    return _repository
+
+
+def edited(user_id, edited_at, garden_id=None, **deltas):
+    """
+    TransactItems entry for the user's summary: records the edit time and
+    adds the counter deltas, e.g. edited(user_id, now, garden_id, gardenCount=1)
+    """
+    fields = {'lastEditedAt': edited_at}
+    if garden_id:
+        fields['lastEditedGardenId'] = garden_id
+    return get_repository().change(user_id, add=deltas, fields=fields)
+
+
+def garden_removed(garden):
+    """TransactItems subtracting a deleted garden and everything counted on it"""
+    return [edited(
+        garden['userId'],
+        datetime.utcnow().isoformat(),
+        gardenCount=-1,
+        blueprintCount=-int(garden.get('blueprintCount', 0)),
+        plantCount=-int(garden.get('plantCount', 0))
+    )]
+
+
+def recount(user_id, garden_repository=None, blueprint_repository=None, overwrite=False):
+    """
+    Count a user's gardens and blueprints from the tables and store the totals.
+    Needed once per account: items written before counters existed are not
+    in the ADD deltas. Garden blueprintCounts that disagree with the table
+    (missing, or only counting blueprints created since counters existed) are
+    corrected too. overwrite replaces totals that were already counted.
+
+    Counters are read before the tables are counted and only overwritten if
+    they still hold those values, so a delta committed during the count
+    makes the recount start over instead of being lost.
+    """
+    garden_repository = garden_repository or GardenRepository()
+    blueprint_repository = blueprint_repository or BlueprintRepository()
+
+    for _ in range(RECOUNT_ATTEMPTS):
+        before = get_repository().get(user_id) or {}
+        if not overwrite and 'countedAt' in before:
+            # Another request counted first; its item is the one being maintained
+            return before
+
+        # Gardens before blueprints: a blueprint created in between is then
+        # counted but missing from its garden's stored count, and fails the check
+        gardens = garden_repository.list_for_user(user_id, cached=False)
+        blueprints = blueprint_repository.list_for_user(user_id, ['blueprintId', 'gardenId', 'updatedAt'])
+        per_garden = Counter(blueprint.get('gardenId') for blueprint in blueprints)
+
+        corrected = all(
+            garden_repository.set_counters(
+                user_id, garden['gardenId'],
+                {'blueprintCount': per_garden[garden['gardenId']]},
+                expected={'blueprintCount': garden.get('blueprintCount')}
+            )
+            for garden in gardens
+            if garden.get('blueprintCount') is None or int(garden['blueprintCount']) != per_garden[garden['gardenId']]
+        )
+        if not corrected:
+            continue
+
+        edits = [(item.get('updatedAt', ''), item.get('gardenId')) for item in gardens + blueprints]
+        last_edited_at, last_garden_id = max(edits, key=lambda edit: edit[0]) if edits else (None, None)
+        fields = {
+            'gardenCount': len(gardens),
+            # Blueprints of deleted gardens are orphans and are not counted
+            'blueprintCount': sum(per_garden[garden['gardenId']] for garden in gardens),
+            'plantCount': sum(int(garden.get('plantCount', 0)) for garden in gardens),
+            'countedAt': datetime.utcnow().isoformat()
+        }
+        if last_edited_at:
+            fields['lastEditedAt'] = last_edited_at
+            if last_garden_id:
+                fields['lastEditedGardenId'] = last_garden_id
+
+        if get_repository().initialize(user_id, fields, expected=before, overwrite=overwrite):
+            return {'userId': user_id, **fields}
+
+    raise RuntimeError(f"Summary for {user_id} kept changing during {RECOUNT_ATTEMPTS} recounts")
+
+
+def get_summary(user_id):
+    """The user's totals: one GetItem, plus a one-off recount for uncounted accounts"""
+    summary = get_repository().get(user_id)
+    if not summary or 'countedAt' not in summary:
+        print(f"Summary for {user_id} not counted yet, recounting")
+        summary = recount(user_id)
+
+    result = {counter: int(summary.get(counter, 0)) for counter in SummaryRepository.COUNTERS}
+    result['lastEditedAt'] = summary.get('lastEditedAt')
+    result['lastEditedGardenId'] = summary.get('lastEditedGardenId')
+    return result
+
+
+def main():
+    """Recount summaries for users (e.g. after a manual data fix)"""
+    parser = argparse.ArgumentParser(description="Recount per-user garden summaries")
+    parser.add_argument('users', nargs='+', help="User IDs to recount")
+    args = parser.parse_args()
+
+    for user_id in args.users:
+        summary = recount(user_id, overwrite=True)
+        print(f"{user_id}: {summary}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+from botocore.exceptions import ClientError
+from simple_auth import require_auth, respond
+from user_summary import get_summary
+
+@require_auth
+def handler(event, context):
+    """
+    Dashboard totals for the user: GET /gardens/summary
+    {gardenCount, blueprintCount, plantCount, lastEditedAt, lastEditedGardenId}
+    """
+    try:
+        # Get authenticated user ID from the decorator
+        user_id = event['user_id']
+
+        # A single GetItem regardless of how many gardens the user has
+        summary = get_summary(user_id)
+
+        return respond(200, {
+            "summary": summary
+        })
+
+    except ClientError as e:
+        print(f"DynamoDB error: {e}")
+        return respond(500, {"message": "Database error occurred"})
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return respond(500, {"message": "Internal server error"})
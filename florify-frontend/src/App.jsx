@@ -1,4 +1,5 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
+import { clearSession, resumeSession, setSessionExpiredHandler } from './api/auth';
 import { BrowserRouter as Router, Routes, Route, Navigate } from 'react-router-dom';
 import LoginPage from './pages/LoginPage';
 import SignupPage from './pages/SignupPage';
@@ -12,8 +13,9 @@ import SectionedDrawingTest from './components/EmptyGardenWizard/SectionedDrawin
 import ImageDownloadTest from './components/EmptyGardenWizard/ImageDownloadTest';
 
 function App() {
-  const [userEmail, setUserEmail] = useState('');
-  const [isAuthenticated, setIsAuthenticated] = useState(false);
+  // A session stored before a reload is restored (and its refresh re-armed) on mount
+  const [userEmail, setUserEmail] = useState(() => localStorage.getItem('userEmail') || '');
+  const [isAuthenticated, setIsAuthenticated] = useState(() => Boolean(localStorage.getItem('token')));
 
   const handleLogin = (email) => {
     setUserEmail(email);
@@ -23,9 +25,18 @@ function App() {
   const handleLogout = () => {
     setUserEmail('');
     setIsAuthenticated(false);
-    localStorage.removeItem('token');
+    clearSession();
   };
 
+  useEffect(() => {
+    // Refresh failed for good: drop the session; the routes redirect to /login
+    setSessionExpiredHandler(() => handleLogout());
+    if (!resumeSession()) {
+      setIsAuthenticated(false);
+    }
+    return () => setSessionExpiredHandler(null);
+  }, []);
+
   return (
     <Router>
       <Routes>
@@ -79,3 +79,140 @@ export const resend = async (email) => {
     throw error;
   }
 };
+
+// ----------------- REFRESH -----------------
+export const refresh = async (refreshToken) => {
+  try {
+    const response = await api.post('/refresh', { refreshToken });
+    return response.data;
+  } catch (error) {
+    throw error;
+  }
+};
+
+// ----------------- SESSION SCHEDULING -----------------
+// The ID token is renewed shortly before it expires, in the background, so
+// no user action ever waits on a password login or a refresh round trip.
+
+const REFRESH_MARGIN_MS = 5 * 60 * 1000; // renew 5 minutes before expiry
+const RETRY_DELAY_MS = 30 * 1000;
+
+let refreshTimer = null;
+let refreshInFlight = null;
+// Called when the session can no longer be renewed (set by App)
+let sessionExpiredHandler = null;
+
+export const setSessionExpiredHandler = (handler) => {
+  sessionExpiredHandler = handler;
+};
+
+// Expiry (ms since epoch) from the token's own exp claim
+const tokenExpiry = (token) => {
+  try {
+    const payload = token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/');
+    return JSON.parse(atob(payload)).exp * 1000;
+  } catch (error) {
+    return null;
+  }
+};
+
+export const getTokenExpiry = () => {
+  const stored = Number(localStorage.getItem('tokenExpiresAt'));
+  return stored || tokenExpiry(localStorage.getItem('token') || '');
+};
+
+export const cancelTokenRefresh = () => {
+  if (refreshTimer) {
+    clearTimeout(refreshTimer);
+    refreshTimer = null;
+  }
+};
+
+// Store tokens from a login or refresh response and schedule the next renewal
+export const saveSession = (data) => {
+  localStorage.setItem('token', data.token);
+  if (data.refreshToken) {
+    localStorage.setItem('refreshToken', data.refreshToken);
+  }
+  const expiresAt = data.expiresIn
+    ? Date.now() + data.expiresIn * 1000
+    : tokenExpiry(data.token);
+  if (expiresAt) {
+    localStorage.setItem('tokenExpiresAt', String(expiresAt));
+  }
+  scheduleTokenRefresh(sessionExpiredHandler);
+};
+
+export const clearSession = () => {
+  cancelTokenRefresh();
+  localStorage.removeItem('token');
+  localStorage.removeItem('refreshToken');
+  localStorage.removeItem('tokenExpiresAt');
+  localStorage.removeItem('userEmail');
+};
+
+// On page load: re-arm the refresh timer for a stored session. Returns false
+// (and clears it) if there is no session or it expired with no way to renew.
+export const resumeSession = (onExpired = sessionExpiredHandler) => {
+  const token = localStorage.getItem('token');
+  if (!token) {
+    return false;
+  }
+  const expiresAt = getTokenExpiry();
+  if ((!expiresAt || expiresAt <= Date.now()) && !localStorage.getItem('refreshToken')) {
+    clearSession();
+    return false;
+  }
+  scheduleTokenRefresh(onExpired);
+  return true;
+};
+
+// Renew now; concurrent callers share one request
+export const refreshSession = () => {
+  if (!refreshInFlight) {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (!refreshToken) {
+      return Promise.reject(new Error('No refresh token, please log in again'));
+    }
+    refreshInFlight = refresh(refreshToken)
+      .then((data) => {
+        saveSession(data);
+        return data.token;
+      })
+      .finally(() => {
+        refreshInFlight = null;
+      });
+  }
+  return refreshInFlight;
+};
+
+// Arm a timer for REFRESH_MARGIN_MS before expiry. onExpired is called if the
+// session can no longer be renewed (refresh token expired or revoked).
+export const scheduleTokenRefresh = (onExpired = sessionExpiredHandler) => {
+  cancelTokenRefresh();
+  const expiresAt = getTokenExpiry();
+  if (!expiresAt || !localStorage.getItem('refreshToken')) {
+    return;
+  }
+
+  const delay = Math.max(expiresAt - Date.now() - REFRESH_MARGIN_MS, 0);
+  refreshTimer = setTimeout(() => {
+    refreshSession().catch((error) => {
+      if (Date.now() < expiresAt) {
+        // Transient failure: try again while the current token is still valid
+        refreshTimer = setTimeout(() => scheduleTokenRefresh(onExpired), RETRY_DELAY_MS);
+      } else if (onExpired) {
+        onExpired(error);
+      }
+    });
+  }, delay);
+};
+
+// For request interceptors: a token that is valid for the next request
+export const ensureFreshToken = async () => {
+  const expiresAt = getTokenExpiry();
+  if (expiresAt && expiresAt - Date.now() < 30 * 1000 && localStorage.getItem('refreshToken')) {
+    return refreshSession();
+  }
+  return localStorage.getItem('token');
+};
@@ -1,5 +1,6 @@
 // src/api/blueprints.js
 import axios from "axios";
+import { ensureFreshToken } from "./auth";
 
 // Replace with your API Gateway Invoke URL after deployment
 const API_BASE_URL = "https://jiazehdrvf.execute-api.eu-north-1.amazonaws.com/dev";
@@ -15,8 +16,9 @@ const api = axios.create({
 
 // Add request interceptor to include auth token
 api.interceptors.request.use(
-  (config) => {
-    const token = localStorage.getItem('token');
+  async (config) => {
+    // Normally renewed in the background already; only refreshes here if about to expire
+    const token = await ensureFreshToken().catch(() => localStorage.getItem('token'));
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
@@ -110,9 +112,20 @@ export const updateBlueprint = async (blueprintId, blueprintData) => {
   }
 };
 
+// Planted designs from the corpus that match a blueprint's plot (cached per blueprint version)
+export const getSimilarBlueprints = async (blueprintId, k = 5) => {
+  try {
+    const response = await api.get(`/blueprints/${blueprintId}/similar`, { params: { k } });
+    return response.data;
+  } catch (error) {
+    throw error;
+  }
+};
+
 export default {
   createBlueprint,
   getBlueprint,
   getBlueprintByGarden,
   updateBlueprint,
+  getSimilarBlueprints,
 };
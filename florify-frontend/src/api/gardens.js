@@ -1,5 +1,6 @@
 // src/api/gardens.js
 import axios from "axios";
+import { ensureFreshToken } from "./auth";
 
 // Replace with your API Gateway Invoke URL after deployment
 const API_BASE_URL = "https://jiazehdrvf.execute-api.eu-north-1.amazonaws.com/dev";
@@ -15,8 +16,9 @@ const api = axios.create({
 
 // Add request interceptor to include auth token
 api.interceptors.request.use(
-  (config) => {
-    const token = localStorage.getItem('token');
+  async (config) => {
+    // Normally renewed in the background already; only refreshes here if about to expire
+    const token = await ensureFreshToken().catch(() => localStorage.getItem('token'));
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
@@ -83,6 +85,18 @@ export const getGarden = async (gardenId) => {
   }
 };
 
+// Get a garden and its blueprint metadata in a single request
+export const getGardenOverview = async (gardenId, { includeImages = false } = {}) => {
+  try {
+    const response = await api.get(`/gardens/${gardenId}/overview`, {
+      params: includeImages ? { images: 'true' } : undefined,
+    });
+    return response.data;
+  } catch (error) {
+    throw error;
+  }
+};
+
 // Update a garden
 export const updateGarden = async (gardenId, gardenData) => {
   try {
@@ -101,4 +115,25 @@ export const deleteGarden = async (gardenId) => {
   } catch (error) {
     throw error;
   }
-};
\ No newline at end of file
+};
+// Search the user's gardens and blueprints by word prefix
+export const searchGardens = async (query, { type, limit } = {}) => {
+  try {
+    const response = await api.get('/gardens/search', {
+      params: { q: query, type, limit },
+    });
+    return response.data;
+  } catch (error) {
+    throw error;
+  }
+};
+
+// Dashboard totals: garden, blueprint and plant counts plus the last edit
+export const getGardenSummary = async () => {
+  try {
+    const response = await api.get('/gardens/summary');
+    return response.data.summary;
+  } catch (error) {
+    throw error;
+  }
+};
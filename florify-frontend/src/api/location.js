@@ -1,58 +1,98 @@
 // src/api/location.js
-// Location API service for future geocoding and location features
+// Location API service: geocoding goes through the backend, which caches
+// results (normalized address -> coordinates) in front of the provider
+import axios from "axios";
+import { ensureFreshToken } from "./auth";
 
-// This is a placeholder for future location functionality
-// You can integrate with services like:
-// - Google Maps Geocoding API
-// - OpenStreetMap Nominatim
-// - Mapbox Geocoding API
+// Replace with your API Gateway Invoke URL after deployment
+const API_BASE_URL = "https://jiazehdrvf.execute-api.eu-north-1.amazonaws.com/dev";
 
+// Create axios instance with better error handling
+const api = axios.create({
+  baseURL: API_BASE_URL,
+  timeout: 10000, // 10 second timeout
+  headers: {
+    'Content-Type': 'application/json',
+  }
+});
+
+// Add request interceptor to include auth token
+api.interceptors.request.use(
+  async (config) => {
+    // Normally renewed in the background already; only refreshes here if about to expire
+    const token = await ensureFreshToken().catch(() => localStorage.getItem('token'));
+    if (token) {
+      config.headers.Authorization = `Bearer ${token}`;
+    }
+    return config;
+  },
+  (error) => {
+    return Promise.reject(error);
+  }
+);
+
+// Add response interceptor for better error handling
+api.interceptors.response.use(
+  (response) => response,
+  (error) => {
+    console.error('API Error:', error);
+    
+    if (error.code === 'ECONNABORTED') {
+      throw new Error('Request timeout. Please check your internet connection.');
+    }
+    
+    if (error.response) {
+      // Server responded with error status
+      const errorMessage = error.response.data?.message || 'Server error occurred';
+      throw new Error(errorMessage);
+    } else if (error.request) {
+      // Request was made but no response received
+      throw new Error('Network error. Please check your internet connection and try again.');
+    } else {
+      // Something else happened
+      throw new Error('An unexpected error occurred. Please try again.');
+    }
+  }
+);
+
+// Coordinates for a free-text address
 export const geocodeAddress = async (address) => {
-  // Placeholder implementation
-  // In production, you would call a geocoding service
-  console.log('Geocoding address:', address);
-  
-  // Mock response for now
+  const response = await api.get('/geocode', { params: { address } });
+  const { lat, lon, formattedAddress, placeId } = response.data.result;
   return {
-    latitude: 40.7128,
-    longitude: -74.0060,
-    formattedAddress: address,
-    placeId: 'mock-place-id'
+    latitude: lat,
+    longitude: lon,
+    formattedAddress,
+    placeId
   };
 };
 
+// Nearest address for coordinates
 export const reverseGeocode = async (latitude, longitude) => {
-  // Placeholder implementation
-  // In production, you would call a reverse geocoding service
-  console.log('Reverse geocoding coordinates:', latitude, longitude);
-  
-  // Mock response for now
+  const response = await api.get('/geocode/reverse', {
+    params: { lat: latitude, lon: longitude },
+  });
+  const { formattedAddress, placeId } = response.data.result;
   return {
-    address: '123 Main St, New York, NY 10001',
-    placeId: 'mock-place-id'
+    address: formattedAddress,
+    placeId
   };
 };
 
+// The user's gardens near a point; radius is in metres
 export const getNearbyPlaces = async (latitude, longitude, radius = 1000) => {
-  // Placeholder implementation
-  // In production, you would call a places API
-  console.log('Getting nearby places:', latitude, longitude, radius);
-  
-  // Mock response for now
-  return [
-    {
-      name: 'Central Park',
-      address: 'Central Park, New York, NY',
-      distance: 500,
-      type: 'park'
-    },
-    {
-      name: 'Brooklyn Botanic Garden',
-      address: '990 Washington Ave, Brooklyn, NY 11225',
-      distance: 800,
-      type: 'garden'
-    }
-  ];
+  const response = await api.get('/gardens/near', {
+    params: { lat: latitude, lon: longitude, radius: radius / 1000 },
+  });
+  return response.data.gardens.map((garden) => ({
+    gardenId: garden.gardenId,
+    name: garden.name,
+    address: garden.location,
+    latitude: garden.lat,
+    longitude: garden.lon,
+    distance: Math.round(garden.distanceKm * 1000),
+    type: 'garden'
+  }));
 };
 
 // Google Maps integration helper
@@ -10,15 +10,23 @@ const GardenCard = ({ garden, onClick }) => {
     });
   };
 
+  const cardVariant = garden.imageVariants?.card || {};
+
   return (
     <div className="garden-card" onClick={onClick}>
       <div className="garden-image-container">
         {garden.imageUrl ? (
-          <img 
-            src={garden.imageUrl} 
-            alt={garden.name}
-            className="garden-image"
-          />
+          // Prefer the small card variants from the image worker, fall back to the original
+          <picture>
+            {cardVariant.avif && <source srcSet={cardVariant.avif} type="image/avif" />}
+            {cardVariant.webp && <source srcSet={cardVariant.webp} type="image/webp" />}
+            <img 
+              src={garden.imageUrl} 
+              alt={garden.name}
+              className="garden-image"
+              loading="lazy"
+            />
+          </picture>
         ) : (
           <div className="garden-placeholder">
             <span className="placeholder-icon">🌱</span>
@@ -1,7 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getGarden, updateGarden, deleteGarden } from '../api/gardens';
-import { getBlueprintByGarden } from '../api/blueprints';
+import { getGardenOverview, updateGarden, deleteGarden } from '../api/gardens';
 import Button from '../components/Button';
 import InputField from '../components/InputField';
 import './GardenDetailPage.css';
@@ -22,14 +21,15 @@ const GardenDetailPage = () => {
 
   useEffect(() => {
     loadGarden();
-    loadBlueprint();
   }, [gardenId]);
 
+  // Garden and blueprint come from one overview request
   const loadGarden = async () => {
     try {
       setLoading(true);
-      const response = await getGarden(gardenId);
+      const response = await getGardenOverview(gardenId, { includeImages: true });
       setGarden(response.garden);
+      setBlueprint(response.blueprint);
       setEditData({
         name: response.garden.name,
         location: response.garden.location,
@@ -44,7 +44,7 @@ const GardenDetailPage = () => {
 
   const loadBlueprint = async () => {
     try {
-      const response = await getBlueprintByGarden(gardenId);
+      const response = await getGardenOverview(gardenId, { includeImages: true });
       console.log('Blueprint loaded:', response.blueprint);
       setBlueprint(response.blueprint);
     } catch (err) {
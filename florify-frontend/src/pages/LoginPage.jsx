@@ -4,7 +4,7 @@ import AuthLayout from '../components/AuthLayout';
 import AnimatedText from '../components/AnimatedText';
 import InputField from '../components/InputField';
 import Button from '../components/Button';
-import { login } from '../api/auth';
+import { login, saveSession } from '../api/auth';
 
 const LoginPage = ({ onLogin }) => {
   const navigate = useNavigate();
@@ -41,8 +41,8 @@ const LoginPage = ({ onLogin }) => {
     try {
       const response = await login(formData);
       
-      // Store token and user info
-      localStorage.setItem('token', response.token);
+      // Store tokens and schedule background renewal before the ID token expires
+      saveSession(response);
       localStorage.setItem('userEmail', formData.email);
       
       alert('✅ Login successful!');